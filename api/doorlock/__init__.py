@@ -0,0 +1,7 @@
+"""
+Modul bersama untuk Doorlock + Absensi di Raspberry Pi
+
+Dipakai oleh doorlock_pi_final.py, doorlock_ui_modern.py,
+doorlock_ui_professional.py dan doorlock_absensi_complete.py supaya logika
+backend tidak perlu di-copy-paste ke setiap varian.
+"""
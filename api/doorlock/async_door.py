@@ -0,0 +1,86 @@
+"""
+Pintu untuk varian asyncio (doorlock_async.py)
+
+Sama seperti DoorScheduler tetapi tanpa thread: deadline relock dijadwalkan
+di event loop dengan loop.call_at, dan buka pintu saat masih terbuka hanya
+memindahkan handle ke deadline yang lebih jauh. Semua method dipanggil dari
+event loop yang sama.
+"""
+
+import asyncio
+
+
+class AsyncDoor:
+    """Relay + deadline relock yang dijalankan event loop"""
+
+    def __init__(self, gpio, pin, active_low=True, name="Pintu", delay=5):
+        self.gpio = gpio
+        self.pin = pin
+        self.active_low = active_low
+        self.name = name
+        self.delay = delay
+        self._deadline = None  # loop.time(); None = terkunci
+        self._handle = None
+
+    def setup(self):
+        # Terkunci saat start: Active LOW -> HIGH = OFF
+        self.gpio.setup_output(self.pin, self.active_low)
+
+    def _relay(self, active):
+        try:
+            self.gpio.write(self.pin, active != self.active_low)
+        except Exception as e:
+            print(f"✗ Relay control error: {e}")
+
+    @property
+    def is_locked(self):
+        return self._deadline is None
+
+    def unlock(self, delay_seconds=None):
+        """
+        Buka pintu; jika sudah terbuka, deadline relock diperpanjang.
+
+        Returns:
+            Sisa detik sampai terkunci otomatis
+        """
+        loop = asyncio.get_running_loop()
+        delay_seconds = delay_seconds or self.delay
+        deadline = loop.time() + delay_seconds
+
+        if self._deadline is None:
+            self._relay(True)
+            print(f"🔓 {self.name} TERBUKA (akan terkunci otomatis dalam {delay_seconds:g} detik)")
+        elif deadline <= self._deadline:
+            return round(self._deadline - loop.time(), 2)
+
+        self._deadline = deadline
+        if self._handle:
+            self._handle.cancel()
+        self._handle = loop.call_at(deadline, self._relock)
+        return round(deadline - loop.time(), 2)
+
+    def _relock(self):
+        self._handle = None
+        self._deadline = None
+        self._relay(False)
+        print(f"🔒 {self.name} TERKUNCI")
+
+    def lock(self):
+        """Kunci sekarang; return True jika sebelumnya terbuka"""
+        if self._deadline is None:
+            return False
+        if self._handle:
+            self._handle.cancel()
+        self._relock()
+        return True
+
+    def get_status(self):
+        remaining = 0
+        if self._deadline is not None:
+            remaining = round(max(0.0, self._deadline - asyncio.get_running_loop().time()), 2)
+        return {
+            "is_locked": self.is_locked,
+            "status": "TERKUNCI" if self.is_locked else "TERBUKA",
+            "remaining": remaining,
+            "gpio_mode": "HARDWARE" if self.gpio.hardware else "SIMULATED"
+        }
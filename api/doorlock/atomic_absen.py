@@ -0,0 +1,156 @@
+"""
+Validasi + INSERT absensi dalam satu round-trip (server-side)
+
+Alur biasa butuh beberapa round-trip berurutan (SELECT employee, SELECT log
+terakhir, INSERT + COMMIT) dan memakai read-then-write, sehingga dua tap
+bersamaan untuk kode yang sama bisa sama-sama lolos validasi.
+
+Stored function fn_absen menjalankan aturan urutan di MySQL:
+- row lock pada employees (SELECT ... FOR UPDATE) menserialisasi tap untuk
+  karyawan yang sama, sehingga race tertutup
+- log terakhir hari ini dibaca lewat index (employee_id, event_time)
+- INSERT hanya dilakukan jika aturan terpenuhi
+- hasil dikembalikan sebagai JSON berisi kode outcome
+
+Pi cukup menjalankan `SELECT fn_absen(...)` pada koneksi autocommit: satu
+round-trip, commit implisit di akhir statement.
+
+Syarat server: jika binary log aktif (default MySQL 8), CREATE FUNCTION yang
+NOT DETERMINISTIC ditolak (ERROR 1418/1419) kecuali user punya SUPER atau
+server diset:
+    SET GLOBAL log_bin_trust_function_creators = 1;
+    (permanen: log_bin_trust_function_creators = 1 di my.cnf [mysqld])
+install() melempar FunctionNotAllowed pada kasus ini agar pemanggil bisa
+kembali ke alur dua langkah.
+"""
+
+import json
+
+FUNCTION_NAME = "fn_absen"
+
+# ER_BINLOG_UNSAFE_ROUTINE, ER_BINLOG_CREATE_ROUTINE_NEED_SUPER
+BINLOG_ROUTINE_ERRORS = (1418, 1419)
+
+# Naikkan versi jika isi function berubah agar di-install ulang otomatis
+FUNCTION_VERSION = "1"
+
+CREATE_FUNCTION = f"""
+CREATE FUNCTION {FUNCTION_NAME}(p_code VARCHAR(255), p_status VARCHAR(20), p_time DATETIME)
+RETURNS JSON
+NOT DETERMINISTIC
+MODIFIES SQL DATA
+COMMENT 'doorlock v{FUNCTION_VERSION}'
+BEGIN
+    DECLARE v_id BIGINT UNSIGNED DEFAULT NULL;
+    DECLARE v_name VARCHAR(255) DEFAULT NULL;
+    DECLARE v_active TINYINT DEFAULT 0;
+    DECLARE v_last_status VARCHAR(20) DEFAULT NULL;
+    DECLARE v_last_time DATETIME DEFAULT NULL;
+    DECLARE v_outcome VARCHAR(20) DEFAULT 'ok';
+    DECLARE v_log_id BIGINT UNSIGNED DEFAULT NULL;
+    DECLARE CONTINUE HANDLER FOR NOT FOUND BEGIN END;
+
+    -- Row lock karyawan: tap bersamaan untuk kode yang sama diserialisasi
+    SELECT id, name, is_active INTO v_id, v_name, v_active
+    FROM employees WHERE code = p_code
+    FOR UPDATE;
+
+    IF v_id IS NULL THEN
+        SET v_outcome = 'not_found';
+    ELSEIF NOT v_active THEN
+        SET v_outcome = 'inactive';
+    ELSE
+        SELECT status, event_time INTO v_last_status, v_last_time
+        FROM attendance_logs
+        WHERE employee_id = v_id
+          AND event_time >= DATE(p_time)
+          AND event_time < DATE(p_time) + INTERVAL 1 DAY
+        ORDER BY event_time DESC, id DESC
+        LIMIT 1;
+
+        IF v_last_status = p_status THEN
+            SET v_outcome = 'duplicate';
+        ELSEIF p_status = 'masuk' AND v_last_status IN ('pulang', 'pulang_lembur') THEN
+            SET v_outcome = 'already_out';
+        ELSE
+            INSERT INTO attendance_logs (employee_id, status, event_time)
+            VALUES (v_id, p_status, p_time);
+            SET v_log_id = LAST_INSERT_ID();
+        END IF;
+    END IF;
+
+    RETURN JSON_OBJECT(
+        'outcome', v_outcome,
+        'employee_id', v_id,
+        'employee_name', v_name,
+        'last_time', DATE_FORMAT(v_last_time, '%H:%i:%s'),
+        'log_id', v_log_id
+    );
+END
+"""
+
+INSTALLED_QUERY = """
+    SELECT ROUTINE_COMMENT
+    FROM information_schema.ROUTINES
+    WHERE ROUTINE_SCHEMA = DATABASE() AND ROUTINE_NAME = %s
+"""
+
+
+class FunctionNotAllowed(Exception):
+    """Server menolak membuat fn_absen (binary log aktif tanpa izin)"""
+
+
+def is_installed(cursor):
+    """True jika fn_absen versi terbaru sudah ada (cursor dictionary)"""
+    cursor.execute(INSTALLED_QUERY, (FUNCTION_NAME,))
+    row = cursor.fetchone()
+    if row is None:
+        return False
+    return row["ROUTINE_COMMENT"] == f"doorlock v{FUNCTION_VERSION}"
+
+
+def install(conn):
+    """
+    Buat (atau perbarui) fn_absen; return True jika ada perubahan.
+
+    Raises:
+        FunctionNotAllowed: binary log aktif dan log_bin_trust_function_creators=0
+    """
+    cursor = conn.cursor(dictionary=True)
+    try:
+        if is_installed(cursor):
+            return False
+        try:
+            cursor.execute(f"DROP FUNCTION IF EXISTS {FUNCTION_NAME}")
+            cursor.execute(CREATE_FUNCTION)
+        except Exception as e:
+            if getattr(e, "errno", None) in BINLOG_ROUTINE_ERRORS:
+                raise FunctionNotAllowed(str(e)) from e
+            raise
+        conn.commit()
+        return True
+    finally:
+        cursor.close()
+
+
+def absen_atomic(conn, kode, status_db, event_time):
+    """
+    Jalankan validasi + INSERT di server dalam satu statement.
+
+    Koneksi harus autocommit agar lock dilepas dan INSERT ter-commit tanpa
+    round-trip tambahan.
+
+    Returns:
+        dict: outcome ("ok", "not_found", "inactive", "duplicate",
+        "already_out"), employee_id, employee_name, last_time, log_id
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f"SELECT {FUNCTION_NAME}(%s, %s, %s)",
+            (kode, status_db, event_time)
+        )
+        (result,) = cursor.fetchone()
+    finally:
+        cursor.close()
+    return json.loads(result)
@@ -0,0 +1,229 @@
+"""
+Absensi batch: banyak tap sekaligus dalam satu request
+
+Dipakai untuk back-fill tap dari perangkat yang gagal sinkron atau impor dari
+reader lain. Seluruh batch divalidasi dalam satu pass:
+- semua kode karyawan dicari sekaligus (roster cache + satu query IN)
+- log yang sudah ada untuk karyawan & rentang hari terkait diambil dengan
+  satu query range (index (employee_id, event_time))
+- aturan urutan diterapkan per karyawan per hari sesuai urutan event_time,
+  termasuk terhadap record lain di batch yang sama; back-fill yang disisipkan
+  sebelum log yang sudah ada juga dicek terhadap log sesudahnya, supaya
+  urutan hari itu tetap valid
+- record yang lolos di-INSERT dengan satu multi-row INSERT + satu COMMIT
+
+Record yang persis sama dengan log yang sudah ada dianggap duplikat, sehingga
+batch yang sama aman dikirim ulang.
+"""
+
+from bisect import bisect_right
+from datetime import datetime, timedelta
+
+from doorlock.state_cache import day_bounds
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+INSERT_LOG = (
+    "INSERT INTO attendance_logs (employee_id, status, event_time) "
+    "VALUES (%s, %s, %s)"
+)
+
+# Toleransi jam perangkat yang sedikit lebih cepat dari jam Pi
+MAX_CLOCK_SKEW = timedelta(minutes=5)
+
+
+def parse_event_time(value, default):
+    """Terima 'YYYY-MM-DD HH:MM:SS' atau ISO 8601; kosong -> default"""
+    if value in (None, ""):
+        return default
+    if not isinstance(value, str):
+        raise ValueError("event_time harus string")
+    try:
+        parsed = datetime.strptime(value, TIME_FORMAT)
+    except ValueError:
+        parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        # Kolom DATETIME menyimpan waktu lokal
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed.replace(microsecond=0)
+
+
+def _result(index, status, message, data=None):
+    result = {"index": index, "status": status, "message": message}
+    if data is not None:
+        result["data"] = data
+    return result
+
+
+def _parse(records, status_mapping, now):
+    """Validasi bentuk record; return (parsed, results untuk record gagal)"""
+    db_statuses = set(status_mapping.values())
+    parsed = []
+    results = {}
+
+    for index, record in enumerate(records):
+        if not isinstance(record, dict):
+            results[index] = _result(index, "error", "Record harus berupa object")
+            continue
+
+        kode = str(record.get("kode") or "").strip()
+        status = str(record.get("status") or "").strip()
+        if not kode or not status:
+            results[index] = _result(index, "error", "Field 'kode' dan 'status' wajib diisi")
+            continue
+
+        # Format GUI (Masuk) atau ENUM database (masuk)
+        status_db = status_mapping.get(status) or (status if status in db_statuses else None)
+        if not status_db:
+            results[index] = _result(index, "error", f"Status tidak valid: {status}")
+            continue
+
+        try:
+            event_time = parse_event_time(record.get("event_time"), now)
+        except ValueError:
+            results[index] = _result(
+                index, "error", f"event_time tidak valid: {record.get('event_time')}"
+            )
+            continue
+        if event_time > now + MAX_CLOCK_SKEW:
+            results[index] = _result(index, "error", "event_time di masa depan")
+            continue
+
+        parsed.append({
+            "index": index,
+            "kode": kode,
+            "status_db": status_db,
+            "event_time": event_time,
+        })
+
+    return parsed, results
+
+
+def _existing_logs(cursor, employee_ids, first, last):
+    """Map (employee_id, tanggal) -> list urut [(event_time, status)]"""
+    placeholders = ", ".join(["%s"] * len(employee_ids))
+    start, _ = day_bounds(first.date())
+    _, end = day_bounds(last.date())
+    cursor.execute(
+        "SELECT employee_id, status, event_time FROM attendance_logs "
+        f"WHERE employee_id IN ({placeholders}) "
+        "AND event_time >= %s AND event_time < %s "
+        "ORDER BY event_time, id",
+        (*employee_ids, start, end)
+    )
+    logs = {}
+    for employee_id, status, event_time in cursor.fetchall():
+        logs.setdefault((employee_id, event_time.date()), []).append((event_time, status))
+    return logs
+
+
+def process_batch(pool, roster, records, status_mapping, now=None):
+    """
+    Validasi dan simpan banyak tap sekaligus.
+
+    Args:
+        pool: ConnectionPool untuk MySQL
+        roster: RosterCache untuk lookup kode karyawan
+        records: list dict {kode, status, event_time (opsional)}
+        status_mapping: Map status GUI -> ENUM database
+        now: Waktu acuan (default: sekarang)
+
+    Returns:
+        list hasil per record (urut sesuai input) dan list baris yang
+        disimpan [(employee_id, status_db, event_time)]
+    """
+    now = now or datetime.now().replace(microsecond=0)
+    parsed, results = _parse(records, status_mapping, now)
+
+    employees = roster.get_many([record["kode"] for record in parsed]) if parsed else {}
+    valid = []
+    for record in parsed:
+        employee = employees.get(record["kode"])
+        if employee is None:
+            results[record["index"]] = _result(
+                record["index"], "error", f"Kode karyawan {record['kode']} tidak ditemukan"
+            )
+        elif not employee["is_active"]:
+            results[record["index"]] = _result(
+                record["index"], "error", f"{employee['name']} sudah tidak aktif"
+            )
+        else:
+            record["employee"] = employee
+            valid.append(record)
+
+    inserted = []
+    if valid:
+        # Urut waktu agar aturan urutan berlaku seperti tap sungguhan
+        valid.sort(key=lambda record: (record["event_time"], record["index"]))
+
+        with pool.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                logs = _existing_logs(
+                    cursor,
+                    sorted({record["employee"]["id"] for record in valid}),
+                    valid[0]["event_time"],
+                    valid[-1]["event_time"]
+                )
+
+                for record in valid:
+                    outcome = _apply_rules(record, logs)
+                    results[record["index"]] = outcome
+                    if outcome["status"] == "success":
+                        inserted.append((
+                            record["employee"]["id"], record["status_db"], record["event_time"]
+                        ))
+
+                if inserted:
+                    cursor.executemany(INSERT_LOG, inserted)
+                conn.commit()
+            finally:
+                cursor.close()
+
+    return [results[index] for index in range(len(records))], inserted
+
+
+def _apply_rules(record, logs):
+    """Terapkan aturan urutan terhadap log sebelum & sesudahnya di hari yang sama"""
+    employee = record["employee"]
+    name = employee["name"]
+    event_time = record["event_time"]
+    status_db = record["status_db"]
+    day_logs = logs.setdefault((employee["id"], event_time.date()), [])
+    data = {
+        "employee_id": employee["id"],
+        "employee_name": name,
+        "employee_code": record["kode"],
+        "status": status_db,
+        "event_time": event_time.strftime(TIME_FORMAT),
+    }
+
+    if (event_time, status_db) in day_logs:
+        return _result(record["index"], "info", f"{name} sudah tercatat pada waktu ini", data)
+
+    # Log terakhir pada atau sebelum event_time (log per hari hanya sedikit)
+    position = bisect_right([logged for logged, _ in day_logs], event_time)
+    if position:
+        last_status = day_logs[position - 1][1]
+        if last_status == status_db:
+            return _result(record["index"], "info", f"{name} sudah absen {status_db} hari ini", data)
+        if status_db == "masuk" and last_status in ("pulang", "pulang_lembur"):
+            return _result(
+                record["index"], "error",
+                f"{name} sudah pulang hari ini, tidak bisa absen masuk lagi.", data
+            )
+
+    # Back-fill di tengah hari: log sesudahnya harus tetap valid setelah record ini
+    if position < len(day_logs):
+        next_time, next_status = day_logs[position]
+        if next_status == status_db:
+            return _result(record["index"], "info", f"{name} sudah absen {status_db} hari ini", data)
+        if next_status == "masuk" and status_db in ("pulang", "pulang_lembur"):
+            return _result(
+                record["index"], "error",
+                f"{name} sudah absen masuk pukul {next_time.strftime('%H:%M:%S')}, "
+                f"{status_db} sebelumnya merusak urutan.", data
+            )
+
+    day_logs.insert(position, (event_time, status_db))
+    return _result(record["index"], "success", f"{name} absen {status_db}", data)
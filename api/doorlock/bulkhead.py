@@ -0,0 +1,109 @@
+"""
+Bulkhead: jalur eksekusi terbatas per jenis pekerjaan
+
+/absen bisa tertahan beberapa detik saat MySQL remote lambat. Tanpa batas,
+request absensi menghabiskan semua worker thread server sehingga /door/open
+ikut mengantre. Setiap Bulkhead membatasi:
+- max_concurrent: request yang boleh berjalan bersamaan di jalur ini
+- max_queue: request yang boleh menunggu slot; selebihnya langsung ditolak
+  (BulkheadFull -> 503) alih-alih menumpuk
+- queue_timeout: lama maksimum menunggu slot
+
+Kapasitas jalur pintu dijaga dengan membatasi jalur DB (concurrent + queue)
+di bawah jumlah worker thread server; lihat reserved_threads().
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+
+class BulkheadFull(Exception):
+    """Jalur penuh; request ditolak tanpa menunggu"""
+
+    def __init__(self, name, retry_after=1):
+        super().__init__(f"Jalur {name} penuh")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class Bulkhead:
+    """Semaphore dengan antrean terbatas dan statistik"""
+
+    def __init__(self, name, max_concurrent, max_queue=0, queue_timeout=1.0):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        self._cond = threading.Condition()
+        self.active = 0
+        self.waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    @contextmanager
+    def slot(self):
+        """
+        Jalankan blok dalam satu slot jalur ini.
+
+        Raises:
+            BulkheadFull: antrean penuh atau slot tidak didapat dalam queue_timeout
+        """
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self.completed += 1
+            self._cond.notify()
+
+    def acquire(self):
+        """Ambil slot (pasangkan dengan release()); raise BulkheadFull"""
+        with self._cond:
+            if self.active < self.max_concurrent and not self.waiting:
+                self.active += 1
+                return
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise BulkheadFull(self.name)
+
+            self.waiting += 1
+            deadline = time.monotonic() + self.queue_timeout
+            try:
+                while self.active >= self.max_concurrent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        self.rejected += 1
+                        raise BulkheadFull(self.name)
+                    self._cond.wait(remaining)
+            finally:
+                self.waiting -= 1
+            self.active += 1
+
+    def capacity(self):
+        """Thread server maksimum yang bisa ditahan jalur ini"""
+        return self.max_concurrent + self.max_queue
+
+    def stats(self):
+        with self._cond:
+            return {
+                "active": self.active,
+                "waiting": self.waiting,
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+            }
+
+
+def reserved_threads(server_threads, *bulkheads):
+    """Worker thread yang tidak bisa ditahan oleh bulkhead yang diberikan"""
+    return server_threads - sum(bulkhead.capacity() for bulkhead in bulkheads)
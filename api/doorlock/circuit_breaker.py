@@ -0,0 +1,126 @@
+"""
+Circuit breaker untuk panggilan ke database remote
+
+Saat host database mati, setiap tap menunggu connect timeout (ditambah retry
+connect_db) dan thread Flask menumpuk. Breaker mencatat kegagalan berturut-
+turut; setelah ambang tercapai sirkuit "open" dan panggilan berikutnya
+langsung ditolak dengan CircuitOpen tanpa menyentuh jaringan, sehingga
+pemanggil bisa segera memakai jalur degraded (journal lokal, cache).
+
+State:
+- closed    : normal, kegagalan dihitung
+- open      : semua panggilan ditolak sampai reset_timeout lewat
+- half_open : satu panggilan percobaan diizinkan; sukses -> closed,
+              gagal -> open lagi
+"""
+
+import threading
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpen(Exception):
+    """Database sedang dianggap tidak tersedia (sirkuit terbuka)"""
+
+
+class CircuitBreaker:
+    """Breaker thread-safe dengan state closed/open/half-open"""
+
+    def __init__(self, name="mysql", failure_threshold=3, reset_timeout=30):
+        """
+        Args:
+            name: Nama untuk pesan error dan /health
+            failure_threshold: Kegagalan berturut-turut sebelum sirkuit dibuka
+            reset_timeout: Detik sirkuit terbuka sebelum percobaan half-open
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.rejected = 0
+        self.trips = 0
+        self.last_error = None
+
+    def before_call(self):
+        """
+        Panggil sebelum mengakses database.
+
+        Returns:
+            State saat panggilan diizinkan (CLOSED atau HALF_OPEN untuk
+            panggilan percobaan)
+
+        Raises:
+            CircuitOpen: jika sirkuit terbuka atau percobaan half-open
+                sedang berjalan di thread lain
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return CLOSED
+            if self._state == OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    self.rejected += 1
+                    raise CircuitOpen(f"Database {self.name} tidak tersedia (circuit open)")
+                self._state = HALF_OPEN
+                self._probing = False
+            if self._probing:
+                self.rejected += 1
+                raise CircuitOpen(f"Database {self.name} sedang dicek ulang (half-open)")
+            self._probing = True
+            return HALF_OPEN
+
+    def record_success(self):
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def abort(self):
+        """Panggilan selesai tanpa hasil tentang kesehatan database"""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self, error=None):
+        with self._lock:
+            if error is not None:
+                self.last_error = str(error)
+            self._failures += 1
+            self._probing = False
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self.trips += 1
+                    print(f"⚠ Circuit {self.name} OPEN: {self.last_error}")
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def stats(self):
+        """Status breaker untuk endpoint /health"""
+        state = self.state
+        with self._lock:
+            retry_in = None
+            if state == OPEN:
+                retry_in = round(self.reset_timeout - (time.monotonic() - self._opened_at), 1)
+            return {
+                "state": state,
+                "failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "reset_timeout": self.reset_timeout,
+                "retry_in": retry_in,
+                "trips": self.trips,
+                "rejected": self.rejected,
+                "last_error": self.last_error,
+            }
@@ -0,0 +1,362 @@
+"""
+Connection pool MySQL yang thread-safe
+
+Satu pool dipakai bersama oleh thread Flask dan thread Tkinter:
+- Ukuran maksimum dibatasi (max_size)
+- Checkout per-thread: thread yang sama mendapat koneksi yang sama selama
+  masih memegang koneksi (reentrant), thread lain tidak pernah berbagi cursor
+- Validasi (ping) saat dipinjam jika koneksi sudah lama menganggur
+- Koneksi yang menganggur terlalu lama ditutup (idle eviction)
+- Circuit breaker opsional: saat database diketahui mati, peminjaman langsung
+  gagal (CircuitOpen) tanpa menunggu connect timeout
+- Keep-alive di background: koneksi menganggur di-ping sebelum wait_timeout
+  server, koneksi tua di-recycle, dan pool diisi ulang sampai min_idle
+  sehingga tap pertama setelah idle tidak pernah menunggu reconnect
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from doorlock.circuit_breaker import HALF_OPEN, OPEN
+
+
+class PoolTimeout(Exception):
+    """Tidak ada koneksi yang bisa dipinjam dalam batas waktu"""
+
+
+class ConnectionPool:
+    """Pool koneksi database dengan checkout per-thread"""
+
+    def __init__(self, connect, max_size=5, idle_timeout=300,
+                 validate_after=30, acquire_timeout=5, min_idle=0,
+                 keepalive_interval=60, max_lifetime=3600, breaker=None):
+        """
+        Args:
+            connect: Callable tanpa argumen yang membuat koneksi baru
+            max_size: Jumlah koneksi maksimum (dipinjam + menganggur)
+            idle_timeout: Detik sebelum koneksi menganggur ditutup
+            validate_after: Koneksi yang menganggur lebih lama dari ini
+                di-ping dulu sebelum dipinjamkan (saat keep-alive berjalan,
+                batasnya minimal dua keepalive_interval)
+            acquire_timeout: Detik maksimum menunggu koneksi bebas
+            min_idle: Jumlah koneksi menganggur yang dijaga tetap siap
+                (tidak ikut idle eviction)
+            keepalive_interval: Detik antar putaran keep-alive; harus jauh
+                di bawah wait_timeout MySQL
+            max_lifetime: Detik sebelum koneksi di-recycle oleh keep-alive
+            breaker: CircuitBreaker opsional; kegagalan connect/koneksi rusak
+                dicatat, peminjaman ditolak cepat saat sirkuit terbuka
+        """
+        self._connect = connect
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.validate_after = validate_after
+        self.acquire_timeout = acquire_timeout
+        self.min_idle = min(min_idle, max_size)
+        self.keepalive_interval = keepalive_interval
+        self.max_lifetime = max_lifetime
+        self.breaker = breaker
+
+        self._cond = threading.Condition(threading.Lock())
+        self._idle = deque()  # (conn, last_used) - paling baru di kanan
+        self._size = 0
+        self._local = threading.local()
+        self._created = {}  # id(conn) -> waktu dibuat (monotonic)
+        self._alive_at = {}  # id(conn) -> terakhir diketahui hidup (monotonic)
+        self._keepalive_stop = threading.Event()
+        self._keepalive_thread = None
+
+    # -------------------------------------------------------------------------
+    # Borrow / return
+    # -------------------------------------------------------------------------
+
+    @contextmanager
+    def connection(self):
+        """
+        Pinjam koneksi untuk thread ini.
+
+        Commit dilakukan oleh pemanggil; jika terjadi exception, transaksi
+        di-rollback sebelum koneksi dikembalikan ke pool.
+        """
+        conn = self.acquire()
+        try:
+            yield conn
+        except Exception:
+            self.release(conn, broken=not self._rollback(conn))
+            raise
+        else:
+            self.release(conn)
+
+    def acquire(self):
+        """Ambil koneksi (reentrant untuk thread yang sama)"""
+        held = getattr(self._local, "held", None)
+        if held:
+            held[1] += 1
+            return held[0]
+
+        if self.breaker is None:
+            conn = self._checkout()
+        else:
+            # Raise CircuitOpen seketika jika database diketahui mati
+            probe = self.breaker.before_call() == HALF_OPEN
+            try:
+                # Percobaan half-open wajib ping, bukan sekadar koneksi dari pool
+                conn = self._checkout(force_validate=probe)
+            except PoolTimeout:
+                self.breaker.abort()
+                raise
+            except Exception as e:
+                self.breaker.record_failure(e)
+                raise
+            self.breaker.record_success()
+
+        self._local.held = [conn, 1]
+        return conn
+
+    def release(self, conn, broken=False):
+        """Kembalikan koneksi; koneksi rusak ditutup dan tidak dipakai ulang"""
+        held = getattr(self._local, "held", None)
+        if held and held[0] is conn:
+            held[1] -= 1
+            if held[1] > 0:
+                # Masih dipakai oleh pemanggil luar di thread yang sama
+                return
+            self._local.held = None
+
+        # Akhiri transaksi baca yang masih terbuka supaya peminjam berikutnya
+        # tidak melihat snapshot REPEATABLE READ yang basi
+        if not broken and getattr(conn, "in_transaction", False):
+            broken = not self._rollback(conn)
+
+        if broken:
+            if self.breaker is not None:
+                self.breaker.record_failure("Koneksi database rusak")
+            self._discard(conn)
+            return
+
+        with self._cond:
+            now = time.monotonic()
+            self._alive_at[id(conn)] = now
+            self._idle.append((conn, now))
+            self._cond.notify()
+
+    def _checkout(self, force_validate=False):
+        deadline = time.monotonic() + self.acquire_timeout
+
+        while True:
+            create = False
+            with self._cond:
+                self._evict_expired_locked()
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeout(
+                            f"Semua {self.max_size} koneksi database sedang dipakai"
+                        )
+                    self._cond.wait(remaining)
+
+                if self._idle:
+                    conn, _ = self._idle.pop()
+                    alive_at = self._alive_at.get(id(conn), 0)
+                else:
+                    self._size += 1
+                    create = True
+
+            if create:
+                return self._create()
+
+            fresh = not force_validate and time.monotonic() - alive_at < self._fresh_window()
+            if fresh or self._validate(conn):
+                return conn
+
+            # Koneksi mati (mis. wait_timeout di server) - buang, coba lagi
+            self._discard(conn)
+
+    def _fresh_window(self):
+        """
+        Umur (detik sejak terbukti hidup) koneksi yang dipinjamkan tanpa ping.
+        Saat keep-alive berjalan, koneksi menganggur di-ping setiap putaran
+        sehingga umurnya paling lama dua interval; ping saat dipinjam hanya
+        menambah round-trip ke tap pertama setelah idle.
+        """
+        if self._keepalive_thread and self._keepalive_thread.is_alive():
+            return max(self.validate_after, 2 * self.keepalive_interval)
+        return self.validate_after
+
+    def _create(self):
+        """Buat koneksi baru; slot (_size) sudah dipesan oleh pemanggil"""
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            now = time.monotonic()
+            self._created[id(conn)] = now
+            self._alive_at[id(conn)] = now
+        return conn
+
+    # -------------------------------------------------------------------------
+    # Health & eviction
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def _validate(conn):
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _rollback(conn):
+        try:
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _discard(self, conn):
+        self._close_quietly(conn)
+        with self._cond:
+            self._forget_locked(conn)
+            self._size -= 1
+            self._cond.notify()
+
+    def _forget_locked(self, conn):
+        self._created.pop(id(conn), None)
+        self._alive_at.pop(id(conn), None)
+
+    def _evict_expired_locked(self):
+        """Tutup koneksi menganggur yang melewati idle_timeout (lock dipegang)"""
+        now = time.monotonic()
+        # Yang paling lama menganggur ada di kiri; min_idle tetap dijaga
+        while (len(self._idle) > self.min_idle
+               and now - self._idle[0][1] > self.idle_timeout):
+            conn, _ = self._idle.popleft()
+            self._forget_locked(conn)
+            self._size -= 1
+            self._close_quietly(conn)
+
+    def evict_idle(self):
+        """Jalankan idle eviction secara manual"""
+        with self._cond:
+            self._evict_expired_locked()
+            self._cond.notify_all()
+
+    def ping(self):
+        """Cek apakah database bisa dijangkau lewat pool"""
+        try:
+            conn = self.acquire()
+        except Exception:
+            return False
+        ok = self._validate(conn)
+        self.release(conn, broken=not ok)
+        return ok
+
+    def stats(self):
+        """Statistik pool untuk endpoint /health"""
+        with self._cond:
+            idle = len(self._idle)
+            return {
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": idle,
+                "in_use": self._size - idle,
+            }
+
+    def close_all(self):
+        """Tutup semua koneksi menganggur (dipanggil saat shutdown)"""
+        self.stop_keepalive()
+        with self._cond:
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._forget_locked(conn)
+                self._size -= 1
+                self._close_quietly(conn)
+            self._cond.notify_all()
+
+    # -------------------------------------------------------------------------
+    # Keep-alive & pre-connect
+    # -------------------------------------------------------------------------
+
+    def prefill(self):
+        """Buka koneksi sampai ada min_idle koneksi menganggur; return jumlah baru"""
+        opened = 0
+        while True:
+            with self._cond:
+                if len(self._idle) >= self.min_idle or self._size >= self.max_size:
+                    return opened
+                self._size += 1
+            conn = self._create()
+            with self._cond:
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+            opened += 1
+
+    def keepalive_once(self):
+        """
+        Satu putaran keep-alive: ping koneksi menganggur yang sudah lama tidak
+        terbukti hidup, recycle yang melewati max_lifetime, lalu isi ulang
+        sampai min_idle. Waktu last_used tidak diubah sehingga idle eviction
+        tetap berjalan untuk koneksi di atas min_idle.
+        """
+        now = time.monotonic()
+        with self._cond:
+            self._evict_expired_locked()
+            due = [entry for entry in self._idle
+                   if now - self._alive_at.get(id(entry[0]), 0) >= self.keepalive_interval
+                   or now - self._created.get(id(entry[0]), now) >= self.max_lifetime]
+            for entry in due:
+                self._idle.remove(entry)
+
+        # Ping dilakukan tanpa memegang lock: tap tetap bisa meminjam koneksi lain
+        returned = []
+        for conn, last_used in due:
+            age = now - self._created.get(id(conn), now)
+            if age >= self.max_lifetime or not self._validate(conn):
+                self._discard(conn)
+                continue
+            returned.append((conn, last_used))
+
+        with self._cond:
+            for conn, _ in returned:
+                self._alive_at[id(conn)] = time.monotonic()
+            self._idle = deque(sorted([*self._idle, *returned], key=lambda entry: entry[1]))
+            self._cond.notify_all()
+
+        return self.prefill()
+
+    def start_keepalive(self):
+        """Jalankan thread keep-alive di background"""
+        if self._keepalive_thread and self._keepalive_thread.is_alive():
+            return
+        self._keepalive_stop.clear()
+        self._keepalive_thread = threading.Thread(target=self._keepalive_loop, daemon=True)
+        self._keepalive_thread.start()
+
+    def stop_keepalive(self):
+        self._keepalive_stop.set()
+
+    def _keepalive_loop(self):
+        while not self._keepalive_stop.wait(self.keepalive_interval):
+            try:
+                self.keepalive_once()
+            except Exception as e:
+                # Database belum terjangkau - dicoba lagi putaran berikutnya.
+                # Saat sirkuit sudah terbuka kegagalan tidak dicatat lagi:
+                # record_failure mereset _opened_at sehingga half-open tertunda terus
+                if self.breaker is not None and self.breaker.state != OPEN:
+                    self.breaker.record_failure(e)
+                print(f"⚠ Keep-alive database gagal: {e}")
@@ -0,0 +1,118 @@
+"""
+Debounce tap & idempotency key untuk absensi
+
+Reader RFID sering mengirim tap yang sama dua kali dan sisi PHP mengulang
+request saat timeout. Tanpa debounce setiap pengulangan menjalankan siklus
+validasi penuh yang hanya berakhir dengan "sudah absen".
+
+ResponseCache menyimpan response pertama per key selama window tertentu:
+- key tap (kode, status) dengan window pendek (debounce double-fire)
+- key idempotency dari klien dengan window lebih panjang (retry aman)
+Pakai satu instance per jenis key agar setiap cache punya window seragam.
+Request identik yang datang saat request pertama masih diproses menunggu
+hasilnya, bukan ikut memproses. Hanya response yang final (sukses/info)
+yang disimpan; error dijalankan ulang pada tap berikutnya.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class _InFlight:
+    __slots__ = ("done", "result")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+class ResponseCache:
+    """Cache response per key dengan TTL dan batas jumlah entry"""
+
+    def __init__(self, window, max_entries=1000):
+        """
+        Args:
+            window: Detik response disimpan
+            max_entries: Entry maksimum; yang paling lama dibuang lebih dulu
+        """
+        self.window = window
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, result)
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+
+    def run(self, key, func, cacheable=None, wait_timeout=30):
+        """
+        Jalankan func() sekali per key dalam window detik.
+
+        Args:
+            key: Key hashable (mis. (kode, status))
+            func: Callable tanpa argumen yang menghasilkan response
+            cacheable: Predicate(result) -> bool; default semua disimpan
+            wait_timeout: Detik maksimum menunggu request identik yang sedang
+                berjalan sebelum memproses sendiri
+
+        Returns:
+            (result, cached) - cached True jika result berasal dari cache
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return entry[1], True
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                inflight = self._inflight[key] = _InFlight()
+                owner = True
+            else:
+                owner = False
+
+        if not owner:
+            if inflight.done.wait(wait_timeout) and inflight.result is not None:
+                with self._lock:
+                    self.hits += 1
+                return inflight.result, True
+            return self.run(key, func, cacheable, wait_timeout)
+
+        result = None
+        try:
+            result = func()
+        finally:
+            with self._lock:
+                self.misses += 1
+                del self._inflight[key]
+                if result is not None and (cacheable is None or cacheable(result)):
+                    self._store_locked(key, result)
+                    inflight.result = result
+            inflight.done.set()
+        return result, False
+
+    def _store_locked(self, key, result):
+        now = time.monotonic()
+        self._entries[key] = (now + self.window, result)
+        self._entries.move_to_end(key)
+
+        # Buang entry kadaluarsa (paling lama di depan), lalu batasi ukuran
+        while self._entries:
+            oldest_key, (expires_at, _) = next(iter(self._entries.items()))
+            if expires_at > now and len(self._entries) <= self.max_entries:
+                break
+            del self._entries[oldest_key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "inflight": len(self._inflight),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
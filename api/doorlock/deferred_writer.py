@@ -0,0 +1,177 @@
+"""
+Persistensi tertunda untuk mode door-first
+
+Pada mode door-first pintu dibuka segera setelah validasi dari cache lokal;
+penyimpanan log dikerjakan thread ini di belakang, dengan retry exponential
+backoff. Tulisan yang tetap gagal setelah max_attempts tidak dibuang diam-diam:
+dicatat ke laporan rekonsiliasi (di memori dan, jika diset, file JSON-lines)
+agar admin bisa mencocokkan tap yang pintunya sudah terbuka tetapi lognya
+tidak tersimpan.
+"""
+
+import json
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class _Item:
+    __slots__ = ("employee_id", "status", "event_time", "attempts", "accepted_at", "last_error")
+
+    def __init__(self, employee_id, status, event_time):
+        self.employee_id = employee_id
+        self.status = status
+        self.event_time = event_time
+        self.attempts = 0
+        self.accepted_at = datetime.now()
+        self.last_error = None
+
+
+class DeferredWriter:
+    """Antrean tulis log di belakang layar dengan retry & laporan kegagalan"""
+
+    def __init__(self, persist, max_attempts=5, base_delay=1, max_delay=60,
+                 failure_log=None, max_failures=1000):
+        """
+        Args:
+            persist: Callable(employee_id, status, event_time, retry) yang
+                menyimpan satu log; retry True jika percobaan sebelumnya gagal
+                (bisa jadi sudah ter-commit, cek dulu agar tidak dobel)
+            max_attempts: Percobaan sebelum masuk laporan rekonsiliasi
+            base_delay: Detik tunggu sebelum retry pertama (dobel tiap gagal)
+            max_delay: Detik tunggu maksimum antar retry
+            failure_log: File JSON-lines untuk kegagalan (opsional)
+            max_failures: Kegagalan terakhir yang disimpan di memori
+        """
+        self.persist = persist
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_log = failure_log
+
+        self._queue = queue.Queue()
+        self._retry = []  # [(due_monotonic, item)]
+        self._lock = threading.Lock()
+        self._failures = deque(maxlen=max_failures)
+        self._thread = None
+        self.written = 0
+        self.retried = 0
+        self.failed = 0
+
+    def submit(self, employee_id, status, event_time):
+        """Antrekan satu log; kembali segera"""
+        self.start()
+        self._queue.put(_Item(employee_id, status, event_time))
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="deferred-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=10):
+        """Selesaikan antrean (satu percobaan terakhir untuk retry) lalu berhenti"""
+        if self._thread and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    # -------------------------------------------------------------------------
+    # Writer thread
+    # -------------------------------------------------------------------------
+
+    def _run(self):
+        while True:
+            timeout = None
+            if self._retry:
+                timeout = max(0.0, min(due for due, _ in self._retry) - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = False
+
+            if item is None:
+                self._drain()
+                return
+            if item:
+                self._write(item)
+
+            now = time.monotonic()
+            due = [entry for entry in self._retry if entry[0] <= now]
+            if due:
+                self._retry = [entry for entry in self._retry if entry[0] > now]
+                for _, retry_item in due:
+                    self._write(retry_item)
+
+    def _drain(self):
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item:
+                self._write(item, final=True)
+        retry, self._retry = self._retry, []
+        for _, item in retry:
+            self._write(item, final=True)
+
+    def _write(self, item, final=False):
+        try:
+            self.persist(item.employee_id, item.status, item.event_time, item.attempts > 0)
+        except Exception as e:
+            item.attempts += 1
+            item.last_error = str(e)
+            if final or item.attempts >= self.max_attempts:
+                self._fail(item)
+            else:
+                delay = min(self.base_delay * 2 ** (item.attempts - 1), self.max_delay)
+                self._retry.append((time.monotonic() + delay, item))
+                self.retried += 1
+                print(f"⚠ Simpan log tertunda gagal (percobaan {item.attempts}, retry {delay}s): {e}")
+            return
+        self.written += 1
+
+    def _fail(self, item):
+        entry = {
+            "employee_id": item.employee_id,
+            "status": item.status,
+            "event_time": item.event_time.strftime(TIME_FORMAT),
+            "accepted_at": item.accepted_at.strftime(TIME_FORMAT),
+            "failed_at": datetime.now().strftime(TIME_FORMAT),
+            "attempts": item.attempts,
+            "last_error": item.last_error,
+        }
+        with self._lock:
+            self._failures.append(entry)
+            self.failed += 1
+        print(f"✗ Log absensi tidak tersimpan (pintu sudah dibuka): {entry}")
+        if self.failure_log:
+            try:
+                with open(self.failure_log, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry) + "\n")
+            except OSError as e:
+                print(f"⚠ Gagal menulis laporan rekonsiliasi: {e}")
+
+    # -------------------------------------------------------------------------
+    # Laporan
+    # -------------------------------------------------------------------------
+
+    def report(self):
+        """Tulisan yang gagal permanen (terbaru terakhir)"""
+        with self._lock:
+            return list(self._failures)
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize(),
+            "retrying": len(self._retry),
+            "written": self.written,
+            "retried": self.retried,
+            "failed": self.failed,
+        }
@@ -0,0 +1,281 @@
+"""
+Scheduler tunggal untuk relock pintu
+
+Sebelumnya setiap buka pintu membuat thread baru (threading.Timer atau
+thread yang time.sleep(delay)), sehingga spam API berarti satu thread OS per
+relock yang tertunda. DoorScheduler memakai satu thread yang:
+- memiliki semua transisi relay (hanya thread ini yang memanggil relay)
+- memproses perintah open / lock / extend dari antrean
+- menyimpan deadline relock (time.monotonic) di heap; entry lama yang sudah
+  digantikan deadline baru diabaikan saat di-pop (lazy invalidation)
+
+Jumlah thread tetap satu berapa pun banyaknya permintaan buka pintu.
+
+Jika diberi LatencyRecorder, scheduler mencatat waktu dari perintah sampai
+tulis GPIO, latency trace pemanggil sampai edge GPIO, dan jitter relock
+(edge aktual dikurangi deadline yang diminta).
+"""
+
+import heapq
+import queue
+import threading
+import time
+
+
+class _Command:
+    __slots__ = ("action", "door_id", "seconds", "done", "result", "issued", "trace", "span_trace")
+
+    def __init__(self, action, door_id=None, seconds=None, trace=None, span_trace=None):
+        self.action = action
+        self.door_id = door_id
+        self.seconds = seconds
+        self.done = threading.Event()
+        self.result = None
+        self.issued = time.monotonic()
+        self.trace = trace
+        self.span_trace = span_trace
+
+
+class _Door:
+    __slots__ = ("relay", "on_change", "deadline")
+
+    def __init__(self, relay, on_change):
+        self.relay = relay
+        self.on_change = on_change
+        self.deadline = None  # None = terkunci
+
+
+class DoorScheduler:
+    """Satu thread yang mengatur buka/kunci semua pintu"""
+
+    def __init__(self, command_timeout=2, latency=None, tracer=None):
+        """
+        Args:
+            command_timeout: Detik maksimum pemanggil menunggu perintah diproses
+            latency: LatencyRecorder opsional untuk timing relay & relock
+            tracer: Tracer opsional; span "door.relay" ditambahkan ke trace
+                milik thread pemanggil
+        """
+        self.command_timeout = command_timeout
+        self.latency = latency
+        self.tracer = tracer
+
+        self._commands = queue.Queue()
+        self._heap = []  # (deadline, door_id)
+        self._doors = {}
+        self._lock = threading.Lock()  # melindungi _doors untuk pembacaan status
+        self._thread = None
+
+    def add_door(self, door_id, relay, on_change=None):
+        """
+        Daftarkan pintu.
+
+        Args:
+            door_id: Id pintu
+            relay: Callable(active: bool) yang menggerakkan relay
+            on_change: Callable(door_id, is_open) opsional, dipanggil dari
+                thread scheduler setelah setiap transisi relay dan saat
+                deadline pintu yang terbuka diperpanjang (is_open True lagi)
+        """
+        with self._lock:
+            self._doors[door_id] = _Door(relay, on_change)
+
+    # -------------------------------------------------------------------------
+    # Perintah (dipanggil dari thread mana pun)
+    # -------------------------------------------------------------------------
+
+    def open(self, door_id, seconds, extend=False):
+        """
+        Buka pintu selama seconds detik.
+
+        Args:
+            extend: Jika pintu sudah terbuka, perpanjang deadline relock
+                (minimal seconds detik dari sekarang) dalam perintah atomik
+                yang sama, alih-alih menolak
+
+        Returns:
+            Sisa detik sampai relock, atau None jika pintu sudah terbuka
+            (dan extend False)
+        """
+        return self._submit("open_extend" if extend else "open", door_id, seconds)
+
+    def extend(self, door_id, seconds):
+        """
+        Perpanjang pintu yang sedang terbuka sampai minimal seconds detik lagi.
+
+        Returns:
+            Sisa detik sampai relock, atau None jika pintu terkunci
+        """
+        return self._submit("extend", door_id, seconds)
+
+    def lock(self, door_id):
+        """Kunci sekarang; return True jika pintu sebelumnya terbuka"""
+        return self._submit("lock", door_id)
+
+    def lock_all(self):
+        return self._submit("lock_all")
+
+    def status(self, door_id):
+        """dict {"is_open", "remaining"} (remaining dalam detik)"""
+        with self._lock:
+            deadline = self._doors[door_id].deadline
+        if deadline is None:
+            return {"is_open": False, "remaining": 0}
+        return {"is_open": True, "remaining": round(max(0.0, deadline - time.monotonic()), 2)}
+
+    def _submit(self, action, door_id=None, seconds=None):
+        trace = self.latency.current() if self.latency else None
+        span_trace = self.tracer.current() if self.tracer else None
+        command = _Command(action, door_id, seconds, trace, span_trace)
+        if threading.current_thread() is self._thread:
+            # Dipanggil dari callback on_change: jalankan langsung
+            self._execute(command)
+            return command.result
+
+        self.start()
+        self._commands.put(command)
+        if not command.done.wait(self.command_timeout):
+            raise TimeoutError(f"Scheduler pintu tidak merespons ({action})")
+        return command.result
+
+    # -------------------------------------------------------------------------
+    # Thread scheduler
+    # -------------------------------------------------------------------------
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="door-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Kunci semua pintu lalu hentikan thread scheduler"""
+        if self._thread and self._thread.is_alive():
+            self._submit("lock_all")
+            self._commands.put(None)
+            self._thread.join(self.command_timeout)
+
+    def _run(self):
+        while True:
+            timeout = None
+            if self._heap:
+                timeout = max(0.0, self._heap[0][0] - time.monotonic())
+            try:
+                command = self._commands.get(timeout=timeout)
+            except queue.Empty:
+                command = False
+
+            if command is None:
+                return
+            if command:
+                self._execute(command)
+            self._fire_due()
+
+    def _execute(self, command):
+        try:
+            command.result = getattr(self, "_do_" + command.action)(command)
+        except Exception as e:
+            print(f"✗ Scheduler pintu gagal ({command.action}): {e}")
+        finally:
+            command.done.set()
+
+    def _fire_due(self):
+        now = time.monotonic()
+        while self._heap and self._heap[0][0] <= now:
+            deadline, door_id = heapq.heappop(self._heap)
+            door = self._doors[door_id]
+            # Entry basi: pintu sudah dikunci atau deadline sudah diperpanjang
+            if door.deadline == deadline:
+                self._set(door_id, door, None, due=deadline)
+
+    def _set(self, door_id, door, deadline, command=None, due=None):
+        was_open = door.deadline is not None
+        with self._lock:
+            door.deadline = deadline
+        if deadline is not None:
+            heapq.heappush(self._heap, (deadline, door_id))
+
+        is_open = deadline is not None
+        if is_open == was_open:
+            if is_open:
+                # Diperpanjang: relay tidak berubah, tapi sisa waktu di UI/SSE harus ikut
+                self._notify(door_id, door, is_open)
+            return
+        if self.latency:
+            self._record_edge(time.monotonic(), command, due)
+        relay_start = time.perf_counter()
+        queued = time.monotonic() - command.issued if command is not None else 0.0
+        error = None
+        try:
+            door.relay(is_open)
+        except Exception as e:
+            error = str(e)
+            print(f"✗ Relay pintu {door_id} gagal: {e}")
+        if command is not None and command.span_trace is not None:
+            self._record_span(command, door_id, is_open, relay_start, queued, error)
+        self._notify(door_id, door, is_open)
+
+    @staticmethod
+    def _notify(door_id, door, is_open):
+        if door.on_change:
+            try:
+                door.on_change(door_id, is_open)
+            except Exception as e:
+                print(f"⚠ Callback status pintu {door_id} gagal: {e}")
+
+    def _record_edge(self, at, command, due):
+        if due is not None:
+            self.latency.record("door.relock_jitter", at - due)
+        if command is not None:
+            self.latency.record("door.command_to_gpio", at - command.issued)
+            if command.trace is not None:
+                self.latency.actuated(command.trace, at)
+
+    def _record_span(self, command, door_id, is_open, relay_start, queued, error):
+        attrs = {
+            "door": door_id,
+            "state": "open" if is_open else "locked",
+            "queued_ms": round(queued * 1000, 3),
+        }
+        if error:
+            attrs["error"] = error
+        command.span_trace.add_span("door.relay", relay_start, time.perf_counter(), **attrs)
+
+    def _do_open(self, command):
+        door = self._doors[command.door_id]
+        if door.deadline is not None:
+            return None
+        deadline = time.monotonic() + command.seconds
+        self._set(command.door_id, door, deadline, command)
+        return command.seconds
+
+    def _do_extend(self, command):
+        door = self._doors[command.door_id]
+        if door.deadline is None:
+            return None
+        deadline = max(door.deadline, time.monotonic() + command.seconds)
+        if deadline != door.deadline:
+            self._set(command.door_id, door, deadline, command)
+        return round(deadline - time.monotonic(), 2)
+
+    def _do_open_extend(self, command):
+        door = self._doors[command.door_id]
+        if door.deadline is None:
+            return self._do_open(command)
+        return self._do_extend(command)
+
+    def _do_lock(self, command):
+        door = self._doors[command.door_id]
+        if door.deadline is None:
+            return False
+        self._set(command.door_id, door, None, command)
+        return True
+
+    def _do_lock_all(self, command):
+        for door_id, door in list(self._doors.items()):
+            if door.deadline is not None:
+                self._set(door_id, door, None)
+        return True
@@ -0,0 +1,135 @@
+"""
+Registry pintu: beberapa pintu/relay pada satu Pi
+
+Setiap pintu punya pin, polaritas relay, delay default dan deadline relock
+sendiri; semuanya dijalankan oleh satu DoorScheduler sehingga satu proses
+(satu port Flask) bisa melayani beberapa pintu masuk. Jika diberi EventBus,
+setiap transisi relay dan perpanjangan deadline dipublikasikan sebagai event
+"door".
+
+Konfigurasi berupa dict per pintu, contoh:
+    DOORS = {
+        "main": {"name": "Pintu Utama", "pin": 2, "active_low": True, "delay": 5},
+        "gudang": {"name": "Gudang", "pin": 3, "active_low": True, "delay": 3},
+    }
+"""
+
+import threading
+
+
+class Door:
+    """Satu pintu; relock otomatis oleh scheduler bersama"""
+
+    def __init__(self, door_id, scheduler, relay, name=None, pin=None,
+                 active_low=True, delay=5, gpio_mode=None, events=None):
+        self.door_id = door_id
+        self.scheduler = scheduler
+        self.name = name or door_id
+        self.pin = pin
+        self.active_low = active_low
+        self.delay = delay
+        self.gpio_mode = gpio_mode
+        self.events = events
+        scheduler.add_door(door_id, relay, self._on_change)
+
+    @property
+    def is_locked(self):
+        return not self.scheduler.status(self.door_id)["is_open"]
+
+    def unlock(self, delay_seconds=None):
+        """
+        Buka pintu; jika sudah terbuka, deadline relock diperpanjang.
+
+        Returns:
+            Sisa detik sampai terkunci otomatis, None jika gagal (termasuk
+            scheduler yang tidak merespons dalam command_timeout)
+        """
+        delay_seconds = delay_seconds or self.delay
+        try:
+            remaining = self.scheduler.open(self.door_id, delay_seconds, extend=True)
+        except TimeoutError as e:
+            print(f"✗ {self.name} gagal dibuka: {e}")
+            return None
+        if remaining is not None:
+            print(f"🔓 {self.name} TERBUKA (akan terkunci otomatis dalam {remaining:g} detik)")
+        return remaining
+
+    def lock(self):
+        """Kunci sekarang; return True jika sebelumnya terbuka"""
+        return self.scheduler.lock(self.door_id)
+
+    def _on_change(self, door_id, is_open):
+        """Dipanggil oleh thread scheduler setelah relay berubah"""
+        if not is_open:
+            print(f"🔒 {self.name} TERKUNCI")
+        if self.events:
+            self.events.publish("door", self.get_status())
+
+    def get_status(self):
+        status = self.scheduler.status(self.door_id)
+        is_locked = not status["is_open"]
+        result = {
+            "door_id": self.door_id,
+            "name": self.name,
+            "pin": self.pin,
+            "is_locked": is_locked,
+            "status": "TERKUNCI" if is_locked else "TERBUKA",
+            "remaining": status["remaining"],
+        }
+        if self.gpio_mode:
+            result["gpio_mode"] = self.gpio_mode
+        return result
+
+
+class DoorRegistry:
+    """Kumpulan pintu yang dikonfigurasi, diakses berdasarkan id"""
+
+    def __init__(self, scheduler, relay_factory, gpio_mode=None, events=None):
+        """
+        Args:
+            scheduler: DoorScheduler bersama untuk semua pintu
+            relay_factory: Callable(pin, active_low) -> Callable(active: bool)
+            gpio_mode: Label mode GPIO untuk status (mis. "HARDWARE")
+            events: EventBus opsional untuk publikasi transisi pintu
+        """
+        self.scheduler = scheduler
+        self.relay_factory = relay_factory
+        self.gpio_mode = gpio_mode
+        self.events = events
+        self._lock = threading.Lock()
+        self._doors = {}
+
+    def configure(self, doors):
+        """Daftarkan pintu dari dict konfigurasi {door_id: {...}}"""
+        for door_id, config in doors.items():
+            self.add(door_id, **config)
+        return self
+
+    def add(self, door_id, pin, active_low=True, delay=5, name=None):
+        with self._lock:
+            if door_id in self._doors:
+                raise ValueError(f"Pintu '{door_id}' sudah terdaftar")
+            pins = {door.pin for door in self._doors.values()}
+            if pin in pins:
+                raise ValueError(f"Pin {pin} sudah dipakai pintu lain")
+            door = Door(
+                door_id, self.scheduler, self.relay_factory(pin, active_low),
+                name=name, pin=pin, active_low=active_low, delay=delay,
+                gpio_mode=self.gpio_mode, events=self.events
+            )
+            self._doors[door_id] = door
+        return door
+
+    def get(self, door_id):
+        """Pintu berdasarkan id, atau None"""
+        return self._doors.get(door_id)
+
+    def __iter__(self):
+        return iter(list(self._doors.values()))
+
+    def __len__(self):
+        return len(self._doors)
+
+    def status_all(self):
+        """Status semua pintu {door_id: status}"""
+        return {door.door_id: door.get_status() for door in self}
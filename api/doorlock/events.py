@@ -0,0 +1,174 @@
+"""
+Pub/sub in-process untuk status pintu & hasil absensi
+
+Publisher (registry pintu, proses absensi) memanggil publish(); subscriber:
+- stream SSE (/events): setiap koneksi punya Subscription dengan antrean
+  terbatas, sehingga klien lambat tidak menahan publisher (event tertua
+  dibuang dan klien diberi tahu lewat field "dropped")
+- GUI Tk: listen(callback) dipanggil langsung di thread publisher; callback
+  GUI memindahkan pekerjaannya ke thread Tk dengan widget.after(0, ...)
+
+Setiap event punya id berurutan; buffer replay kecil membuat klien SSE yang
+reconnect dengan Last-Event-ID tidak kehilangan transisi di sela koneksi.
+"""
+
+import itertools
+import json
+import queue
+import threading
+import time
+from collections import deque
+
+# Penanda akhir stream di antrean Subscription (lihat EventBus.close_streams)
+_END = object()
+
+
+class Event:
+    __slots__ = ("id", "type", "data", "timestamp")
+
+    def __init__(self, event_id, event_type, data):
+        self.id = event_id
+        self.type = event_type
+        self.data = data
+        self.timestamp = time.time()
+
+    def to_sse(self):
+        payload = dict(self.data, timestamp=self.timestamp)
+        return f"id: {self.id}\nevent: {self.type}\ndata: {json.dumps(payload, default=str)}\n\n"
+
+
+class Subscription:
+    """Antrean event untuk satu subscriber"""
+
+    def __init__(self, bus, types=None, max_queue=100):
+        self.bus = bus
+        self.types = set(types) if types else None
+        self._queue = queue.Queue(max_queue)
+        self.dropped = 0
+
+    def wants(self, event):
+        return self.types is None or event.type in self.types
+
+    def put(self, event):
+        while True:
+            try:
+                self._queue.put_nowait(event)
+                return
+            except queue.Full:
+                # Klien lambat: buang event tertua, jangan tahan publisher
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def end(self):
+        """Minta stream subscriber ini berhenti (tanpa menunggu heartbeat)"""
+        self.put(_END)
+
+    def get(self, timeout=None):
+        """Event berikutnya, None jika timeout, atau _END jika stream diakhiri"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+
+class EventBus:
+    """Broker event sederhana (thread-safe)"""
+
+    def __init__(self, replay=50):
+        """
+        Args:
+            replay: Jumlah event terakhir yang disimpan untuk Last-Event-ID
+        """
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._subscriptions = set()
+        self._listeners = []
+        self._recent = deque(maxlen=replay)
+        self.published = 0
+
+    def publish(self, event_type, data):
+        with self._lock:
+            event = Event(next(self._ids), event_type, data)
+            self._recent.append(event)
+            self.published += 1
+            subscriptions = [s for s in self._subscriptions if s.wants(event)]
+            listeners = list(self._listeners)
+
+        for subscription in subscriptions:
+            subscription.put(event)
+        for types, callback in listeners:
+            if types is None or event_type in types:
+                try:
+                    callback(event)
+                except Exception as e:
+                    print(f"⚠ Listener event {event_type} gagal: {e}")
+        return event
+
+    def subscribe(self, types=None, last_event_id=None, max_queue=100):
+        """
+        Buat Subscription; jika last_event_id diberikan, event sesudahnya
+        yang masih ada di buffer replay langsung dimasukkan ke antrean.
+        """
+        subscription = Subscription(self, types, max_queue)
+        with self._lock:
+            if last_event_id is not None:
+                for event in self._recent:
+                    if event.id > last_event_id and subscription.wants(event):
+                        subscription.put(event)
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def close_streams(self):
+        """Akhiri semua stream SSE (saat shutdown); return jumlah yang diakhiri"""
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            subscription.end()
+        return len(subscriptions)
+
+    def listen(self, callback, types=None):
+        """Callback(event) dipanggil sinkron di thread publisher"""
+        with self._lock:
+            self._listeners.append((set(types) if types else None, callback))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "published": self.published,
+                "subscribers": len(self._subscriptions),
+                "listeners": len(self._listeners),
+            }
+
+
+def sse_stream(subscription, heartbeat=15):
+    """
+    Generator teks SSE untuk satu Subscription.
+
+    Komentar heartbeat dikirim saat tidak ada event agar proxy tidak menutup
+    koneksi dan klien yang putus terdeteksi (write gagal -> generator ditutup).
+    """
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            event = subscription.get(timeout=heartbeat)
+            if event is _END:
+                return
+            if event is None:
+                yield ": heartbeat\n\n"
+                continue
+            if subscription.dropped:
+                yield f"event: dropped\ndata: {json.dumps({'count': subscription.dropped})}\n\n"
+                subscription.dropped = 0
+            yield event.to_sse()
+    finally:
+        subscription.close()
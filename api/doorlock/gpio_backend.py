@@ -0,0 +1,263 @@
+"""
+Backend GPIO yang bisa dipilih saat runtime
+
+Semua varian doorlock cukup memanggil setup_output / write / cleanup dengan
+level logika (True = HIGH); polaritas relay tetap diurus pemanggil.
+
+Backend:
+- "rpi"   : RPi.GPIO (register di-mmap lewat /dev/gpiomem, write tercepat)
+- "gpiod" : libgpiod character device (/dev/gpiochipN), API v1 maupun v2
+- "sim"   : simulator; setiap edge dicatat dengan timestamp monotonic
+            sehingga timing relay bisa diuji di Linux biasa
+- "auto"  : rpi -> gpiod -> sim, mana yang pertama tersedia
+
+Benchmark latency write:
+    python3 -m doorlock.gpio_backend --backend sim --pin 2 --count 10000
+"""
+
+import argparse
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+
+BACKENDS = ("auto", "rpi", "gpiod", "sim")
+
+
+class GPIOBackend(ABC):
+    """
+    Interface backend GPIO (level logika: True = HIGH)
+
+    Backend yang belum mengimplementasikan setup_output / write gagal saat
+    dibuat, bukan saat relay pertama kali digerakkan.
+    """
+
+    name = "base"
+    hardware = False
+
+    @abstractmethod
+    def setup_output(self, pin, value):
+        """Jadikan pin output dengan level awal value"""
+
+    @abstractmethod
+    def write(self, pin, value):
+        """Set level pin output"""
+
+    def cleanup(self):
+        pass
+
+
+class RPiGPIOBackend(GPIOBackend):
+    """RPi.GPIO (BCM numbering)"""
+
+    name = "rpi"
+    hardware = True
+
+    def __init__(self):
+        import RPi.GPIO as GPIO
+
+        self._gpio = GPIO
+        GPIO.setmode(GPIO.BCM)
+        GPIO.setwarnings(False)
+
+    def setup_output(self, pin, value):
+        GPIO = self._gpio
+        GPIO.setup(pin, GPIO.OUT, initial=GPIO.HIGH if value else GPIO.LOW)
+
+    def write(self, pin, value):
+        self._gpio.output(pin, self._gpio.HIGH if value else self._gpio.LOW)
+
+    def cleanup(self):
+        self._gpio.cleanup()
+
+
+class GpiodBackend(GPIOBackend):
+    """libgpiod character device; offset line = nomor BCM pada gpiochip0 Pi"""
+
+    name = "gpiod"
+    hardware = True
+
+    CONSUMER = "doorlock"
+
+    def __init__(self, chip="/dev/gpiochip0"):
+        import gpiod
+
+        self._gpiod = gpiod
+        self._chip_path = chip
+        self._v2 = hasattr(gpiod, "request_lines")
+        self._chip = None if self._v2 else gpiod.Chip(chip)
+        self._lines = {}
+        # Probe: gagal di sini jika character device tidak ada
+        if self._v2:
+            gpiod.Chip(chip).close()
+
+    def setup_output(self, pin, value):
+        gpiod = self._gpiod
+        if self._v2:
+            from gpiod.line import Direction, Value
+
+            self._lines[pin] = gpiod.request_lines(
+                self._chip_path,
+                consumer=self.CONSUMER,
+                config={pin: gpiod.LineSettings(
+                    direction=Direction.OUTPUT,
+                    output_value=Value.ACTIVE if value else Value.INACTIVE,
+                )},
+            )
+        else:
+            line = self._chip.get_line(pin)
+            line.request(
+                consumer=self.CONSUMER,
+                type=gpiod.LINE_REQ_DIR_OUT,
+                default_vals=[1 if value else 0],
+            )
+            self._lines[pin] = line
+
+    def write(self, pin, value):
+        line = self._lines[pin]
+        if self._v2:
+            from gpiod.line import Value
+
+            line.set_value(pin, Value.ACTIVE if value else Value.INACTIVE)
+        else:
+            line.set_value(1 if value else 0)
+
+    def cleanup(self):
+        for line in self._lines.values():
+            try:
+                line.release()
+            except Exception:
+                pass
+        self._lines.clear()
+        if self._chip is not None:
+            self._chip.close()
+
+
+class SimulatedBackend(GPIOBackend):
+    """Simulator dengan timeline edge (timestamp, pin, level) di memori"""
+
+    name = "sim"
+    hardware = False
+
+    def __init__(self, max_events=10000, verbose=True):
+        """
+        Args:
+            max_events: Jumlah edge maksimum yang disimpan (yang lama dibuang)
+            verbose: Cetak setiap edge seperti mode SIMULASI lama
+        """
+        self.verbose = verbose
+        self._lock = threading.Lock()
+        self._levels = {}
+        self._events = deque(maxlen=max_events)
+
+    def setup_output(self, pin, value):
+        with self._lock:
+            self._levels[pin] = bool(value)
+            self._events.append((time.monotonic(), pin, bool(value)))
+
+    def write(self, pin, value):
+        value = bool(value)
+        with self._lock:
+            if self._levels.get(pin) == value:
+                return
+            self._levels[pin] = value
+            self._events.append((time.monotonic(), pin, value))
+        if self.verbose:
+            print(f"[SIMULASI] GPIO {pin} -> {'HIGH' if value else 'LOW'}")
+
+    def level(self, pin):
+        with self._lock:
+            return self._levels.get(pin)
+
+    def timeline(self, pin=None):
+        """List (timestamp_monotonic, pin, level) urut waktu"""
+        with self._lock:
+            events = list(self._events)
+        if pin is not None:
+            events = [event for event in events if event[1] == pin]
+        return events
+
+    def pulses(self, pin, level):
+        """Durasi (detik) setiap periode pin berada di level tertentu"""
+        durations = []
+        started = None
+        for timestamp, _, value in self.timeline(pin):
+            if value == level and started is None:
+                started = timestamp
+            elif value != level and started is not None:
+                durations.append(timestamp - started)
+                started = None
+        return durations
+
+    def clear(self):
+        with self._lock:
+            self._events.clear()
+
+
+def create_backend(name="auto", **options):
+    """
+    Buat backend GPIO.
+
+    Args:
+        name: "auto", "rpi", "gpiod" atau "sim"
+
+    Raises:
+        ValueError: nama backend tidak dikenal
+        ImportError/OSError/RuntimeError: backend yang diminta tidak tersedia
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Backend GPIO tidak valid: {name}")
+    if name == "rpi":
+        return RPiGPIOBackend()
+    if name == "gpiod":
+        return GpiodBackend(**options)
+    if name == "sim":
+        return SimulatedBackend(**options)
+
+    for factory in (RPiGPIOBackend, GpiodBackend):
+        try:
+            return factory()
+        except (ImportError, OSError, RuntimeError) as e:
+            print(f"⚠ Backend GPIO {factory.name} tidak tersedia: {e}")
+    return SimulatedBackend()
+
+
+def benchmark(backend, pin, count):
+    """Latency write (detik) untuk count toggle"""
+    backend.setup_output(pin, False)
+    samples = []
+    value = False
+    for _ in range(count):
+        value = not value
+        start = time.perf_counter()
+        backend.write(pin, value)
+        samples.append(time.perf_counter() - start)
+    backend.write(pin, False)
+    return sorted(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark latency write backend GPIO")
+    parser.add_argument("--backend", default="auto", choices=BACKENDS)
+    parser.add_argument("--pin", type=int, default=2)
+    parser.add_argument("--count", type=int, default=10000)
+    args = parser.parse_args()
+
+    backend = create_backend(args.backend)
+    if isinstance(backend, SimulatedBackend):
+        backend.verbose = False
+    try:
+        samples = benchmark(backend, args.pin, args.count)
+    finally:
+        backend.cleanup()
+
+    def pct(p):
+        return samples[min(len(samples) - 1, int(len(samples) * p))] * 1e6
+
+    print(f"Backend {backend.name}: {len(samples)} write pada GPIO {args.pin}")
+    print(f"  p50={pct(0.50):.1f}us p95={pct(0.95):.1f}us "
+          f"p99={pct(0.99):.1f}us max={samples[-1] * 1e6:.1f}us")
+
+
+if __name__ == "__main__":
+    main()
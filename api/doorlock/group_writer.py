@@ -0,0 +1,185 @@
+"""
+Group-commit writer untuk attendance_logs
+
+Saat antrean tap panjang (pergantian shift), setiap tap yang melakukan
+INSERT + COMMIT sendiri berarti satu round-trip commit per karyawan. Writer
+ini mengumpulkan tap yang datang hampir bersamaan lalu mengirim satu
+multi-row INSERT + satu COMMIT. Setiap pemanggil tetap menerima hasilnya
+sendiri (sukses atau exception).
+
+Pada beban rendah tidak ada penundaan: batch langsung dikirim jika tidak ada
+tap lain yang sedang mengantre.
+"""
+
+import queue
+import threading
+import time
+
+INSERT_LOG = (
+    "INSERT INTO attendance_logs (employee_id, status, event_time) "
+    "VALUES (%s, %s, %s)"
+)
+
+
+class WriteFailed(Exception):
+    """Baris gagal disimpan; exception database asli ada di __cause__"""
+
+
+class _PendingWrite:
+    __slots__ = ("params", "done", "error", "state", "lock")
+
+    def __init__(self, params):
+        self.params = params
+        self.done = threading.Event()
+        self.error = None
+        self.state = "queued"  # queued -> writing | cancelled
+        self.lock = threading.Lock()
+
+    def claim(self):
+        """Dipanggil writer; False jika pemanggil sudah menyerah (timeout)"""
+        with self.lock:
+            if self.state != "queued":
+                return False
+            self.state = "writing"
+            return True
+
+    def cancel(self):
+        """Dipanggil pemanggil saat timeout; False jika sudah dipegang writer"""
+        with self.lock:
+            if self.state != "queued":
+                return False
+            self.state = "cancelled"
+            return True
+
+
+class GroupCommitWriter:
+    """Thread tunggal yang menggabungkan INSERT dari banyak tap"""
+
+    def __init__(self, pool, max_batch=50, max_wait=0.005):
+        """
+        Args:
+            pool: ConnectionPool untuk MySQL
+            max_batch: Jumlah baris maksimum per commit
+            max_wait: Detik maksimum menunggu tap tambahan, hanya saat
+                sudah ada antrean (burst)
+        """
+        self.pool = pool
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self.batches = 0
+        self.rows = 0
+
+    def submit(self, employee_id, status, event_time, timeout=30):
+        """
+        Simpan satu log dan tunggu sampai ter-commit.
+
+        timeout hanya membatasi waktu di antrean: baris yang sudah diambil
+        writer ditunggu sampai hasilnya pasti, supaya pemanggil tidak
+        melaporkan gagal (lalu retry -> baris ganda) untuk baris yang
+        ternyata ter-commit.
+
+        Raises:
+            TimeoutError: baris belum diambil writer dalam timeout dan
+                dibatalkan (pasti tidak tersimpan, aman diulang)
+            WriteFailed: database menolak baris ini (penyebab di __cause__)
+        """
+        self.start()
+        pending = _PendingWrite((employee_id, status, event_time))
+        self._queue.put(pending)
+        if not pending.done.wait(timeout):
+            if pending.cancel():
+                raise TimeoutError("Timeout menunggu commit attendance_logs")
+            pending.done.wait()
+        if pending.error is not None:
+            # Satu exception bisa dipakai bersama satu batch: raise instance baru per pemanggil
+            raise WriteFailed(f"Gagal menyimpan attendance_logs: {pending.error}") from pending.error
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    # -------------------------------------------------------------------------
+    # Writer thread
+    # -------------------------------------------------------------------------
+
+    def _collect(self):
+        batch = []
+        while not batch:
+            self._add(batch, self._queue.get())
+
+        # Ambil yang sudah mengantre tanpa menunggu
+        while len(batch) < self.max_batch:
+            try:
+                self._add(batch, self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        # Burst terdeteksi: beri waktu singkat untuk tap berikutnya
+        if len(batch) > 1 and self.max_wait > 0:
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    self._add(batch, self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+        return batch
+
+    @staticmethod
+    def _add(batch, pending):
+        # Tap yang pemanggilnya sudah timeout tidak ditulis
+        if pending.claim():
+            batch.append(pending)
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                if len(batch) > 1 and self.pool.ping():
+                    # Database hidup tapi batch ditolak: ulangi per baris agar
+                    # satu baris buruk tidak menggagalkan tap lain
+                    self._write_one_by_one(batch)
+                else:
+                    for pending in batch:
+                        pending.error = e
+            for pending in batch:
+                pending.done.set()
+
+    def _write_one_by_one(self, batch):
+        for pending in batch:
+            try:
+                self._write_batch([pending])
+            except Exception as e:
+                pending.error = e
+
+    def _write_batch(self, batch):
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                if len(batch) == 1:
+                    cursor.execute(INSERT_LOG, batch[0].params)
+                else:
+                    cursor.executemany(INSERT_LOG, [pending.params for pending in batch])
+                conn.commit()
+            finally:
+                cursor.close()
+        self.batches += 1
+        self.rows += len(batch)
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize(),
+            "batches": self.batches,
+            "rows": self.rows,
+            "avg_batch": round(self.rows / self.batches, 2) if self.batches else 0,
+        }
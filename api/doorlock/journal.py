@@ -0,0 +1,313 @@
+"""
+Journal absensi lokal (offline-first) + sinkronisasi ke MySQL
+
+Setiap tap yang diterima dicatat dulu ke SQLite lokal (mode WAL) sehingga
+pintu bisa langsung dibuka tanpa menunggu database remote. Thread syncer
+memutar ulang baris pending ke attendance_logs secara batch dan idempotent:
+baris yang sudah ada di MySQL (employee_id, status, event_time yang sama)
+tidak diinsert dua kali jika Pi mati di antara commit MySQL dan penandaan
+synced di lokal.
+"""
+
+import sqlite3
+import threading
+from datetime import datetime
+
+from doorlock.state_cache import day_bounds
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS journal (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        employee_id INTEGER NOT NULL,
+        status TEXT NOT NULL,
+        event_time TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        synced_at TEXT,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        last_error TEXT,
+        failed INTEGER NOT NULL DEFAULT 0
+    )
+"""
+
+PENDING_INDEX = """
+    CREATE INDEX IF NOT EXISTS idx_journal_pending
+    ON journal (synced_at, failed, id)
+"""
+
+INSERT_LOG = (
+    "INSERT INTO attendance_logs (employee_id, status, event_time) "
+    "VALUES (%s, %s, %s)"
+)
+
+
+class AttendanceJournal:
+    """Penyimpanan tap lokal yang tahan restart dan mati listrik"""
+
+    def __init__(self, path, max_attempts=10):
+        """
+        Args:
+            path: Lokasi file SQLite
+            max_attempts: Percobaan sync per baris sebelum ditandai gagal
+                (hanya dihitung jika database bisa dijangkau)
+        """
+        self.path = path
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # FULL: tap tetap tersimpan walaupun listrik Pi mati tiba-tiba
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute(SCHEMA)
+        self._conn.execute(PENDING_INDEX)
+        self._conn.commit()
+
+    def append(self, employee_id, status, event_time):
+        """Catat tap yang diterima; return id journal"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO journal (employee_id, status, event_time, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                (employee_id, status, event_time.strftime(TIME_FORMAT),
+                 datetime.now().strftime(TIME_FORMAT))
+            )
+            self._conn.commit()
+            return cursor.lastrowid
+
+    def pending(self, limit):
+        """Baris yang belum tersinkron (urut id)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, employee_id, status, event_time, attempts FROM journal "
+                "WHERE synced_at IS NULL AND failed = 0 ORDER BY id LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def last_today(self, employee_id, day):
+        """Tap terakhir karyawan hari ini menurut journal lokal"""
+        start, end = day_bounds(day)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, event_time FROM journal "
+                "WHERE employee_id = ? AND event_time >= ? AND event_time < ? "
+                "ORDER BY event_time DESC, id DESC LIMIT 1",
+                (employee_id, start.strftime(TIME_FORMAT), end.strftime(TIME_FORMAT))
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "status": row["status"],
+            "event_time": datetime.strptime(row["event_time"], TIME_FORMAT),
+        }
+
+    def mark_synced(self, ids):
+        if not ids:
+            return
+        now = datetime.now().strftime(TIME_FORMAT)
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE journal SET synced_at = ? WHERE id = ?",
+                [(now, journal_id) for journal_id in ids]
+            )
+            self._conn.commit()
+
+    def mark_attempt(self, journal_id, error):
+        """Catat kegagalan sync satu baris; tandai gagal setelah max_attempts"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE journal SET attempts = attempts + 1, last_error = ?, "
+                "failed = CASE WHEN attempts + 1 >= ? THEN 1 ELSE 0 END "
+                "WHERE id = ?",
+                (str(error)[:500], self.max_attempts, journal_id)
+            )
+            self._conn.commit()
+
+    def failed_rows(self, limit=1000):
+        """Baris yang berhenti dicoba sync (untuk laporan rekonsiliasi)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, employee_id, status, event_time, created_at, attempts, last_error "
+                "FROM journal WHERE failed = 1 ORDER BY id LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def stats(self):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT "
+                "SUM(CASE WHEN synced_at IS NULL AND failed = 0 THEN 1 ELSE 0 END) AS pending, "
+                "SUM(CASE WHEN failed = 1 THEN 1 ELSE 0 END) AS failed, "
+                "MIN(CASE WHEN synced_at IS NULL AND failed = 0 THEN created_at END) AS oldest_pending "
+                "FROM journal"
+            ).fetchone()
+        return {
+            "pending": row["pending"] or 0,
+            "failed": row["failed"] or 0,
+            "oldest_pending": row["oldest_pending"],
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class JournalSyncer:
+    """Thread yang memutar ulang journal ke attendance_logs secara batch"""
+
+    def __init__(self, journal, pool, batch_size=100, interval=5, max_backoff=60):
+        """
+        Args:
+            journal: AttendanceJournal sumber
+            pool: ConnectionPool tujuan (MySQL)
+            batch_size: Baris per multi-row INSERT
+            interval: Detik antar pengecekan jika tidak ada notify()
+            max_backoff: Detik tunggu maksimum saat database tidak terjangkau
+        """
+        self.journal = journal
+        self.pool = pool
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_backoff = max_backoff
+
+        # Satu sync pada satu waktu (thread syncer & /absen/batch): tanpa ini
+        # dua pemanggil bisa membaca baris pending yang sama dan menginsertnya dua kali
+        self._sync_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_error = None
+        self.last_sync = None
+
+    def notify(self):
+        """Bangunkan syncer (dipanggil setelah append)"""
+        self._wake.set()
+
+    def sync_once(self):
+        """Sinkronkan satu batch; return jumlah baris yang selesai"""
+        with self._sync_lock:
+            return self._sync_batch()
+
+    def flush(self, max_batches):
+        """
+        Sinkronkan sampai journal kosong, maksimum max_batches batch.
+
+        Returns:
+            True jika journal sudah tersusul, False jika masih ada backlog
+        """
+        for _ in range(max_batches):
+            if self.sync_once() < self.batch_size:
+                return True
+        return not self.journal.pending(1)
+
+    def _sync_batch(self):
+        rows = self.journal.pending(self.batch_size)
+        if not rows:
+            return 0
+
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                try:
+                    existing = self._existing(cursor, rows)
+                    missing = [
+                        row for row in rows
+                        if (row["employee_id"], row["status"], row["event_time"]) not in existing
+                    ]
+                    if missing:
+                        cursor.executemany(INSERT_LOG, [
+                            (row["employee_id"], row["status"], row["event_time"])
+                            for row in missing
+                        ])
+                    conn.commit()
+                finally:
+                    cursor.close()
+        except Exception:
+            if self.pool.ping():
+                # Database hidup tapi batch ditolak: isolasi baris yang bermasalah
+                return self._sync_one_by_one(rows)
+            raise
+
+        self.journal.mark_synced([row["id"] for row in rows])
+        self.last_sync = datetime.now()
+        return len(rows)
+
+    def _sync_one_by_one(self, rows):
+        done = 0
+        for row in rows:
+            try:
+                with self.pool.connection() as conn:
+                    cursor = conn.cursor()
+                    try:
+                        if not self._existing(cursor, [row]):
+                            cursor.execute(INSERT_LOG, (
+                                row["employee_id"], row["status"], row["event_time"]
+                            ))
+                        conn.commit()
+                    finally:
+                        cursor.close()
+            except Exception as e:
+                self.journal.mark_attempt(row["id"], e)
+                print(f"⚠ Sync journal #{row['id']} gagal: {e}")
+                continue
+            self.journal.mark_synced([row["id"]])
+            done += 1
+        return done
+
+    @staticmethod
+    def _existing(cursor, rows):
+        """Set (employee_id, status, event_time) yang sudah ada di MySQL"""
+        employee_ids = sorted({row["employee_id"] for row in rows})
+        times = [row["event_time"] for row in rows]
+        placeholders = ", ".join(["%s"] * len(employee_ids))
+        cursor.execute(
+            "SELECT employee_id, status, event_time FROM attendance_logs "
+            f"WHERE employee_id IN ({placeholders}) "
+            "AND event_time >= %s AND event_time <= %s",
+            (*employee_ids, min(times), max(times))
+        )
+        return {
+            (employee_id, status, event_time.strftime(TIME_FORMAT))
+            for employee_id, status, event_time in cursor.fetchall()
+        }
+
+    # -------------------------------------------------------------------------
+    # Background thread
+    # -------------------------------------------------------------------------
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _run(self):
+        backoff = self.interval
+        while not self._stop.is_set():
+            self._wake.wait(backoff)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                while self.sync_once() >= self.batch_size:
+                    pass
+                self.last_error = None
+                backoff = self.interval
+            except Exception as e:
+                self.last_error = str(e)
+                backoff = min(backoff * 2, self.max_backoff)
+                print(f"⚠ Sync journal tertunda ({backoff}s): {e}")
+
+    def stats(self):
+        stats = self.journal.stats()
+        stats["last_sync"] = self.last_sync.isoformat() if self.last_sync else None
+        stats["last_error"] = self.last_error
+        return stats
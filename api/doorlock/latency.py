@@ -0,0 +1,170 @@
+"""
+Instrumentasi latency aktuasi relay & jitter relock
+
+Timestamp time.monotonic() diambil pada:
+- penerimaan request / tap GUI           (trace dimulai)
+- selesai validasi database              (mark "validated")
+- tulis GPIO oleh thread scheduler pintu (DoorScheduler, via trace perintah)
+- relock: edge aktual dibanding deadline yang diminta (jitter)
+
+Trace disimpan per thread (thread-local) sehingga proses_absensi cukup
+memanggil latency.mark(...) tanpa meneruskan objek apa pun; perintah
+DoorScheduler membawa trace milik thread pemanggil ke thread scheduler.
+
+Setiap metrik disimpan sebagai jendela sampel terakhir (bukan seluruh
+riwayat) sehingga p50/p95/p99 mencerminkan kondisi terkini.
+
+Dump dari proses yang sedang berjalan:
+    python3 -m doorlock.latency --url http://localhost:5000
+"""
+
+import argparse
+import json
+import threading
+import time
+import urllib.request
+from collections import deque
+from contextlib import contextmanager
+
+PERCENTILES = (50, 95, 99)
+
+
+class Histogram:
+    """Sampel latency (detik) dalam jendela geser"""
+
+    def __init__(self, max_samples=2048):
+        self._samples = deque(maxlen=max_samples)
+        self.count = 0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self._samples.append(seconds)
+        self.count += 1
+        if seconds > self.max:
+            self.max = seconds
+
+    def summary(self):
+        """dict dalam milidetik: count, mean, p50/p95/p99, max"""
+        samples = sorted(self._samples)
+        result = {"count": self.count, "window": len(samples)}
+        if not samples:
+            return result
+        result["mean_ms"] = round(sum(samples) / len(samples) * 1000, 3)
+        for p in PERCENTILES:
+            index = min(len(samples) - 1, int(len(samples) * p / 100))
+            result[f"p{p}_ms"] = round(samples[index] * 1000, 3)
+        result["max_ms"] = round(self.max * 1000, 3)
+        return result
+
+
+class Trace:
+    """Timestamp satu request, dari penerimaan sampai edge GPIO"""
+
+    __slots__ = ("source", "start", "marks")
+
+    def __init__(self, source):
+        self.source = source
+        self.start = time.monotonic()
+        self.marks = {}
+
+
+class LatencyRecorder:
+    """Kumpulan histogram bernama + trace per thread"""
+
+    def __init__(self, max_samples=2048):
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._local = threading.local()
+
+    def record(self, metric, seconds):
+        with self._lock:
+            histogram = self._histograms.get(metric)
+            if histogram is None:
+                histogram = self._histograms[metric] = Histogram(self.max_samples)
+            histogram.add(seconds)
+
+    # -------------------------------------------------------------------------
+    # Trace per request
+    # -------------------------------------------------------------------------
+
+    @contextmanager
+    def trace(self, source):
+        """
+        Ukur satu request/tap; source jadi prefix metrik (mis. "api", "gui").
+
+        Mencatat "<source>.total" saat selesai.
+        """
+        current = Trace(source)
+        previous = getattr(self._local, "trace", None)
+        self._local.trace = current
+        try:
+            yield current
+        finally:
+            self._local.trace = previous
+            self.record(f"{source}.total", time.monotonic() - current.start)
+
+    def current(self):
+        """Trace aktif di thread ini, atau None"""
+        return getattr(self._local, "trace", None)
+
+    def mark(self, stage):
+        """Catat "<source>.<stage>" relatif terhadap penerimaan request"""
+        current = self.current()
+        if current is None:
+            return
+        now = time.monotonic()
+        current.marks[stage] = now
+        self.record(f"{current.source}.{stage}", now - current.start)
+
+    def actuated(self, current, at):
+        """Edge GPIO untuk trace current (dipanggil dari thread scheduler)"""
+        self.record(f"{current.source}.gpio", at - current.start)
+        validated = current.marks.get("validated")
+        if validated is not None:
+            self.record(f"{current.source}.validated_to_gpio", at - validated)
+
+    # -------------------------------------------------------------------------
+    # Laporan
+    # -------------------------------------------------------------------------
+
+    def snapshot(self):
+        with self._lock:
+            return {name: h.summary() for name, h in sorted(self._histograms.items())}
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+def format_table(snapshot):
+    """Tabel teks dari snapshot (untuk CLI)"""
+    lines = [f"{'metrik':<28}{'count':>8}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}  (ms)"]
+    for name, summary in snapshot.items():
+        if "p50_ms" not in summary:
+            continue
+        lines.append(
+            f"{name:<28}{summary['count']:>8}"
+            + "".join(f"{summary[f'p{p}_ms']:>10.2f}" for p in PERCENTILES)
+            + f"{summary['max_ms']:>10.2f}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dump histogram latency doorlock")
+    parser.add_argument("--url", default="http://localhost:5000", help="Base URL API doorlock")
+    parser.add_argument("--json", action="store_true", help="Cetak JSON mentah")
+    args = parser.parse_args()
+
+    with urllib.request.urlopen(args.url.rstrip("/") + "/latency", timeout=5) as response:
+        snapshot = json.load(response)["latency"]
+
+    if args.json:
+        print(json.dumps(snapshot, indent=2))
+    else:
+        print(format_table(snapshot))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Registry metrik ringan dengan format eksposisi teks Prometheus
+
+Tanpa dependensi tambahan (prometheus_client tidak ada di image Pi).
+Jenis metrik:
+- Counter   : hanya naik (request, hasil absensi, transisi relay)
+- Gauge     : nilai sesaat
+- Histogram : bucket tetap (kumulatif) + _sum + _count
+- Callback  : nilai dibaca dari stats() komponen lain saat scrape, sehingga
+              pool, breaker, cache dsb. tidak perlu diubah
+
+Update di jalur panas hanya satu lock + penambahan dict; render() dipanggil
+per scrape (/metrics).
+"""
+
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# Detik; cocok untuk request lokal (ms) sampai MySQL lewat WAN (detik)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def _format_value(value):
+    if value is None:
+        return "NaN"
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: label harus {self.labelnames}, bukan {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in items]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # [count per bucket (non-kumulatif) + overflow, sum, count]
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Ukur durasi blok (detik) ke histogram ini"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        with self._lock:
+            items = sorted((key, (list(e[0]), e[1], e[2])) for key, e in self._values.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', _format_value(float(bound))))} "
+                    f"{cumulative}"
+                )
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(round(total, 6))}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Callback(_Metric):
+    """Metrik yang nilainya dibaca saat scrape"""
+
+    def __init__(self, name, documentation, func, labelnames=(), type="gauge"):
+        """
+        Args:
+            func: Callable tanpa argumen -> nilai tunggal, atau list
+                (dict label, nilai) jika labelnames diisi
+        """
+        super().__init__(name, documentation, labelnames)
+        self.func = func
+        self.type = type
+
+    def render(self):
+        result = self.func()
+        if not self.labelnames:
+            return [f"{self.name} {_format_value(result)}"]
+        return [
+            f"{self.name}{_format_labels(self.labelnames, [labels[n] for n in self.labelnames])} "
+            f"{_format_value(value)}"
+            for labels, value in result
+        ]
+
+
+class MetricsRegistry:
+    """Kumpulan metrik; nama unik"""
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self, prefix=""):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metrik {metric.name} sudah terdaftar")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(self.prefix + name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(self.prefix + name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(self.prefix + name, documentation, labelnames, buckets))
+
+    def callback(self, name, documentation, func, labelnames=(), type="gauge"):
+        return self._register(Callback(self.prefix + name, documentation, func, labelnames, type))
+
+    def render(self):
+        """Teks eksposisi semua metrik"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            try:
+                body = metric.render()
+            except Exception as e:
+                # Satu sumber callback yang gagal tidak boleh menggagalkan scrape
+                print(f"⚠ Metrik {metric.name} gagal dibaca: {e}")
+                continue
+            lines.extend(metric.header())
+            lines.extend(body)
+        return "\n".join(lines) + "\n"
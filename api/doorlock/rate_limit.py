@@ -0,0 +1,102 @@
+"""
+Rate limiting token bucket per klien (IP dan token API)
+
+Setiap key (mis. "ip:192.168.1.20", "token:...@192.168.1.20") punya satu
+bucket: maksimum burst token, terisi rate token per detik. Request lolos jika
+semua key-nya masih punya token; jika tidak, ditolak (429) tanpa mengurangi
+token key lain.
+
+Memori O(1) per klien aktif: bucket disimpan di OrderedDict urut akses
+terakhir, sehingga bucket yang menganggur lebih dari idle_ttl (atau melebihi
+max_clients) dibuang dari depan tanpa scan penuh. Bucket yang dibuang berarti
+penuh kembali, yang memang keadaannya setelah menganggur selama itu.
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenBucketLimiter:
+    """Kumpulan bucket dengan rate & burst yang sama (satu per route/grup)"""
+
+    def __init__(self, rate, burst, idle_ttl=300, max_clients=10000):
+        """
+        Args:
+            rate: Token per detik (laju rata-rata yang diizinkan)
+            burst: Kapasitas bucket (request beruntun maksimum)
+            idle_ttl: Detik sebelum bucket yang tidak dipakai dibuang
+            max_clients: Jumlah bucket maksimum (yang paling lama dibuang)
+        """
+        self.rate = rate
+        self.burst = burst
+        self.idle_ttl = max(idle_ttl, burst / rate if rate else idle_ttl)
+        self.max_clients = max_clients
+
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()  # key -> [tokens, updated_at]
+        self.allowed = 0
+        self.rejected = 0
+        self.evicted = 0
+
+    def allow(self, keys, cost=1):
+        """
+        Ambil cost token dari setiap key.
+
+        Returns:
+            (allowed, retry_after) - retry_after dalam detik jika ditolak
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._evict_locked(now)
+
+            buckets = []
+            wait = 0.0
+            for key in keys:
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    self._evict_locked(now, room=1)
+                    bucket = self._buckets[key] = [float(self.burst), now]
+                else:
+                    bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                    bucket[1] = now
+                    self._buckets.move_to_end(key)
+                buckets.append(bucket)
+                if bucket[0] < cost:
+                    wait = max(wait, (cost - bucket[0]) / self.rate if self.rate else math.inf)
+
+            if wait:
+                self.rejected += 1
+                return False, wait
+
+            for bucket in buckets:
+                bucket[0] -= cost
+            self.allowed += 1
+            return True, 0.0
+
+    def _evict_locked(self, now, room=0):
+        """Buang bucket yang menganggur; room > 0 menyisakan tempat untuk key baru"""
+        buckets = self._buckets
+        while buckets:
+            key, (_, updated_at) = next(iter(buckets.items()))
+            if now - updated_at < self.idle_ttl and len(buckets) + room <= self.max_clients:
+                break
+            del buckets[key]
+            self.evicted += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "rate": self.rate,
+                "burst": self.burst,
+                "clients": len(self._buckets),
+                "allowed": self.allowed,
+                "rejected": self.rejected,
+                "evicted": self.evicted,
+            }
+
+
+def retry_after_header(seconds):
+    """Nilai header Retry-After (detik bulat, minimal 1)"""
+    return str(max(1, math.ceil(seconds)))
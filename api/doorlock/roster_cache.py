@@ -0,0 +1,369 @@
+"""
+Cache roster karyawan di memori
+
+Seluruh tabel employees dimuat sekali (satu query) lalu lookup kode karyawan
+dijawab dari dict, tanpa round-trip ke database remote. Thread latar belakang
+mengecek perubahan secara murah (COUNT(*) + MAX(updated_at)) dan memuat ulang
+roster jika berubah, atau paling lambat setiap TTL, sehingga karyawan yang
+dinonaktifkan tetap terpropagasi dalam hitungan menit.
+
+Mode "delta" untuk roster besar: setiap pengecekan hanya menarik baris yang
+berubah sejak high-water mark (updated_at, id) lalu menerapkannya ke index.
+Delete tidak terlihat lewat updated_at, jadi secara berkala checksum seluruh
+tabel (satu baris hasil) dibandingkan dengan checksum lokal; jika berbeda,
+roster dimuat ulang penuh.
+
+Kode yang tidak ditemukan di database disimpan sebentar (negative cache,
+negative_ttl) supaya kartu tidak dikenal yang di-tap berulang (atau retry
+storm) tidak memicu query per tap. Saat circuit breaker pool terbuka, kode
+yang tidak ada di cache langsung dianggap tidak ditemukan.
+"""
+
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from doorlock.circuit_breaker import OPEN
+
+SYNC_MODES = ("full", "delta")
+
+ROSTER_QUERY = "SELECT id, code, name, is_active FROM employees"
+SIGNATURE_QUERY = (
+    "SELECT COUNT(*) AS total, MAX(updated_at) AS last_update, MAX(id) AS last_id "
+    "FROM employees"
+)
+
+# >= pada updated_at: baris yang diubah di detik yang sama dengan high-water
+# mark tetap terambil (diterapkan ulang, idempotent). id > menangkap INSERT
+# yang tidak mengisi updated_at.
+DELTA_QUERY = (
+    "SELECT id, code, name, is_active, updated_at FROM employees "
+    "WHERE updated_at >= %s OR id > %s"
+)
+
+CHECKSUM_QUERY = (
+    "SELECT COUNT(*) AS total, "
+    "BIT_XOR(CRC32(CONCAT_WS('|', id, code, name, is_active))) AS checksum "
+    "FROM employees"
+)
+
+
+def _concat_value(value):
+    """Nilai kolom sebagai teks CONCAT_WS (None = dilewati, seperti NULL di MySQL)"""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return str(int(value))
+    return str(value)
+
+
+def row_checksum(employee):
+    """CRC32 sama dengan CRC32(CONCAT_WS('|', id, code, name, is_active)) di MySQL"""
+    values = (_concat_value(employee[column]) for column in ("id", "code", "name", "is_active"))
+    text = "|".join(value for value in values if value is not None)
+    return zlib.crc32(text.encode("utf-8"))
+
+
+class RosterCache:
+    """Index kode karyawan -> data karyawan"""
+
+    def __init__(self, pool, ttl=600, check_interval=60, mode="full",
+                 reconcile_interval=3600, negative_ttl=30, max_negative=10000):
+        """
+        Args:
+            pool: ConnectionPool untuk query ke database
+            ttl: Detik maksimum sebelum roster dimuat ulang penuh (mode full)
+            check_interval: Detik antar pengecekan perubahan
+            mode: "full" (reload saat signature berubah) atau "delta"
+                (tarik baris yang berubah saja)
+            reconcile_interval: Detik antar reconcile checksum (mode delta)
+            negative_ttl: Detik kode yang tidak ditemukan diingat tanpa query ulang
+            max_negative: Jumlah kode tidak dikenal maksimum yang diingat
+        """
+        if mode not in SYNC_MODES:
+            raise ValueError(f"Mode sync roster tidak valid: {mode}")
+        self.pool = pool
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self.mode = mode
+        self.reconcile_interval = reconcile_interval
+        self.negative_ttl = negative_ttl
+        self.max_negative = max_negative
+
+        self._lock = threading.Lock()
+        self._by_code = {}
+        self._code_by_id = {}
+        self._signature = None
+        self._high_water = (None, 0)  # (MAX(updated_at), MAX(id))
+        self._loaded_at = None
+        self._reconciled_at = None
+        self._missing = OrderedDict()  # kode -> kedaluwarsa (monotonic)
+        self.negative_hits = 0
+        self.delta_rows = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    # -------------------------------------------------------------------------
+    # Lookup (hot path)
+    # -------------------------------------------------------------------------
+
+    def get(self, code):
+        """
+        Ambil data karyawan berdasarkan kode.
+
+        Kode yang belum ada di cache (mis. karyawan baru sebelum refresh
+        berikutnya) dicari langsung ke database lalu disimpan; kode yang
+        tidak ditemukan diingat selama negative_ttl.
+        """
+        employee = self._by_code.get(code)
+        if employee is not None:
+            return employee
+        if self._skip_lookup(code):
+            return None
+
+        employee = self._fetch_one(code)
+        with self._lock:
+            if employee is not None:
+                self._put_locked(employee)
+            else:
+                self._remember_missing_locked(code)
+        return employee
+
+    def get_many(self, codes):
+        """
+        Ambil banyak karyawan sekaligus; kode yang tidak ada di cache dicari
+        dengan satu query IN.
+
+        Returns:
+            dict kode -> data karyawan (kode yang tidak ditemukan tidak ada)
+        """
+        found = {}
+        missing = []
+        for code in set(codes):
+            employee = self._by_code.get(code)
+            if employee is not None:
+                found[code] = employee
+            elif not self._skip_lookup(code):
+                missing.append(code)
+
+        if missing:
+            placeholders = ", ".join(["%s"] * len(missing))
+            with self.pool.connection() as conn:
+                cursor = conn.cursor(dictionary=True)
+                try:
+                    cursor.execute(ROSTER_QUERY + f" WHERE code IN ({placeholders})", missing)
+                    rows = cursor.fetchall()
+                finally:
+                    cursor.close()
+            with self._lock:
+                for row in rows:
+                    self._put_locked(row)
+                    found[row["code"]] = row
+                for code in missing:
+                    if code not in found:
+                        self._remember_missing_locked(code)
+        return found
+
+    def _skip_lookup(self, code):
+        """True jika kode tidak dikenal tidak perlu dicari ke database"""
+        with self._lock:
+            expires = self._missing.get(code)
+            if expires is not None:
+                if time.monotonic() < expires:
+                    self.negative_hits += 1
+                    return True
+                del self._missing[code]
+        # Database dianggap mati: kode di luar cache = tidak ditemukan, bukan error
+        breaker = getattr(self.pool, "breaker", None)
+        return breaker is not None and breaker.state == OPEN
+
+    def _remember_missing_locked(self, code):
+        self._missing.pop(code, None)
+        self._missing[code] = time.monotonic() + self.negative_ttl
+        while len(self._missing) > self.max_negative:
+            self._missing.popitem(last=False)
+
+    def _put_locked(self, employee):
+        """Simpan/ganti karyawan; kode lama dibuang jika kode berubah"""
+        old_code = self._code_by_id.get(employee["id"])
+        if old_code is not None and self._by_code.get(old_code) == employee:
+            return False
+        if old_code is not None and old_code != employee["code"]:
+            self._by_code.pop(old_code, None)
+        self._by_code[employee["code"]] = employee
+        self._code_by_id[employee["id"]] = employee["code"]
+        self._missing.pop(employee["code"], None)
+        return True
+
+    def _fetch_one(self, code):
+        with self.pool.connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            try:
+                cursor.execute(ROSTER_QUERY + " WHERE code = %s", (code,))
+                return cursor.fetchone()
+            finally:
+                cursor.close()
+
+    # -------------------------------------------------------------------------
+    # Load & refresh
+    # -------------------------------------------------------------------------
+
+    def load(self):
+        """Muat seluruh roster dalam satu query"""
+        with self.pool.connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            try:
+                cursor.execute(SIGNATURE_QUERY)
+                signature = self._make_signature(cursor.fetchone())
+                cursor.execute(ROSTER_QUERY)
+                rows = cursor.fetchall()
+            finally:
+                cursor.close()
+
+        by_code = {row["code"]: row for row in rows}
+        with self._lock:
+            self._by_code = by_code
+            self._code_by_id = {row["id"]: row["code"] for row in rows}
+            self._missing.clear()
+            self._signature = signature
+            self._high_water = signature[1:]
+            self._loaded_at = time.monotonic()
+            self._reconciled_at = self._loaded_at
+
+        print(f"✓ Roster karyawan dimuat: {len(by_code)} karyawan")
+        return len(by_code)
+
+    def refresh_if_changed(self):
+        """Muat ulang jika signature berubah atau TTL terlewati"""
+        if self.mode == "delta":
+            return self.sync()
+
+        expired = (
+            self._loaded_at is None
+            or time.monotonic() - self._loaded_at >= self.ttl
+        )
+        if not expired:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor(dictionary=True)
+                try:
+                    cursor.execute(SIGNATURE_QUERY)
+                    signature = self._make_signature(cursor.fetchone())
+                finally:
+                    cursor.close()
+            if signature == self._signature:
+                return False
+
+        self.load()
+        return True
+
+    @staticmethod
+    def _make_signature(row):
+        return (row["total"], row["last_update"], row["last_id"] or 0)
+
+    # -------------------------------------------------------------------------
+    # Delta sync
+    # -------------------------------------------------------------------------
+
+    def sync(self):
+        """Mode delta: reconcile jika jatuh tempo, selain itu tarik perubahan saja"""
+        if (
+            self._reconciled_at is None
+            or time.monotonic() - self._reconciled_at >= self.reconcile_interval
+        ):
+            return self.reconcile()
+        return self.sync_delta() > 0
+
+    def sync_delta(self):
+        """Terapkan baris yang berubah sejak high-water mark; return jumlah yang berubah"""
+        last_update, last_id = self._high_water
+        with self.pool.connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            try:
+                cursor.execute(DELTA_QUERY, (last_update, last_id))
+                rows = cursor.fetchall()
+            finally:
+                cursor.close()
+
+        changed = 0
+        with self._lock:
+            for row in rows:
+                updated_at = row.pop("updated_at")
+                if self._put_locked(row):
+                    changed += 1
+                if updated_at is not None and (last_update is None or updated_at > last_update):
+                    last_update = updated_at
+                last_id = max(last_id, row["id"])
+            self._high_water = (last_update, last_id)
+        self.delta_rows += changed
+        return changed
+
+    def local_checksum(self):
+        """(jumlah, BIT_XOR CRC32) roster di memori"""
+        with self._lock:
+            employees = list(self._by_code.values())
+        checksum = 0
+        for employee in employees:
+            checksum ^= row_checksum(employee)
+        return len(employees), checksum
+
+    def reconcile(self):
+        """
+        Tarik delta, lalu bandingkan checksum seluruh tabel dengan roster lokal.
+        Jika berbeda (mis. ada karyawan yang dihapus), muat ulang penuh.
+
+        Returns:
+            True jika roster berubah
+        """
+        changed = self.sync_delta() > 0
+        with self.pool.connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            try:
+                cursor.execute(CHECKSUM_QUERY)
+                row = cursor.fetchone()
+            finally:
+                cursor.close()
+
+        if (row["total"], int(row["checksum"] or 0)) != self.local_checksum():
+            print("⚠ Checksum roster berbeda, memuat ulang penuh")
+            self.load()
+            return True
+
+        self._reconciled_at = time.monotonic()
+        return changed
+
+    # -------------------------------------------------------------------------
+    # Background refresher
+    # -------------------------------------------------------------------------
+
+    def start(self):
+        """Jalankan thread refresh di background"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.check_interval):
+            try:
+                self.refresh_if_changed()
+            except Exception as e:
+                # Roster lama tetap dipakai sampai refresh berikutnya berhasil
+                print(f"⚠ Refresh roster gagal: {e}")
+
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "employees": len(self._by_code),
+            "delta_rows": self.delta_rows,
+            "negative": len(self._missing),
+            "negative_hits": self.negative_hits,
+            "age_seconds": (
+                round(time.monotonic() - self._loaded_at, 1)
+                if self._loaded_at is not None else None
+            ),
+        }
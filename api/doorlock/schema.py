@@ -0,0 +1,189 @@
+"""
+Advisor skema & index untuk tabel attendance_logs
+
+Hot query di Pi mencari log terakhir karyawan pada satu hari. Agar biayanya
+tetap datar saat attendance_logs mencapai jutaan baris, query harus memakai
+predicate range pada event_time (bukan DATE(event_time)) dan didukung index
+komposit (employee_id, event_time). Dengan predicate range, kolom generated
+event_date tidak diperlukan.
+
+Mode:
+- "off"     : hanya cek keberadaan tabel (perilaku lama)
+- "verify"  : cek index + EXPLAIN hot query, laporkan masalah
+- "migrate" : seperti verify, lalu buat index yang kurang
+
+Bisa dijalankan terpisah terhadap MySQL lokal (stand-in):
+    python3 -m doorlock.schema --host 127.0.0.1 --user root --database walini_pj
+    python3 -m doorlock.schema --host 127.0.0.1 --user root --database walini_pj --apply
+"""
+
+import argparse
+from datetime import date
+
+from doorlock.state_cache import WARM_QUERY, day_bounds
+
+SCHEMA_MODES = ("off", "verify", "migrate")
+
+REQUIRED_TABLES = ("employees", "attendance_logs")
+
+# Nama sama dengan database/migrations/attendance_logs_add_columns.sql
+EMPLOYEE_DATE_INDEX = "idx_employee_date"
+CREATE_EMPLOYEE_DATE_INDEX = (
+    f"CREATE INDEX {EMPLOYEE_DATE_INDEX} ON attendance_logs (employee_id, event_time)"
+)
+
+LAST_LOG_QUERY = """
+    SELECT status, event_time
+    FROM attendance_logs
+    WHERE employee_id = %s
+      AND event_time >= %s AND event_time < %s
+    ORDER BY event_time DESC
+    LIMIT 1
+"""
+
+INDEX_QUERY = """
+    SELECT INDEX_NAME, COLUMN_NAME, SEQ_IN_INDEX
+    FROM information_schema.STATISTICS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    ORDER BY INDEX_NAME, SEQ_IN_INDEX
+"""
+
+
+def verify_tables(cursor):
+    """Pastikan tabel employees dan attendance_logs ada"""
+    for table in REQUIRED_TABLES:
+        cursor.execute(f"SHOW TABLES LIKE '{table}'")
+        if not cursor.fetchone():
+            raise Exception(f"Tabel '{table}' tidak ditemukan!")
+
+
+def get_indexes(cursor, table):
+    """Map nama index -> tuple kolom (urut sesuai SEQ_IN_INDEX)"""
+    cursor.execute(INDEX_QUERY, (table,))
+    indexes = {}
+    for row in cursor.fetchall():
+        indexes.setdefault(row["INDEX_NAME"], []).append(row["COLUMN_NAME"])
+    return {name: tuple(columns) for name, columns in indexes.items()}
+
+
+def find_covering_index(indexes):
+    """Cari index yang bisa dipakai untuk (employee_id = ?, range event_time)"""
+    for name, columns in indexes.items():
+        if columns[:2] == ("employee_id", "event_time"):
+            return name
+    return None
+
+
+def explain(cursor, query, params):
+    """Jalankan EXPLAIN dan ringkas setiap langkah plan"""
+    cursor.execute("EXPLAIN " + query, params)
+    rows = cursor.fetchall()
+    return [
+        {
+            "table": row["table"],
+            "type": row["type"],
+            "key": row["key"],
+            "rows": row["rows"],
+        }
+        for row in rows
+    ]
+
+
+def check_schema(conn, mode="verify"):
+    """
+    Verifikasi (dan opsional migrasi) index untuk hot query absensi.
+
+    Returns:
+        dict laporan: index yang ditemukan, hasil EXPLAIN, masalah, aksi
+    """
+    if mode not in SCHEMA_MODES:
+        raise ValueError(f"Mode skema tidak valid: {mode}")
+
+    report = {"mode": mode, "index": None, "explain": {}, "problems": [], "applied": []}
+
+    cursor = conn.cursor(dictionary=True)
+    try:
+        verify_tables(cursor)
+        if mode == "off":
+            return report
+
+        indexes = get_indexes(cursor, "attendance_logs")
+        report["index"] = find_covering_index(indexes)
+
+        if report["index"] is None:
+            if mode == "migrate":
+                cursor.execute(CREATE_EMPLOYEE_DATE_INDEX)
+                conn.commit()
+                report["applied"].append(CREATE_EMPLOYEE_DATE_INDEX)
+                report["index"] = EMPLOYEE_DATE_INDEX
+            else:
+                report["problems"].append(
+                    "Index komposit (employee_id, event_time) tidak ada di attendance_logs"
+                )
+
+        start, end = day_bounds(date.today())
+        report["explain"]["last_log"] = explain(cursor, LAST_LOG_QUERY, (0, start, end))
+        report["explain"]["day_state_warm"] = explain(cursor, WARM_QUERY, (start, end))
+
+        for name, plan in report["explain"].items():
+            for step in plan:
+                if step["table"] in ("attendance_logs", "l") and (
+                    step["type"] == "ALL" or step["key"] is None
+                ):
+                    report["problems"].append(
+                        f"EXPLAIN {name}: full scan pada attendance_logs (type={step['type']})"
+                    )
+
+        last_log_keys = {step["key"] for step in report["explain"]["last_log"]}
+        if report["index"] and report["index"] not in last_log_keys:
+            report["problems"].append(
+                f"EXPLAIN last_log: optimizer tidak memakai {report['index']}"
+            )
+    finally:
+        cursor.close()
+
+    return report
+
+
+def print_report(report):
+    """Cetak laporan dengan format yang sama dengan log startup"""
+    if report["mode"] == "off":
+        return
+    if report["index"]:
+        print(f"✓ Index attendance_logs: {report['index']}")
+    for statement in report["applied"]:
+        print(f"✓ Migrasi diterapkan: {statement}")
+    for name, plan in report["explain"].items():
+        for step in plan:
+            print(f"  EXPLAIN {name}: table={step['table']} type={step['type']} "
+                  f"key={step['key']} rows={step['rows']}")
+    for problem in report["problems"]:
+        print(f"⚠ {problem}")
+    if report["problems"] and report["mode"] == "verify":
+        print("⚠ Jalankan dengan mode 'migrate' (atau --apply) untuk membuat index")
+
+
+def main():
+    import mysql.connector
+
+    parser = argparse.ArgumentParser(description="Verifikasi/migrasi index attendance_logs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3306)
+    parser.add_argument("--user", default="root")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--database", default="walini_pj")
+    parser.add_argument("--apply", action="store_true", help="Buat index yang kurang")
+    args = parser.parse_args()
+
+    conn = mysql.connector.connect(
+        host=args.host, port=args.port, user=args.user,
+        password=args.password, database=args.database
+    )
+    try:
+        print_report(check_schema(conn, "migrate" if args.apply else "verify"))
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
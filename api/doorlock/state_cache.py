@@ -0,0 +1,169 @@
+"""
+Cache status absensi terakhir per karyawan untuk hari ini
+
+Aturan urutan Masuk/Pulang/Lembur/Pulang Lembur hanya butuh status terakhir
+karyawan pada hari yang sama. Map employee_id -> (status, event_time) ini:
+- di-warm dengan satu query grouped saat startup
+- di-update write-through setelah setiap INSERT yang berhasil
+- di-reset tepat saat pergantian hari (tengah malam waktu lokal)
+
+Selama cache warm, validasi tap tidak membutuhkan query baca sama sekali.
+Log yang ditulis oleh sistem lain (mis. admin web) terlihat setelah re-warm
+berkala berikutnya.
+"""
+
+import threading
+from datetime import date, datetime, time as dtime, timedelta
+
+WARM_QUERY = """
+    SELECT l.employee_id, l.status, l.event_time
+    FROM attendance_logs l
+    JOIN (
+        SELECT employee_id, MAX(event_time) AS last_time
+        FROM attendance_logs
+        WHERE event_time >= %s AND event_time < %s
+        GROUP BY employee_id
+    ) t ON t.employee_id = l.employee_id AND t.last_time = l.event_time
+    ORDER BY l.event_time, l.id
+"""
+
+
+def day_bounds(day):
+    """Rentang [awal hari, awal hari berikutnya) untuk predicate range"""
+    start = datetime.combine(day, dtime.min)
+    return start, start + timedelta(days=1)
+
+
+class DailyStateCache:
+    """Map employee_id -> status terakhir hari ini"""
+
+    def __init__(self, pool, refresh_interval=300):
+        """
+        Args:
+            pool: ConnectionPool untuk query warm
+            refresh_interval: Detik antar re-warm di background
+                (menangkap log yang ditulis dari luar Pi ini)
+        """
+        self.pool = pool
+        self.refresh_interval = refresh_interval
+
+        self._lock = threading.Lock()
+        self._day = None
+        self._entries = {}
+        self._warm = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    # -------------------------------------------------------------------------
+    # Lookup & write-through (hot path)
+    # -------------------------------------------------------------------------
+
+    def _rollover_locked(self, today):
+        # Hari baru belum punya log: map kosong tetap warm jika sebelumnya warm
+        if self._day != today:
+            self._day = today
+            self._entries = {}
+
+    def is_warm(self):
+        """True jika cache bisa dipakai tanpa query fallback"""
+        with self._lock:
+            self._rollover_locked(date.today())
+            return self._warm
+
+    def get(self, employee_id):
+        """
+        Ambil log terakhir hari ini.
+
+        Returns:
+            dict {"status", "event_time"} atau None jika belum ada log
+        """
+        with self._lock:
+            self._rollover_locked(date.today())
+            entry = self._entries.get(employee_id)
+        if entry is None:
+            return None
+        return {"status": entry[0], "event_time": entry[1]}
+
+    def record(self, employee_id, status, event_time):
+        """Write-through setelah INSERT attendance_logs berhasil"""
+        with self._lock:
+            self._rollover_locked(date.today())
+            if event_time.date() != self._day:
+                return
+            current = self._entries.get(employee_id)
+            if current is None or event_time >= current[1]:
+                self._entries[employee_id] = (status, event_time)
+
+    # -------------------------------------------------------------------------
+    # Warm
+    # -------------------------------------------------------------------------
+
+    def warm(self):
+        """Isi ulang cache dengan satu query grouped untuk hari ini"""
+        today = date.today()
+        start, end = day_bounds(today)
+
+        with self.pool.connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            try:
+                cursor.execute(WARM_QUERY, (start, end))
+                rows = cursor.fetchall()
+            finally:
+                cursor.close()
+
+        entries = {}
+        for row in rows:
+            entries[row["employee_id"]] = (row["status"], row["event_time"])
+
+        with self._lock:
+            if date.today() != today:
+                # Tengah malam lewat saat query berjalan - hasilnya basi
+                return 0
+            if self._day == today:
+                # Pertahankan write-through yang terjadi selama query berjalan
+                for employee_id, entry in self._entries.items():
+                    warmed = entries.get(employee_id)
+                    if warmed is None or entry[1] > warmed[1]:
+                        entries[employee_id] = entry
+            self._day = today
+            self._entries = entries
+            self._warm = True
+
+        print(f"✓ Status absensi hari ini dimuat: {len(entries)} karyawan")
+        return len(entries)
+
+    # -------------------------------------------------------------------------
+    # Background re-warm
+    # -------------------------------------------------------------------------
+
+    def start(self):
+        """Jalankan thread re-warm di background"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while True:
+            # Bangun tepat setelah tengah malam atau setelah refresh_interval
+            now = datetime.now()
+            midnight = datetime.combine(now.date() + timedelta(days=1), dtime.min)
+            wait = min(self.refresh_interval, (midnight - now).total_seconds() + 0.05)
+            if self._stop.wait(wait):
+                return
+            try:
+                self.warm()
+            except Exception as e:
+                print(f"⚠ Re-warm status absensi gagal: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "day": self._day.isoformat() if self._day else None,
+                "warm": self._warm,
+                "employees": len(self._entries),
+            }
@@ -0,0 +1,251 @@
+"""
+Tracing per request: correlation ID + span per tahap
+
+Satu trace = satu request API / tap GUI. ID diambil dari header X-Request-ID
+(dikirim PHP/Laravel, sehingga log di server web bisa dicocokkan) atau dibuat
+baru. Di dalam trace, tracer.span("...") mengukur satu tahap (parse JSON,
+tunggu bulkhead, cek log, simpan, relay) relatif terhadap awal trace.
+
+Trace aktif disimpan per thread, sama seperti LatencyRecorder, sehingga
+proses_absensi cukup memanggil tracer.span(...); di luar trace span tidak
+mencatat apa pun. Thread lain (scheduler pintu) menambah span lewat
+Trace.add_span() pada trace yang dibawa perintahnya.
+
+Trace yang selesai masuk ring buffer (kapasitas tetap, yang tertua dibuang)
+untuk /traces, dan trace yang lambat ditulis ke file JSON lines oleh thread
+writer di background (tulis ke SD card yang lambat tidak menahan request):
+    curl -H 'X-API-Token: ...' 'http://localhost:5000/traces?min_ms=200'
+    curl -H 'X-API-Token: ...' 'http://localhost:5000/traces/export' > traces.jsonl
+"""
+
+import json
+import queue
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+# ID dari klien dipakai apa adanya hanya jika aman untuk log & header
+_VALID_ID = re.compile(r"^[A-Za-z0-9._:-]{1,64}$")
+
+TRACE_ID_HEADERS = ("X-Request-ID", "X-Correlation-ID")
+
+
+def new_trace_id():
+    return uuid.uuid4().hex
+
+
+def correlation_id(headers):
+    """ID dari header request jika valid, selain itu ID baru"""
+    for name in TRACE_ID_HEADERS:
+        value = headers.get(name)
+        if value and _VALID_ID.match(value):
+            return value
+    return new_trace_id()
+
+
+class Trace:
+    """Span satu request; offset & durasi dalam milidetik"""
+
+    def __init__(self, trace_id, name, attrs=None, max_spans=64):
+        self.trace_id = trace_id
+        self.name = name
+        self.attrs = dict(attrs or {})
+        self.started_at = datetime.now()
+        self.start = time.perf_counter()
+        self.duration_ms = None
+        self.error = None
+        self.spans = []
+        self.max_spans = max_spans
+        self.dropped_spans = 0
+
+    def add_span(self, name, start, end, **attrs):
+        """Tambah span dari timestamp time.perf_counter() (aman dari thread lain)"""
+        if len(self.spans) >= self.max_spans:
+            self.dropped_spans += 1
+            return
+        span = {
+            "name": name,
+            "start_ms": round((start - self.start) * 1000, 3),
+            "duration_ms": round((end - start) * 1000, 3),
+        }
+        span.update(attrs)
+        self.spans.append(span)
+
+    def to_dict(self):
+        result = {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": self.duration_ms,
+            "attrs": self.attrs,
+            "spans": sorted(self.spans, key=lambda span: span["start_ms"]),
+        }
+        if self.error:
+            result["error"] = self.error
+        if self.dropped_spans:
+            result["dropped_spans"] = self.dropped_spans
+        return result
+
+
+class Tracer:
+    """Trace per thread + ring buffer trace yang sudah selesai"""
+
+    def __init__(self, capacity=500, export_path=None, export_min_ms=0, export_queue=1000):
+        """
+        Args:
+            capacity: Trace selesai yang disimpan di memori
+            export_path: File JSON lines untuk trace lambat (None = nonaktif)
+            export_min_ms: Durasi minimum trace yang ditulis ke export_path
+            export_queue: Baris export maksimum yang menunggu writer
+                (lebih dari itu dibuang dan dihitung di export_dropped)
+        """
+        self.capacity = capacity
+        self.export_path = export_path
+        self.export_min_ms = export_min_ms
+
+        self._lock = threading.Lock()
+        self._finished = deque(maxlen=capacity)
+        self._local = threading.local()
+        self._export_queue = queue.Queue(export_queue)
+        self._export_thread = None
+        self.started = 0
+        self.exported = 0
+        self.export_dropped = 0
+
+    @contextmanager
+    def trace(self, name, trace_id=None, **attrs):
+        """Mulai trace di thread ini; selesai (dan disimpan) saat blok keluar"""
+        current = Trace(trace_id or new_trace_id(), name, attrs)
+        previous = getattr(self._local, "trace", None)
+        self._local.trace = current
+        with self._lock:
+            self.started += 1
+        try:
+            yield current
+        except Exception as e:
+            current.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self._local.trace = previous
+            self._finish(current)
+
+    @contextmanager
+    def span(self, name, **attrs):
+        """
+        Ukur satu tahap di trace aktif; yield dict atribut span yang boleh
+        ditambah pemanggil (mis. span["source"] = "cache").
+        """
+        current = self.current()
+        if current is None:
+            yield attrs
+            return
+        start = time.perf_counter()
+        try:
+            yield attrs
+        except Exception as e:
+            attrs["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            current.add_span(name, start, time.perf_counter(), **attrs)
+
+    def current(self):
+        """Trace aktif di thread ini, atau None"""
+        return getattr(self._local, "trace", None)
+
+    def annotate(self, **attrs):
+        """Tambah atribut ke trace aktif (jika ada)"""
+        current = self.current()
+        if current is not None:
+            current.attrs.update(attrs)
+
+    def _finish(self, current):
+        current.duration_ms = round((time.perf_counter() - current.start) * 1000, 3)
+        with self._lock:
+            self._finished.append(current)
+        if self.export_path and current.duration_ms >= self.export_min_ms:
+            self._export(current)
+
+    def _export(self, current):
+        """Antrekan trace untuk writer background (tidak pernah menunggu I/O)"""
+        line = json.dumps(current.to_dict(), default=str)
+        self._start_export_writer()
+        try:
+            self._export_queue.put_nowait(line)
+        except queue.Full:
+            with self._lock:
+                self.export_dropped += 1
+
+    def _start_export_writer(self):
+        if self._export_thread and self._export_thread.is_alive():
+            return
+        with self._lock:
+            if self._export_thread and self._export_thread.is_alive():
+                return
+            self._export_thread = threading.Thread(
+                target=self._export_loop, name="trace-export", daemon=True
+            )
+            self._export_thread.start()
+
+    def _export_loop(self):
+        while True:
+            lines = [self._export_queue.get()]
+            # Tulis semua yang sudah mengantre dalam satu open/append
+            while True:
+                try:
+                    lines.append(self._export_queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with open(self.export_path, "a", encoding="utf-8") as f:
+                    f.write("".join(line + "\n" for line in lines))
+                with self._lock:
+                    self.exported += len(lines)
+            except OSError as e:
+                print(f"⚠ Gagal menulis trace ke {self.export_path}: {e}")
+            finally:
+                for _ in lines:
+                    self._export_queue.task_done()
+
+    def flush(self):
+        """Tunggu sampai semua trace yang diantrekan sudah ditulis"""
+        self._export_queue.join()
+
+    def query(self, trace_id=None, name=None, min_ms=None, errors_only=False, limit=50):
+        """Trace selesai yang cocok dengan filter, terbaru dulu (list dict)"""
+        with self._lock:
+            finished = list(self._finished)
+        result = []
+        for current in reversed(finished):
+            if trace_id and current.trace_id != trace_id:
+                continue
+            if name and not current.name.startswith(name):
+                continue
+            if min_ms is not None and current.duration_ms < min_ms:
+                continue
+            if errors_only and not current.error:
+                continue
+            result.append(current.to_dict())
+            if limit and len(result) >= limit:
+                break
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {
+                "capacity": self.capacity,
+                "stored": len(self._finished),
+                "started": self.started,
+                "exported": self.exported,
+                "export_dropped": self.export_dropped,
+                "export_path": self.export_path,
+                "export_min_ms": self.export_min_ms,
+            }
+
+
+def to_json_lines(traces):
+    """Serialisasi list dict trace sebagai JSON lines"""
+    return "".join(json.dumps(trace, default=str) + "\n" for trace in traces)
@@ -0,0 +1,182 @@
+"""
+Mode serving API: Werkzeug dev server atau waitress (produksi)
+
+app.run() memakai server development Werkzeug: satu thread baru per koneksi
+tanpa batas, tanpa tuning backlog, dan tidak bisa dihentikan dengan rapi.
+create_server() menjalankan app Flask yang sama di bawah:
+- "waitress": server WSGI threaded (pure Python, paket python3-waitress)
+  dengan jumlah worker thread tetap, batas koneksi, backlog, dan timeout
+  keep-alive
+- "dev": Werkzeug seperti sebelumnya (untuk development & pembanding)
+
+Keduanya dibungkus DrainMiddleware sehingga shutdown(drain_timeout) berhenti
+menerima request baru (503 + Retry-After), menunggu request yang sedang
+berjalan selesai, baru menutup socket. Stream yang tidak pernah selesai
+sendiri (SSE /events) diakhiri lewat callback on_drain saat draining mulai.
+
+Catatan: setiap koneksi /events (SSE) memakai satu worker thread selama
+terhubung; threads harus lebih besar dari jumlah kiosk yang subscribe.
+"""
+
+import threading
+import time
+
+SERVER_MODES = ("waitress", "dev")
+
+
+class DrainMiddleware:
+    """Hitung request yang sedang berjalan; tolak request baru saat draining"""
+
+    def __init__(self, app, on_drain=None):
+        """
+        Args:
+            on_drain: Callable opsional yang dipanggil saat draining mulai,
+                untuk mengakhiri response long-lived (mis. EventBus.close_streams)
+        """
+        self.app = app
+        self.on_drain = on_drain
+        self.draining = False
+        self._lock = threading.Condition()
+        self.in_flight = 0
+
+    def __call__(self, environ, start_response):
+        if self.draining:
+            start_response("503 Service Unavailable", [
+                ("Content-Type", "application/json"),
+                ("Retry-After", "5"),
+            ])
+            return [b'{"status": "error", "message": "Server sedang dihentikan"}']
+
+        with self._lock:
+            self.in_flight += 1
+        try:
+            result = self.app(environ, start_response)
+        except BaseException:
+            self._done()
+            raise
+        return _ClosingIterator(result, self._done)
+
+    def _done(self):
+        with self._lock:
+            self.in_flight -= 1
+            self._lock.notify_all()
+
+    def drain(self, timeout):
+        """Tolak request baru lalu tunggu in-flight habis; return sisa in-flight"""
+        self.draining = True
+        deadline = time.monotonic() + timeout
+        if self.on_drain:
+            try:
+                self.on_drain()
+            except Exception as e:
+                print(f"⚠ Callback drain gagal: {e}")
+        with self._lock:
+            while self.in_flight > 0:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._lock.wait(remaining)
+            return self.in_flight
+
+
+class _ClosingIterator:
+    """Panggil callback setelah body (termasuk stream) selesai dikirim"""
+
+    def __init__(self, iterable, callback):
+        self._iterable = iterable
+        self._iterator = iter(iterable)
+        self._callback = callback
+        self._closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._iterator)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            if hasattr(self._iterable, "close"):
+                self._iterable.close()
+        finally:
+            self._callback()
+
+
+class Server:
+    """Server HTTP yang sudah di-bind; run() blocking, shutdown() dari thread lain"""
+
+    def __init__(self, mode, middleware, server, host, port):
+        self.mode = mode
+        self.middleware = middleware
+        self._server = server
+        self.host = host
+        self.port = port
+
+    def run(self):
+        if self.mode == "waitress":
+            self._server.run()
+        else:
+            self._server.serve_forever()
+
+    def shutdown(self, drain_timeout=5):
+        """Graceful drain lalu tutup listener"""
+        remaining = self.middleware.drain(drain_timeout)
+        if remaining:
+            print(f"⚠ {remaining} request masih berjalan setelah {drain_timeout}s, server ditutup")
+        if self.mode == "waitress":
+            self._server.close()
+        else:
+            self._server.shutdown()
+
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "in_flight": self.middleware.in_flight,
+            "draining": self.middleware.draining,
+        }
+
+
+def create_server(app, host, port, mode="waitress", threads=8, connection_limit=100,
+                  backlog=64, keepalive_timeout=30, on_drain=None):
+    """
+    Bind server untuk app.
+
+    Args:
+        mode: "waitress" atau "dev"; jika waitress tidak terpasang, turun ke dev
+        threads: Worker thread (waitress)
+        connection_limit: Koneksi terbuka maksimum, sisanya antre di backlog
+        backlog: Panjang antrean listen() socket
+        keepalive_timeout: Detik koneksi keep-alive menganggur sebelum ditutup
+        on_drain: Callable yang dipanggil saat shutdown mulai draining
+    """
+    if mode not in SERVER_MODES:
+        raise ValueError(f"Mode server tidak valid: {mode}")
+
+    middleware = DrainMiddleware(app, on_drain)
+
+    if mode == "waitress":
+        try:
+            from waitress.server import create_server as waitress_server
+        except ImportError as e:
+            print(f"⚠ waitress tidak tersedia ({e}), memakai Werkzeug dev server")
+            mode = "dev"
+        else:
+            server = waitress_server(
+                middleware,
+                host=host,
+                port=port,
+                threads=threads,
+                connection_limit=connection_limit,
+                backlog=backlog,
+                channel_timeout=keepalive_timeout,
+                ident="doorlock",
+            )
+            return Server(mode, middleware, server, host, port)
+
+    from werkzeug.serving import make_server
+
+    server = make_server(host, port, middleware, threaded=True)
+    return Server(mode, middleware, server, host, port)
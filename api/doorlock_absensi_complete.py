@@ -12,34 +12,11 @@ from datetime import datetime, date
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 
-# Try to import GPIO, fallback to mock if not on Raspberry Pi
-try:
-    import RPi.GPIO as GPIO
-    GPIO_AVAILABLE = True
-except ImportError:
-    print("WARNING: RPi.GPIO not available. Running in SIMULATION mode.")
-    GPIO_AVAILABLE = False
-    
-    # Mock GPIO for testing on non-Pi hardware
-    class MockGPIO:
-        BCM = 'BCM'
-        OUT = 'OUT'
-        HIGH = 1
-        LOW = 0
-        
-        @staticmethod
-        def setmode(mode): pass
-        @staticmethod
-        def setwarnings(flag): pass
-        @staticmethod
-        def setup(pin, mode, initial=0): pass
-        @staticmethod
-        def output(pin, state): 
-            print(f"[MOCK GPIO] Pin {pin} set to {'HIGH' if state else 'LOW'}")
-        @staticmethod
-        def cleanup(): pass
-    
-    GPIO = MockGPIO()
+from doorlock.circuit_breaker import CircuitBreaker, CircuitOpen
+from doorlock.db_pool import ConnectionPool
+from doorlock.state_cache import day_bounds
+from doorlock.door_scheduler import DoorScheduler
+from doorlock.gpio_backend import create_backend
 
 # Try to import Tkinter for GUI
 try:
@@ -61,6 +38,7 @@ except ImportError:
 # -------------------------------
 # KONFIGURASI DASAR
 # -------------------------------
+GPIO_BACKEND = "auto"        # "auto" (rpi -> gpiod -> sim), "rpi", "gpiod" atau "sim"
 RELAY_PIN = 2                # Pin GPIO untuk relay doorlock
 RELAY_ACTIVE_LOW = True      # Sesuaikan modul relay kamu (True = LOW aktif)
 DEFAULT_DELAY = 5            # Detik doorlock terbuka
@@ -76,15 +54,28 @@ DB_CONFIG = {
     'ssl_disabled': True
 }
 
-# Initialize GPIO
-GPIO.setmode(GPIO.BCM)
-GPIO.setwarnings(False)
-GPIO.setup(RELAY_PIN, GPIO.OUT, initial=GPIO.HIGH if RELAY_ACTIVE_LOW else GPIO.LOW)
+# Konfigurasi connection pool
+DB_POOL_SIZE = 4             # Koneksi maksimum (Flask threads + GUI)
+DB_POOL_IDLE_TIMEOUT = 300   # Detik sebelum koneksi menganggur ditutup
+DB_POOL_ACQUIRE_TIMEOUT = 5  # Detik maksimum menunggu koneksi bebas
+
+# Circuit breaker: tap gagal cepat saat database mati, tanpa menunggu connect timeout
+DB_CIRCUIT_FAILURE_THRESHOLD = 3  # Kegagalan berturut-turut sebelum sirkuit dibuka
+DB_CIRCUIT_RESET_TIMEOUT = 30     # Detik sebelum satu percobaan ulang (half-open)
+
+# Initialize GPIO (fallback ke simulator jika bukan Raspberry Pi)
+gpio = create_backend(GPIO_BACKEND)
+GPIO_AVAILABLE = gpio.hardware
+if not GPIO_AVAILABLE:
+    print("WARNING: GPIO hardware not available. Running in SIMULATION mode.")
+gpio.setup_output(RELAY_PIN, RELAY_ACTIVE_LOW)  # Terkunci saat start
 
 # Variabel global
 door_status = "Terkunci"
 current_delay = DEFAULT_DELAY
 status_lock = threading.Lock()  # Lock untuk mengamankan akses door_status
+DOOR_ID = "main"
+door_scheduler = DoorScheduler()  # Satu thread untuk semua relock pintu
 app_flask = Flask(__name__)
 CORS(app_flask)  # Izinkan CORS untuk browser kiosk lokal
 
@@ -104,26 +95,39 @@ logging.basicConfig(
 # -------------------------------
 # FUNGSI DATABASE
 # -------------------------------
+def _open_db_connection():
+    """Buat koneksi baru (dipanggil oleh pool saat butuh koneksi tambahan)"""
+    return mysql.connector.connect(**DB_CONFIG)
+
+db_breaker = CircuitBreaker(
+    "mysql",
+    failure_threshold=DB_CIRCUIT_FAILURE_THRESHOLD,
+    reset_timeout=DB_CIRCUIT_RESET_TIMEOUT
+)
+
+# Pool koneksi bersama, supaya tidak connect + auth ulang ke server remote setiap tap
+db_pool = ConnectionPool(
+    _open_db_connection,
+    max_size=DB_POOL_SIZE,
+    idle_timeout=DB_POOL_IDLE_TIMEOUT,
+    acquire_timeout=DB_POOL_ACQUIRE_TIMEOUT,
+    breaker=db_breaker
+)
+
 @contextmanager
 def get_db_connection():
-    """Konteks manajer untuk koneksi database."""
+    """Konteks manajer untuk koneksi database (dipinjam dari pool)."""
     if not MYSQL_AVAILABLE:
         logging.warning("MySQL tidak tersedia, melewati operasi database")
         yield None
         return
     
-    conn = None
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        yield conn
+        with db_pool.connection() as conn:
+            yield conn
     except Exception as e:
         logging.error(f"Error koneksi database: {e}")
-        if conn:
-            conn.rollback()
         raise
-    finally:
-        if conn and conn.is_connected():
-            conn.close()
 
 def init_db():
     """Inisialisasi dan verifikasi koneksi database"""
@@ -162,17 +166,13 @@ def init_db():
 # -------------------------------
 def set_relay(active: bool):
     """Kendalikan relay agar tidak terbalik logikanya."""
-    if RELAY_ACTIVE_LOW:
-        GPIO.output(RELAY_PIN, GPIO.LOW if active else GPIO.HIGH)
-    else:
-        GPIO.output(RELAY_PIN, GPIO.HIGH if active else GPIO.LOW)
+    gpio.write(RELAY_PIN, active != RELAY_ACTIVE_LOW)
 
 def open_door(delay=None):
     """
     Fungsi utama untuk membuka pintu dan menutupnya setelah delay.
-    Memicu buka/tutup otomatis sesuai permintaan.
+    Tidak memblokir: penguncian kembali dijadwalkan di door_scheduler.
     """
-    global door_status, current_delay
     if delay is None:
         delay = current_delay
     try:
@@ -182,26 +182,31 @@ def open_door(delay=None):
     except (ValueError, TypeError):
         d = current_delay
 
-    with status_lock:  # Gunakan lock untuk mengamankan akses status
-        if door_status == "Terbuka":
-            logging.info("Pintu sedang terbuka, permintaan dibatalkan.")
-            return  # Jika sudah terbuka, jangan buka lagi
-
-        door_status = "Terbuka"
-        logging.info(f"Pintu dibuka selama {d:.2f} detik")
-        set_relay(True)
-        update_status_label()  # Update GUI
-        log_message(f"Pintu dibuka selama {d:.2f} detik")  # Log ke GUI
+    # Jika sudah terbuka, deadline penguncian diperpanjang (antrean karyawan)
+    try:
+        remaining = door_scheduler.open(DOOR_ID, d, extend=True)
+    except TimeoutError as e:
+        logging.error(f"Scheduler pintu tidak merespons: {e}")
+        remaining = None
+    if remaining is None:
+        logging.error("Gagal membuka pintu.")
+        return
 
-    time.sleep(d)  # Tunggu selama delay
+    logging.info(f"Pintu terbuka, terkunci dalam {remaining:.2f} detik")
+    log_message(f"Pintu terbuka, terkunci dalam {remaining:.2f} detik")  # Log ke GUI
 
-    with status_lock:  # Gunakan lock untuk mengamankan penutupan
-        set_relay(False)
-        door_status = "Terkunci"
+def on_door_change(door_id, is_open):
+    """Dipanggil oleh thread scheduler setelah relay berubah."""
+    global door_status
+    with status_lock:  # Gunakan lock untuk mengamankan akses status
+        door_status = "Terbuka" if is_open else "Terkunci"
+    update_status_label()  # Update GUI
+    if not is_open:
         logging.info("Pintu dikunci kembali.")
-        update_status_label()  # Update GUI
         log_message("Pintu dikunci kembali.")  # Log ke GUI
 
+door_scheduler.add_door(DOOR_ID, set_relay, on_door_change)
+
 def update_status_label():
     """Update label status di GUI."""
     if status_label_gui:
@@ -281,16 +286,17 @@ def proses_absensi(kode, status_absen):
             employee_id = employee["id"]
             nama = employee["name"]
             sekarang = datetime.now()
-            hari_ini = date.today()
+            awal_hari, awal_besok = day_bounds(date.today())
             logging.info(f"[DEBUG] Employee ditemukan: ID={employee_id}, Nama={nama}")
 
             # Cek log terakhir hari ini
             cursor.execute("""
                 SELECT status, event_time 
                 FROM attendance_logs
-                WHERE employee_id = %s AND DATE(event_time) = %s
+                WHERE employee_id = %s
+                  AND event_time >= %s AND event_time < %s
                 ORDER BY event_time DESC LIMIT 1
-            """, (employee_id, hari_ini))
+            """, (employee_id, awal_hari, awal_besok))
             last_log = cursor.fetchone()
             logging.info(f"[DEBUG] Log terakhir hari ini: {last_log}")
 
@@ -349,6 +355,9 @@ def proses_absensi(kode, status_absen):
                 "nama": nama,
                 "waktu": sekarang.strftime("%Y-%m-%d %H:%M:%S")
             }
+    except CircuitOpen as e:
+        logging.warning(str(e))
+        return {"status": "error", "message": "Database sedang tidak tersedia, coba lagi nanti"}
     except Exception as e:
         logging.error(f"[DEBUG] Error absensi: {e}")
         return {"status": "error", "message": f"Gagal proses absensi: {str(e)}"}
@@ -367,7 +376,7 @@ def absen_dan_buka_pintu(kode, status):
         logging.info(f"[DEBUG] {msg}")
         log_message(msg)
         # Jika absensi sukses, buka pintu otomatis
-        threading.Thread(target=open_door, daemon=True).start()
+        open_door()
     elif result["status"] == "info":
         msg = f"Absensi {status} info: {result['message']}"
         logging.info(f"[DEBUG] {msg}")
@@ -428,7 +437,7 @@ def api_open():
     msg = f"Pintu dibuka via API selama {delay} detik."
     logging.info(f"[DEBUG] {msg}")
     log_message(msg)
-    threading.Thread(target=open_door, args=(delay,), daemon=True).start()
+    open_door(delay)
     return jsonify({"status": "success", "delay_used": delay})
 
 @app_flask.route('/door/status', methods=['GET'])
@@ -447,6 +456,7 @@ def health():
         'version': '3.0',
         'gpio_mode': 'REAL' if GPIO_AVAILABLE else 'SIMULATED',
         'mysql': 'AVAILABLE' if MYSQL_AVAILABLE else 'DISABLED',
+        'mysql_circuit': db_breaker.stats(),
         'gui': 'AVAILABLE' if TKINTER_AVAILABLE else 'DISABLED'
     })
 
@@ -553,14 +563,10 @@ def setup_gui():
 
     def buka_manual():
         log_message("Pintu dibuka manual via GUI.")
-        threading.Thread(target=open_door, daemon=True).start()
+        open_door()
 
     def kunci_manual():
-        global door_status
-        with status_lock:
-            set_relay(False)
-            door_status = "Terkunci"
-        update_status_label()
+        door_scheduler.lock(DOOR_ID)
         log_message("Pintu dikunci manual via GUI.")
 
     tk.Button(btn_frame, text="🔓 Buka Pintu", width=12, command=buka_manual, bg="#90EE90").pack(side="left", padx=5)
@@ -581,9 +587,8 @@ def setup_gui():
 
     def on_exit():
         if messagebox.askokcancel("Keluar", "Tutup program dan matikan doorlock?"):
-            with status_lock:
-                set_relay(False)  # Pastikan pintu terkunci
-            GPIO.cleanup()
+            door_scheduler.stop()  # Pastikan pintu terkunci
+            gpio.cleanup()
             root.destroy()
 
     tk.Button(exit_frame, text="Keluar", command=on_exit, bg="#FF6347", fg="white").pack()
@@ -627,7 +632,8 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         logging.info("Menutup sistem...")
     finally:
-        with status_lock:
-            set_relay(False)
-        GPIO.cleanup()
+        door_scheduler.stop()
+        set_relay(False)
+        gpio.cleanup()
         logging.info("GPIO dibersihkan.")
+        db_pool.close_all()
@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+Doorlock + Absensi API - Varian asyncio
+Route sama dengan doorlock_pi_final.py (/absen, /door/open, /door/lock,
+/door/status, /health) tetapi tanpa thread per request:
+- HTTP: aiohttp
+- MySQL: aiomysql (pool async, query tidak memblokir thread)
+- Relock: deadline di event loop (loop.call_at), bukan thread/timer
+
+Satu proses bisa menahan ratusan request lambat (MySQL lewat WAN) dengan
+memori kecil. Tanpa GUI Tk; dipakai untuk Pi headless / kiosk.
+
+Dependensi (lihat setup_pi.sh langkah 4b):
+    sudo apt install python3-aiohttp python3-pymysql
+    sudo pip3 install --break-system-packages aiomysql
+
+Uji terhadap MySQL lokal (stand-in, mis. container MariaDB dengan schema
+employees & attendance_logs):
+    python3 doorlock_async.py --db-host 127.0.0.1 --db-database walini_pj --port 5001
+Test otomatis: tests/test_async_door.py (relock di event loop, tanpa
+database) dan tests/test_doorlock_async.py (memakai database kosong di MySQL
+lokal yang ditunjuk DOORLOCK_TEST_MYSQL).
+"""
+
+import argparse
+import asyncio
+import contextlib
+import weakref
+from datetime import datetime
+
+import aiomysql
+from aiohttp import web
+
+from doorlock.async_door import AsyncDoor
+from doorlock.gpio_backend import SimulatedBackend, create_backend
+from doorlock.schema import LAST_LOG_QUERY
+from doorlock.state_cache import day_bounds
+
+# =============================================================================
+# KONFIGURASI
+# =============================================================================
+
+# Database Configuration
+DB_CONFIG = {
+    'host': 'website.airpanaswalini.com',
+    'user': 'root',
+    'password': 'igasarpride',
+    'db': 'walini_pj',
+    'port': 3306
+}
+DB_POOL_MIN = 1
+DB_POOL_MAX = 10  # Query bersamaan maksimum; request lain menunggu tanpa thread
+DB_CONNECT_TIMEOUT = 5
+DB_ACQUIRE_TIMEOUT = 5  # Detik maksimum menunggu koneksi bebas; lewat -> 503
+
+# GPIO Configuration
+GPIO_BACKEND = "auto"  # "auto" (rpi -> gpiod -> sim), "rpi", "gpiod" atau "sim"
+RELAY_PIN = 2  # GPIO 2 (Physical Pin 3)
+RELAY_ACTIVE_LOW = True  # True jika relay aktif saat LOW
+
+# Doorlock Configuration
+DEFAULT_DOOR_DELAY = 5  # Detik
+AUTO_LOCK_AFTER_ABSEN = True  # Auto buka pintu setelah absen
+
+# API Configuration
+API_TOKEN = "SECURE_KEY_IGASAR"
+HTTP_PORT = 5000
+HTTP_HOST = "0.0.0.0"
+
+# Status Mapping (GUI format -> Database ENUM)
+STATUS_MAPPING = {
+    "Masuk": "masuk",
+    "Pulang": "pulang",
+    "Lembur": "lembur",
+    "Pulang Lembur": "pulang_lembur"
+}
+
+EMPLOYEE_QUERY = "SELECT id, code, name, is_active FROM employees WHERE code = %s"
+INSERT_LOG = (
+    "INSERT INTO attendance_logs (employee_id, status, event_time) "
+    "VALUES (%s, %s, %s)"
+)
+
+# =============================================================================
+# DATABASE
+# =============================================================================
+
+class PoolExhausted(Exception):
+    """Tidak ada koneksi bebas dalam DB_ACQUIRE_TIMEOUT"""
+
+@contextlib.asynccontextmanager
+async def db_connection(app):
+    """Pinjam koneksi pool dengan batas waktu (pool.acquire() sendiri menunggu selamanya)"""
+    pool = app["db"]
+    try:
+        conn = await asyncio.wait_for(pool.acquire(), DB_ACQUIRE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise PoolExhausted(f"Pool database penuh ({pool.maxsize} koneksi)") from None
+    try:
+        yield conn
+    finally:
+        await pool.release(conn)
+
+# =============================================================================
+# ABSENSI LOGIC
+# =============================================================================
+
+# Tap bersamaan untuk kode yang sama diproses berurutan (satu event loop, jadi
+# cukup asyncio.Lock per kode; entry hilang sendiri saat tidak dipakai). Lock
+# diambil sebelum koneksi agar yang menunggu tidak menahan koneksi pool.
+_tap_locks = weakref.WeakValueDictionary()
+
+def tap_lock(kode):
+    lock = _tap_locks.get(kode)
+    if lock is None:
+        lock = _tap_locks[kode] = asyncio.Lock()
+    return lock
+
+async def proses_absensi(app, kode: str, status_absen: str):
+    """
+    Proses absensi karyawan (aturan sama dengan doorlock_pi_final.proses_absensi)
+
+    Returns:
+        dict: {"status": "success/error/info", "message": "...", "data": {...}}
+
+    Raises:
+        PoolExhausted: tidak ada koneksi bebas (dijawab 503 oleh api_absen)
+    """
+    status_db = STATUS_MAPPING.get(status_absen)
+    if not status_db:
+        return {
+            "status": "error",
+            "message": f"Status tidak valid: {status_absen}"
+        }
+
+    try:
+        async with tap_lock(kode), db_connection(app) as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                # 1. VALIDASI EMPLOYEE
+                await cursor.execute(EMPLOYEE_QUERY, (kode,))
+                employee = await cursor.fetchone()
+
+                if not employee:
+                    return {
+                        "status": "error",
+                        "message": f"Kode karyawan {kode} tidak ditemukan"
+                    }
+                if not employee["is_active"]:
+                    return {
+                        "status": "error",
+                        "message": f"{employee['name']} sudah tidak aktif"
+                    }
+
+                employee_id = employee["id"]
+                employee_name = employee["name"]
+
+                # 2. CEK LOG HARI INI
+                sekarang = datetime.now().replace(microsecond=0)
+                awal_hari, awal_besok = day_bounds(sekarang.date())
+                await cursor.execute(LAST_LOG_QUERY, (employee_id, awal_hari, awal_besok))
+                last_log = await cursor.fetchone()
+
+                # 3. VALIDASI DUPLIKASI
+                if last_log:
+                    last_status = last_log["status"]
+                    if last_status == status_db:
+                        return {
+                            "status": "info",
+                            "message": f"{employee_name} sudah absen {status_absen.lower()} hari ini.",
+                            "data": {
+                                "employee": employee_name,
+                                "last_time": last_log["event_time"].strftime('%H:%M:%S')
+                            }
+                        }
+                    if status_db == "masuk" and last_status in ["pulang", "pulang_lembur"]:
+                        return {
+                            "status": "error",
+                            "message": f"{employee_name} sudah pulang hari ini, tidak bisa absen masuk lagi."
+                        }
+
+                # 4. SIMPAN LOG BARU (autocommit)
+                await cursor.execute(INSERT_LOG, (employee_id, status_db, sekarang))
+
+    except (aiomysql.Error, OSError, asyncio.TimeoutError) as e:
+        print(f"✗ Database error: {e}")
+        return {
+            "status": "error",
+            "message": f"Database error: {str(e)}"
+        }
+
+    print(f"✓ Absensi tersimpan: {employee_name} - {status_absen} ({sekarang.strftime('%Y-%m-%d %H:%M:%S')})")
+
+    # 5. TRIGGER DOORLOCK (jika enabled)
+    door_opened = False
+    if AUTO_LOCK_AFTER_ABSEN:
+        door_opened = app["door"].unlock(DEFAULT_DOOR_DELAY) is not None
+
+    return {
+        "status": "success",
+        "message": f"Berhasil! {employee_name} absen {status_absen.lower()}.",
+        "data": {
+            "employee_id": employee_id,
+            "employee_name": employee_name,
+            "employee_code": kode,
+            "status": status_db,
+            "event_time": sekarang.strftime('%Y-%m-%d %H:%M:%S'),
+            "door_opened": door_opened
+        }
+    }
+
+# =============================================================================
+# HTTP API
+# =============================================================================
+
+routes = web.RouteTableDef()
+
+async def read_json(request):
+    try:
+        data = await request.json()
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+def verify_token(data, request):
+    """Verifikasi API token (body atau header X-API-Token)"""
+    return (data.get('token') or request.headers.get('X-API-Token')) == API_TOKEN
+
+def invalid_token():
+    return web.json_response({"status": "error", "message": "Invalid token"}, status=401)
+
+@routes.get('/health')
+async def health_check(request):
+    """Health check endpoint"""
+    app = request.app
+    db_status = "AVAILABLE"
+    try:
+        async with db_connection(app) as conn:
+            await asyncio.wait_for(conn.ping(), DB_CONNECT_TIMEOUT)
+    except Exception:
+        db_status = "UNAVAILABLE"
+
+    pool = app["db"]
+    return web.json_response({
+        "status": "healthy",
+        "timestamp": datetime.now().isoformat(),
+        "server": "asyncio",
+        "gpio_mode": "HARDWARE" if app["gpio"].hardware else "SIMULATED",
+        "gpio_backend": app["gpio"].name,
+        "mysql": db_status,
+        "mysql_pool": {"size": pool.size, "free": pool.freesize, "max_size": pool.maxsize},
+        "in_flight": app["in_flight"],
+        "doorlock": app["door"].get_status()
+    })
+
+@routes.post('/door/open')
+async def api_door_open(request):
+    """Buka pintu via API"""
+    data = await read_json(request)
+    if not verify_token(data, request):
+        return invalid_token()
+
+    try:
+        delay = int(data.get('delay', DEFAULT_DOOR_DELAY))
+    except (TypeError, ValueError):
+        delay = DEFAULT_DOOR_DELAY
+    delay = max(1, min(delay, 30))  # Batasi 1-30 detik
+
+    remaining = request.app["door"].unlock(delay)
+    return web.json_response({
+        "status": "success",
+        "message": f"Pintu terbuka, akan terkunci otomatis dalam {remaining:g} detik",
+        "delay_used": delay,
+        "remaining": remaining
+    })
+
+@routes.post('/door/lock')
+async def api_door_lock(request):
+    """Kunci pintu via API"""
+    data = await read_json(request)
+    if not verify_token(data, request):
+        return invalid_token()
+
+    if request.app["door"].lock():
+        return web.json_response({"status": "success", "message": "Pintu dikunci"})
+    return web.json_response({"status": "info", "message": "Pintu sudah terkunci"})
+
+@routes.get('/door/status')
+async def api_door_status(request):
+    """Cek status pintu"""
+    return web.json_response(request.app["door"].get_status())
+
+@routes.post('/absen')
+async def api_absen(request):
+    """Endpoint absensi via API"""
+    data = await read_json(request)
+    if not verify_token(data, request):
+        return invalid_token()
+
+    kode = str(data.get('kode') or '').strip()
+    status = str(data.get('status') or '').strip()
+    if not kode or not status:
+        return web.json_response({
+            "status": "error",
+            "message": "Parameter 'kode' dan 'status' wajib diisi"
+        }, status=400)
+
+    try:
+        result = await proses_absensi(request.app, kode, status)
+    except PoolExhausted as e:
+        print(f"⚠ {e}")
+        return web.json_response({
+            "status": "error",
+            "message": "Server sibuk, coba lagi sebentar"
+        }, status=503, headers={"Retry-After": "1"})
+    return web.json_response(result, status=200 if result["status"] == "success" else 400)
+
+@web.middleware
+async def count_in_flight(request, handler):
+    request.app["in_flight"] += 1
+    try:
+        return await handler(request)
+    finally:
+        request.app["in_flight"] -= 1
+
+# =============================================================================
+# STARTUP / SHUTDOWN
+# =============================================================================
+
+async def on_startup(app):
+    app["db"] = await aiomysql.create_pool(
+        minsize=DB_POOL_MIN,
+        maxsize=DB_POOL_MAX,
+        connect_timeout=DB_CONNECT_TIMEOUT,
+        # Setiap SELECT melihat data terbaru; tidak ada transaksi menggantung
+        # saat koneksi kembali ke pool
+        autocommit=True,
+        **app["db_config"]
+    )
+    print(f"✓ Database pool: {app['db_config']['db']}@{app['db_config']['host']}")
+
+async def on_cleanup(app):
+    # Pintu harus terkunci saat service berhenti
+    app["door"].lock()
+    app["gpio"].cleanup()
+    app["db"].close()
+    await app["db"].wait_closed()
+    print("✓ Database connections closed")
+
+def create_app(db_config=None, gpio_backend=GPIO_BACKEND):
+    try:
+        gpio = create_backend(gpio_backend)
+    except (ImportError, OSError, RuntimeError, ValueError) as e:
+        print(f"⚠ Backend GPIO '{gpio_backend}' tidak tersedia: {e}")
+        gpio = SimulatedBackend()
+
+    app = web.Application(middlewares=[count_in_flight])
+    app["db_config"] = db_config or DB_CONFIG
+    app["gpio"] = gpio
+    app["door"] = AsyncDoor(gpio, RELAY_PIN, RELAY_ACTIVE_LOW, delay=DEFAULT_DOOR_DELAY)
+    app["door"].setup()
+    app["in_flight"] = 0
+    app.add_routes(routes)
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="Doorlock + Absensi API (asyncio)")
+    parser.add_argument("--host", default=HTTP_HOST)
+    parser.add_argument("--port", type=int, default=HTTP_PORT)
+    parser.add_argument("--db-host", default=DB_CONFIG['host'])
+    parser.add_argument("--db-port", type=int, default=DB_CONFIG['port'])
+    parser.add_argument("--db-user", default=DB_CONFIG['user'])
+    parser.add_argument("--db-password", default=DB_CONFIG['password'])
+    parser.add_argument("--db-database", default=DB_CONFIG['db'])
+    parser.add_argument("--gpio-backend", default=GPIO_BACKEND)
+    args = parser.parse_args()
+
+    db_config = {
+        'host': args.db_host,
+        'port': args.db_port,
+        'user': args.db_user,
+        'password': args.db_password,
+        'db': args.db_database
+    }
+
+    print("="*60)
+    print("  DOORLOCK + ABSENSI API (asyncio)")
+    print("="*60)
+    app = create_app(db_config, args.gpio_backend)
+    print(f"🌐 Starting asyncio API server on {args.host}:{args.port}")
+    web.run_app(app, host=args.host, port=args.port, print=None)
+
+if __name__ == "__main__":
+    main()
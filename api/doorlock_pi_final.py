@@ -15,22 +15,36 @@ Database Schema:
 import tkinter as tk
 from tkinter import messagebox, ttk
 from datetime import datetime, timedelta
+import os
+import functools
 import threading
 import time
 import mysql.connector
 from mysql.connector import Error
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
 
-# Import GPIO dengan error handling
-try:
-    import RPi.GPIO as GPIO
-    GPIO_AVAILABLE = True
-    print("✓ GPIO Module tersedia")
-except (ImportError, RuntimeError) as e:
-    GPIO_AVAILABLE = False
-    print(f"⚠ GPIO Module tidak tersedia: {e}")
-    print("⚠ Menggunakan mode SIMULASI")
+from doorlock.db_pool import ConnectionPool
+from doorlock.circuit_breaker import CircuitBreaker, CircuitOpen, OPEN
+from doorlock.roster_cache import RosterCache
+from doorlock.state_cache import DailyStateCache, day_bounds
+from doorlock.schema import LAST_LOG_QUERY, check_schema, print_report
+from doorlock.journal import AttendanceJournal, JournalSyncer
+from doorlock.group_writer import GroupCommitWriter, WriteFailed
+from doorlock import atomic_absen
+from doorlock.batch_absen import process_batch
+from doorlock.dedupe import ResponseCache
+from doorlock.door_scheduler import DoorScheduler
+from doorlock.doors import DoorRegistry
+from doorlock.gpio_backend import SimulatedBackend, create_backend
+from doorlock.latency import LatencyRecorder
+from doorlock.deferred_writer import DeferredWriter
+from doorlock.events import EventBus, sse_stream
+from doorlock.wsgi_server import create_server
+from doorlock.bulkhead import Bulkhead, BulkheadFull, reserved_threads
+from doorlock.rate_limit import TokenBucketLimiter, retry_after_header
+from doorlock.metrics import MetricsRegistry
+from doorlock.tracing import Tracer, correlation_id, to_json_lines
 
 # =============================================================================
 # KONFIGURASI
@@ -46,7 +60,75 @@ DB_CONFIG = {
     'ssl_disabled': True
 }
 
+# Connection Pool Configuration
+DB_POOL_SIZE = 4  # Koneksi maksimum (Flask threads + GUI)
+DB_POOL_IDLE_TIMEOUT = 300  # Detik sebelum koneksi menganggur ditutup
+DB_POOL_ACQUIRE_TIMEOUT = 5  # Detik maksimum menunggu koneksi bebas
+DB_POOL_MIN_IDLE = 1  # Koneksi yang selalu siap (dibuka di background, bukan saat tap)
+DB_KEEPALIVE_INTERVAL = 30  # Detik antar ping keep-alive (jauh di bawah wait_timeout); tap tidak ping koneksi < 2x ini
+DB_MAX_LIFETIME = 3600  # Detik sebelum koneksi di-recycle oleh keep-alive
+
+# Circuit Breaker: tap gagal cepat (jalur journal/cache) saat database mati
+DB_CIRCUIT_FAILURE_THRESHOLD = 3  # Kegagalan berturut-turut sebelum sirkuit dibuka
+DB_CIRCUIT_RESET_TIMEOUT = 30  # Detik sebelum satu percobaan ulang (half-open)
+DB_CONNECT_RETRIES = 1  # Retry connect per peminjaman; breaker yang menangani percobaan ulang
+
+# Roster Cache Configuration
+ROSTER_CACHE_TTL = 600  # Detik, reload penuh tabel employees
+ROSTER_CHECK_INTERVAL = 60  # Detik, cek perubahan (COUNT + MAX(updated_at))
+ROSTER_SYNC_MODE = "full"  # "full" (reload jika berubah) atau "delta" (baris berubah saja, roster besar)
+ROSTER_RECONCILE_INTERVAL = 3600  # Detik, cek checksum penuh untuk menangkap delete (mode delta)
+ROSTER_NEGATIVE_TTL = 30  # Detik, kode tidak dikenal diingat (kartu asing tidak query per tap)
+DAY_STATE_REFRESH_INTERVAL = 300  # Detik, re-warm status absensi hari ini
+
+# Schema Check: "off" (cek tabel saja), "verify" (cek index + EXPLAIN), "migrate" (buat index)
+SCHEMA_CHECK_MODE = "off"
+
+# Offline Journal Configuration (tap dicatat ke SQLite lokal, sync ke MySQL di background)
+JOURNAL_ENABLED = True
+JOURNAL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "attendance_journal.db")
+JOURNAL_SYNC_BATCH = 100  # Baris per multi-row INSERT
+JOURNAL_SYNC_INTERVAL = 5  # Detik antar sync jika tidak ada tap baru
+JOURNAL_FLUSH_MAX_BATCHES = 5  # Batch sync maksimum di dalam request /absen/batch
+
+# Group Commit Configuration (dipakai jika journal nonaktif)
+GROUP_COMMIT_MAX_BATCH = 50  # Baris maksimum per COMMIT
+GROUP_COMMIT_MAX_WAIT = 0.005  # Detik menunggu tap tambahan saat burst
+
+# Atomic Mode: validasi + INSERT di server via fn_absen (1 round-trip, tanpa race)
+# Butuh log_bin_trust_function_creators=1 (atau SUPER) jika binary log MySQL
+# aktif; jika ditolak, mode ini dimatikan saat start (lihat doorlock.atomic_absen)
+ATOMIC_ABSEN_ENABLED = False
+ATOMIC_POOL_SIZE = 2  # Koneksi autocommit khusus mode atomic
+
+# Door-first: pintu dibuka setelah validasi dari cache lokal (roster + state
+# hari ini), log disimpan di background. Hanya aktif saat state cache warm.
+DOOR_FIRST_ENABLED = False
+DEFERRED_MAX_ATTEMPTS = 5  # Percobaan simpan sebelum masuk laporan rekonsiliasi
+DEFERRED_MAX_RETRY_DELAY = 60  # Detik tunggu maksimum antar retry
+DEFERRED_FAILURE_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "absen_gagal.jsonl")
+
+# Debounce & Idempotency (/absen dan tap GUI)
+TAP_DEBOUNCE_WINDOW = 3  # Detik, tap (kode, status) yang sama mendapat response pertama
+IDEMPOTENCY_WINDOW = 600  # Detik, retry dengan Idempotency-Key yang sama aman
+
+# Batch Endpoint (/absen/batch)
+BATCH_MAX_RECORDS = 1000  # Record maksimum per request
+
+# Event stream (/events, Server-Sent Events)
+EVENTS_REPLAY = 50  # Event terakhir untuk klien yang reconnect (Last-Event-ID)
+EVENTS_HEARTBEAT = 15  # Detik antar heartbeat saat tidak ada event
+
+# Instrumentasi latency (/latency, python3 -m doorlock.latency)
+LATENCY_WINDOW = 2048  # Sampel terakhir per metrik untuk p50/p95/p99
+
+# Tracing per request (/traces, header X-Request-ID)
+TRACE_CAPACITY = 500  # Trace terakhir yang disimpan di memori
+TRACE_EXPORT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "traces_lambat.jsonl")
+TRACE_EXPORT_MIN_MS = 500  # Trace selambat ini ikut ditulis ke TRACE_EXPORT_PATH (None = nonaktif)
+
 # GPIO Configuration
+GPIO_BACKEND = "auto"  # "auto" (rpi -> gpiod -> sim), "rpi", "gpiod" atau "sim"
 RELAY_PIN = 2  # GPIO 2 (Physical Pin 3)
 RELAY_ACTIVE_LOW = True  # True jika relay aktif saat LOW
 
@@ -54,11 +136,55 @@ RELAY_ACTIVE_LOW = True  # True jika relay aktif saat LOW
 DEFAULT_DOOR_DELAY = 5  # Detik
 AUTO_LOCK_AFTER_ABSEN = True  # Auto buka pintu setelah absen
 
+# Multi-door: satu entry per pintu/relay (id dipakai di /door/<id>/...)
+DOORS = {
+    "main": {"name": "Pintu Utama", "pin": RELAY_PIN, "active_low": RELAY_ACTIVE_LOW, "delay": DEFAULT_DOOR_DELAY},
+}
+DEFAULT_DOOR_ID = "main"  # Pintu untuk absensi, tombol GUI dan /door/open lama
+
 # API Configuration
 API_TOKEN = "SECURE_KEY_IGASAR"
 FLASK_PORT = 5000
 FLASK_HOST = "0.0.0.0"
 
+# HTTP Server ("waitress" = WSGI produksi, "dev" = Werkzeug app.run lama)
+SERVER_MODE = "waitress"
+SERVER_THREADS = 14  # Worker thread; tiap klien /events memakai satu
+SERVER_CONNECTION_LIMIT = 100  # Koneksi terbuka maksimum
+SERVER_BACKLOG = 64  # Antrean listen() saat semua koneksi terpakai
+SERVER_KEEPALIVE_TIMEOUT = 30  # Detik koneksi keep-alive menganggur
+SERVER_DRAIN_TIMEOUT = 5  # Detik menunggu request berjalan saat shutdown
+
+# Bulkhead: jalur DB (/absen, /absen/batch), /events dan endpoint monitoring
+# dibatasi agar selalu tersisa worker thread untuk perintah pintu walaupun
+# MySQL lambat
+DB_LANE_CONCURRENCY = 3  # Request DB bersamaan
+DB_LANE_QUEUE = 2  # Request DB yang boleh menunggu; selebihnya langsung 503
+DB_LANE_QUEUE_TIMEOUT = 2  # Detik maksimum menunggu slot DB
+EVENTS_MAX_STREAMS = 4  # Koneksi /events bersamaan
+MONITOR_LANE_CONCURRENCY = 2  # /health, /metrics, /latency, /traces, /absen/reconcile
+DOOR_LANE_CONCURRENCY = 3  # Harus <= thread yang tersisa (dicek saat start)
+DOOR_LANE_QUEUE = 10
+DOOR_LANE_QUEUE_TIMEOUT = 1
+
+# Rate limit token bucket per IP dan per token: grup -> (token/detik, burst)
+# PHP backend memanggil /absen untuk semua karyawan dari satu IP, jadi
+# batas absen harus menampung jam sibuk pergantian shift
+RATE_LIMITS = {
+    "door": (1, 5),  # /door/open, /door/lock
+    "door_status": (10, 20),  # /door/status, /doors
+    "absen": (10, 30),
+    "batch": (0.2, 2),  # /absen/batch
+    "events": (0.5, 5),  # koneksi /events baru
+    "monitor": (2, 10)  # /health, /metrics, /latency, /traces, /absen/reconcile
+}
+RATE_LIMIT_IDLE_TTL = 300  # Detik sebelum bucket klien yang menganggur dibuang
+RATE_LIMIT_MAX_CLIENTS = 1000
+# Alamat server PHP/Laravel: punya bucket sendiri dengan batas RATE_LIMIT_BACKEND_FACTOR
+# kali lipat, sehingga klien lain yang memakai token yang sama tidak bisa menghabiskannya
+RATE_LIMIT_BACKEND_ADDRS = ()  # mis. ("192.168.1.10",)
+RATE_LIMIT_BACKEND_FACTOR = 5
+
 # Status Mapping (GUI format -> Database ENUM)
 STATUS_MAPPING = {
     "Masuk": "masuk",
@@ -71,9 +197,8 @@ STATUS_MAPPING = {
 # DATABASE CONNECTION
 # =============================================================================
 
-def connect_db():
+def connect_db(max_retries=DB_CONNECT_RETRIES):
     """Buat koneksi ke database dengan retry"""
-    max_retries = 3
     retry_delay = 2
     
     for attempt in range(max_retries):
@@ -89,158 +214,436 @@ def connect_db():
     
     raise Exception("Gagal koneksi ke database setelah beberapa percobaan")
 
-# Global database connection
-db_conn = None
-db_cursor = None
+# Breaker bersama untuk semua pool ke host MySQL yang sama
+db_breaker = CircuitBreaker(
+    "mysql",
+    failure_threshold=DB_CIRCUIT_FAILURE_THRESHOLD,
+    reset_timeout=DB_CIRCUIT_RESET_TIMEOUT
+)
+
+# Connection pool bersama (thread Flask + thread GUI)
+db_pool = ConnectionPool(
+    connect_db,
+    max_size=DB_POOL_SIZE,
+    idle_timeout=DB_POOL_IDLE_TIMEOUT,
+    acquire_timeout=DB_POOL_ACQUIRE_TIMEOUT,
+    min_idle=DB_POOL_MIN_IDLE,
+    keepalive_interval=DB_KEEPALIVE_INTERVAL,
+    max_lifetime=DB_MAX_LIFETIME,
+    breaker=db_breaker
+)
+
+def connect_db_autocommit():
+    """Koneksi autocommit untuk fn_absen (commit implisit per statement)"""
+    conn = connect_db()
+    conn.autocommit = True
+    return conn
 
-def init_db():
-    """Inisialisasi database connection dan verifikasi tabel"""
-    global db_conn, db_cursor
+# Pool terpisah untuk mode atomic agar setting autocommit tidak bercampur
+atomic_pool = ConnectionPool(
+    connect_db_autocommit,
+    max_size=ATOMIC_POOL_SIZE,
+    idle_timeout=DB_POOL_IDLE_TIMEOUT,
+    acquire_timeout=DB_POOL_ACQUIRE_TIMEOUT,
+    min_idle=DB_POOL_MIN_IDLE,
+    keepalive_interval=DB_KEEPALIVE_INTERVAL,
+    max_lifetime=DB_MAX_LIFETIME,
+    breaker=db_breaker
+)
+
+# Cache roster karyawan (lookup kode tanpa query ke database)
+roster = RosterCache(
+    db_pool,
+    ttl=ROSTER_CACHE_TTL,
+    check_interval=ROSTER_CHECK_INTERVAL,
+    mode=ROSTER_SYNC_MODE,
+    reconcile_interval=ROSTER_RECONCILE_INTERVAL,
+    negative_ttl=ROSTER_NEGATIVE_TTL
+)
+
+# Cache status absensi terakhir hari ini per karyawan (validasi tanpa query)
+day_state = DailyStateCache(db_pool, refresh_interval=DAY_STATE_REFRESH_INTERVAL)
+
+def init_db(schema_mode=None):
+    """
+    Inisialisasi database connection dan verifikasi tabel
     
+    Args:
+        schema_mode: "off" | "verify" | "migrate" (default: SCHEMA_CHECK_MODE)
+    """
     try:
-        db_conn = connect_db()
-        db_cursor = db_conn.cursor(dictionary=True)
-        
-        # Verifikasi tabel employees
-        db_cursor.execute("SHOW TABLES LIKE 'employees'")
-        if not db_cursor.fetchone():
-            raise Exception("Tabel 'employees' tidak ditemukan!")
-        
-        # Verifikasi tabel attendance_logs
-        db_cursor.execute("SHOW TABLES LIKE 'attendance_logs'")
-        if not db_cursor.fetchone():
-            raise Exception("Tabel 'attendance_logs' tidak ditemukan!")
+        with db_pool.connection() as conn:
+            # Verifikasi tabel employees & attendance_logs (+ index jika diminta)
+            report = check_schema(conn, schema_mode or SCHEMA_CHECK_MODE)
+            
+            # Install/perbarui fn_absen untuk mode atomic
+            if ATOMIC_ABSEN_ENABLED:
+                pasang_fn_absen(conn)
         
         print("✓ Tabel database terverifikasi: employees, attendance_logs")
+        print_report(report)
         
     except Error as e:
         print(f"✗ Database initialization error: {e}")
         raise
 
+def pasang_fn_absen(conn):
+    """Install fn_absen; matikan mode atomic jika server menolak"""
+    global atomic_aktif
+    try:
+        if atomic_absen.install(conn):
+            print(f"✓ Function {atomic_absen.FUNCTION_NAME} terpasang")
+    except atomic_absen.FunctionNotAllowed as e:
+        atomic_aktif = False
+        print(f"⚠ Function {atomic_absen.FUNCTION_NAME} ditolak server ({e})")
+        print("⚠ Mode atomic dimatikan, memakai validasi dua langkah. Aktifkan dengan "
+              "log_bin_trust_function_creators=1 di server MySQL")
+
+# Writer group-commit untuk INSERT langsung ke MySQL
+attendance_writer = GroupCommitWriter(
+    db_pool,
+    max_batch=GROUP_COMMIT_MAX_BATCH,
+    max_wait=GROUP_COMMIT_MAX_WAIT
+)
+
+# Journal lokal + syncer (diinisialisasi oleh init_journal)
+journal = None
+journal_syncer = None
+
+# False jika fn_absen tidak bisa dipasang (init_db); alur dua langkah dipakai
+atomic_aktif = ATOMIC_ABSEN_ENABLED
+
+def start_keepalive():
+    """Buka koneksi awal dan jaga tetap hangat di background"""
+    pools = [db_pool, atomic_pool] if atomic_aktif else [db_pool]
+    for pool in pools:
+        pool.prefill()
+        pool.start_keepalive()
+    print(f"✓ Keep-alive database: ping tiap {DB_KEEPALIVE_INTERVAL}s, "
+          f"min {DB_POOL_MIN_IDLE} koneksi siap")
+
+def init_journal():
+    """Buka journal SQLite lokal dan jalankan syncer ke MySQL"""
+    global journal, journal_syncer
+    
+    if not JOURNAL_ENABLED:
+        return
+    
+    journal = AttendanceJournal(JOURNAL_PATH)
+    journal_syncer = JournalSyncer(
+        journal,
+        db_pool,
+        batch_size=JOURNAL_SYNC_BATCH,
+        interval=JOURNAL_SYNC_INTERVAL
+    )
+    journal_syncer.start()
+    # Sinkronkan sisa tap dari sesi sebelumnya
+    journal_syncer.notify()
+    
+    stats = journal.stats()
+    print(f"✓ Journal lokal: {JOURNAL_PATH} ({stats['pending']} pending)")
+
 # =============================================================================
 # GPIO CONTROL
 # =============================================================================
 
+# Backend dipilih saat startup; simulator mencatat timeline edge relay
+try:
+    gpio = create_backend(GPIO_BACKEND)
+except (ImportError, OSError, RuntimeError, ValueError) as e:
+    print(f"⚠ Backend GPIO '{GPIO_BACKEND}' tidak tersedia: {e}")
+    gpio = SimulatedBackend()
+if isinstance(gpio, SimulatedBackend):
+    # set_relay sudah mencetak status relay sendiri
+    gpio.verbose = False
+GPIO_AVAILABLE = gpio.hardware
+if GPIO_AVAILABLE:
+    print(f"✓ GPIO backend: {gpio.name}")
+else:
+    print("⚠ Menggunakan mode SIMULASI")
+
 def init_gpio():
     """Inisialisasi GPIO untuk relay doorlock"""
-    if not GPIO_AVAILABLE:
-        print("⚠ GPIO tidak tersedia - Mode SIMULASI aktif")
-        return False
-    
     try:
-        GPIO.setmode(GPIO.BCM)
-        GPIO.setwarnings(False)
-        GPIO.setup(RELAY_PIN, GPIO.OUT)
-        
-        # Set initial state (locked)
-        if RELAY_ACTIVE_LOW:
-            GPIO.output(RELAY_PIN, GPIO.HIGH)  # HIGH = OFF (locked)
-        else:
-            GPIO.output(RELAY_PIN, GPIO.LOW)
-        
-        print(f"✓ GPIO initialized: Pin {RELAY_PIN} (Active {'LOW' if RELAY_ACTIVE_LOW else 'HIGH'})")
-        return True
-        
+        for door in doors:
+            # Set initial state (locked): Active LOW -> HIGH = OFF
+            gpio.setup_output(door.pin, door.active_low)
+            if GPIO_AVAILABLE:
+                print(f"✓ GPIO initialized: {door.name} Pin {door.pin} (Active {'LOW' if door.active_low else 'HIGH'})")
     except Exception as e:
         print(f"✗ GPIO initialization error: {e}")
         return False
 
-def set_relay(active: bool):
-    """Kontrol relay doorlock"""
     if not GPIO_AVAILABLE:
-        status = "ACTIVE" if active else "INACTIVE"
-        print(f"[SIMULASI] Relay {status}")
-        return
-    
+        print("⚠ GPIO tidak tersedia - Mode SIMULASI aktif")
+        return False
+    return True
+
+def set_relay(active: bool, pin=RELAY_PIN, active_low=RELAY_ACTIVE_LOW):
+    """Kontrol relay doorlock"""
     try:
-        if RELAY_ACTIVE_LOW:
-            # Active LOW: LOW = ON (unlocked), HIGH = OFF (locked)
-            GPIO.output(RELAY_PIN, GPIO.LOW if active else GPIO.HIGH)
-        else:
-            # Active HIGH: HIGH = ON (unlocked), LOW = OFF (locked)
-            GPIO.output(RELAY_PIN, GPIO.HIGH if active else GPIO.LOW)
-        
-        status = "UNLOCKED" if active else "LOCKED"
-        print(f"✓ Doorlock {status} (GPIO {RELAY_PIN})")
-        
+        # Active LOW: LOW = ON (unlocked), HIGH = OFF (locked)
+        gpio.write(pin, active != active_low)
     except Exception as e:
         print(f"✗ Relay control error: {e}")
+        return
+
+    if not GPIO_AVAILABLE:
+        status = "ACTIVE" if active else "INACTIVE"
+        print(f"[SIMULASI] Relay {status} (GPIO {pin})")
+    else:
+        status = "UNLOCKED" if active else "LOCKED"
+        print(f"✓ Doorlock {status} (GPIO {pin})")
 
 def cleanup_gpio():
     """Cleanup GPIO saat program selesai"""
-    if GPIO_AVAILABLE:
-        try:
-            GPIO.cleanup()
+    try:
+        gpio.cleanup()
+        if GPIO_AVAILABLE:
             print("✓ GPIO cleanup completed")
-        except Exception as e:
-            print(f"⚠ GPIO cleanup error: {e}")
+    except Exception as e:
+        print(f"⚠ GPIO cleanup error: {e}")
 
 # =============================================================================
 # DOORLOCK LOGIC
 # =============================================================================
 
-class DoorlockController:
-    """Controller untuk doorlock dengan timer otomatis"""
+def make_relay(pin, active_low):
+    """Relay untuk satu pintu (dipanggil hanya dari thread scheduler)"""
+    return lambda active: set_relay(active, pin, active_low)
+
+# Timing request -> validasi -> edge GPIO -> relock
+latency = LatencyRecorder(LATENCY_WINDOW)
+
+# Span per tahap tap (correlation ID dari PHP / klien)
+tracer = Tracer(
+    TRACE_CAPACITY,
+    export_path=TRACE_EXPORT_PATH if TRACE_EXPORT_MIN_MS is not None else None,
+    export_min_ms=TRACE_EXPORT_MIN_MS or 0
+)
+
+# Satu thread untuk semua transisi relay & deadline relock semua pintu
+door_scheduler = DoorScheduler(latency=latency, tracer=tracer)
+
+# Transisi pintu & hasil absensi untuk /events dan GUI (tanpa polling)
+events = EventBus(EVENTS_REPLAY)
+
+doors = DoorRegistry(
+    door_scheduler,
+    make_relay,
+    gpio_mode="HARDWARE" if GPIO_AVAILABLE else "SIMULATED",
+    events=events
+).configure(DOORS)
+
+# Pintu default (absensi, tombol GUI, endpoint /door/... tanpa id)
+doorlock = doors.get(DEFAULT_DOOR_ID)
+
+# Metrik untuk scrape Prometheus (/metrics); nilai komponen lain dibaca saat scrape
+metrics = MetricsRegistry("doorlock_")
+http_requests = metrics.counter(
+    "http_requests_total", "Request HTTP per route, method dan status", ("route", "method", "status"))
+http_duration = metrics.histogram(
+    "http_request_duration_seconds", "Durasi request HTTP per route", ("route",))
+absen_results = metrics.counter(
+    "absen_results_total", "Hasil proses absensi (success/info/error)", ("result",))
+absen_duration = metrics.histogram(
+    "absen_duration_seconds", "Durasi proses_absensi (validasi + simpan + buka pintu)")
+db_query_duration = metrics.histogram(
+    "db_query_duration_seconds", "Durasi query MySQL termasuk menunggu koneksi pool", ("query",))
+door_transitions = metrics.counter(
+    "door_relay_transitions_total", "Perubahan relay pintu", ("door", "state"))
+
+def catat_transisi_pintu(event):
+    """Listener event "door" (thread scheduler) -> counter relay"""
+    state = "locked" if event.data["is_locked"] else "open"
+    door_transitions.inc(door=event.data["door_id"], state=state)
+
+events.listen(catat_transisi_pintu, types=["door"])
+
+# =============================================================================
+# ABSENSI LOGIC
+# =============================================================================
+
+def get_last_log_today(employee_id, sekarang):
+    """Ambil log terakhir karyawan hari ini langsung dari database"""
+    # Predicate range (bukan DATE(event_time)) agar index (employee_id, event_time) terpakai
+    awal_hari, awal_besok = day_bounds(sekarang.date())
     
-    def __init__(self):
-        self.is_locked = True
-        self.timer_thread = None
-        self.lock_timer = None
-        
-    def unlock(self, delay_seconds=DEFAULT_DOOR_DELAY):
-        """Buka pintu dengan timer otomatis"""
-        if not self.is_locked:
-            print("⚠ Pintu sudah terbuka")
-            return False
-        
-        # Buka pintu
-        set_relay(True)
-        self.is_locked = False
-        print(f"🔓 Pintu DIBUKA (akan terkunci otomatis dalam {delay_seconds} detik)")
-        
-        # Cancel timer lama jika ada
-        if self.lock_timer:
-            self.lock_timer.cancel()
-        
-        # Set timer untuk kunci otomatis
-        self.lock_timer = threading.Timer(delay_seconds, self._auto_lock)
-        self.lock_timer.start()
-        
-        return True
+    with db_query_duration.time(query="last_log"), db_pool.connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(LAST_LOG_QUERY, (employee_id, awal_hari, awal_besok))
+            return cursor.fetchone()
+        finally:
+            cursor.close()
+
+def log_sudah_ada(employee_id, status_db, event_time):
+    """Cek log yang persis sama (retry setelah commit yang mungkin sudah masuk)"""
+    with db_query_duration.time(query="log_exists"), db_pool.connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                "SELECT 1 FROM attendance_logs "
+                "WHERE employee_id = %s AND status = %s AND event_time = %s LIMIT 1",
+                (employee_id, status_db, event_time)
+            )
+            return cursor.fetchone() is not None
+        finally:
+            cursor.close()
+
+def simpan_log_tertunda(employee_id, status_db, event_time, retry):
+    """Simpan log mode door-first (dipanggil dari thread DeferredWriter)"""
+    if journal:
+        # Journal lokal; sync ke MySQL (dan retry-nya) diurus JournalSyncer
+        journal.append(employee_id, status_db, event_time)
+        journal_syncer.notify()
+        return
+    if retry and log_sudah_ada(employee_id, status_db, event_time):
+        return
+    with db_query_duration.time(query="insert"):
+        attendance_writer.submit(employee_id, status_db, event_time)
+
+deferred_writer = DeferredWriter(
+    simpan_log_tertunda,
+    max_attempts=DEFERRED_MAX_ATTEMPTS,
+    max_delay=DEFERRED_MAX_RETRY_DELAY,
+    failure_log=DEFERRED_FAILURE_LOG
+)
+
+def absensi_berhasil(employee_id, employee_name, kode, status_absen, status_db, sekarang):
+    """Log sukses, buka pintu (jika enabled) dan susun response"""
+    print(f"✓ Absensi tersimpan: {employee_name} - {status_absen} ({sekarang.strftime('%Y-%m-%d %H:%M:%S')})")
     
-    def _auto_lock(self):
-        """Kunci pintu otomatis (dipanggil oleh timer)"""
-        self.lock()
-        print("🔒 Pintu TERKUNCI otomatis")
+    # 5. TRIGGER DOORLOCK (jika enabled)
+    door_opened = False
+    if AUTO_LOCK_AFTER_ABSEN:
+        with tracer.span("door.unlock", door=doorlock.door_id):
+            door_opened = doorlock.unlock(DEFAULT_DOOR_DELAY) is not None
     
-    def lock(self):
-        """Kunci pintu manual"""
-        if self.is_locked:
-            return False
-        
-        set_relay(False)
-        self.is_locked = True
-        
-        if self.lock_timer:
-            self.lock_timer.cancel()
-            self.lock_timer = None
-        
-        return True
+    return {
+        "status": "success",
+        "message": f"Berhasil! {employee_name} absen {status_absen.lower()}.",
+        "data": {
+            "employee_id": employee_id,
+            "employee_name": employee_name,
+            "employee_code": kode,
+            "status": status_db,
+            "event_time": sekarang.strftime('%Y-%m-%d %H:%M:%S'),
+            "door_opened": door_opened
+        }
+    }
+
+def proses_absensi_atomic(kode: str, status_absen: str, status_db: str):
+    """
+    Validasi + INSERT di server (fn_absen) dalam satu round-trip
+    
+    Aturan urutan sama dengan proses_absensi, tetapi dijalankan oleh MySQL
+    dengan row lock per karyawan sehingga tap bersamaan tidak bisa lolos dua kali.
+    """
+    sekarang = datetime.now().replace(microsecond=0)
+    
+    try:
+        with tracer.span("absen.atomic"), db_query_duration.time(query="atomic"), \
+                atomic_pool.connection() as conn:
+            hasil = atomic_absen.absen_atomic(conn, kode, status_db, sekarang)
+        # Validasi & INSERT terjadi dalam satu round-trip
+        latency.mark("validated")
+    except Error as e:
+        print(f"✗ Database error: {e}")
+        return {
+            "status": "error",
+            "message": f"Database error: {str(e)}"
+        }
+    except Exception as e:
+        print(f"✗ Unexpected error: {e}")
+        return {
+            "status": "error",
+            "message": f"System error: {str(e)}"
+        }
     
-    def get_status(self):
-        """Ambil status pintu"""
+    outcome = hasil["outcome"]
+    employee_name = hasil["employee_name"]
+    
+    if outcome == "not_found":
+        return {
+            "status": "error",
+            "message": f"Kode karyawan {kode} tidak ditemukan"
+        }
+    if outcome == "inactive":
+        return {
+            "status": "error",
+            "message": f"{employee_name} sudah tidak aktif"
+        }
+    if outcome == "duplicate":
+        return {
+            "status": "info",
+            "message": f"{employee_name} sudah absen {status_absen.lower()} hari ini.",
+            "data": {
+                "employee": employee_name,
+                "last_time": hasil["last_time"]
+            }
+        }
+    if outcome == "already_out":
         return {
-            "is_locked": self.is_locked,
-            "status": "TERKUNCI" if self.is_locked else "TERBUKA",
-            "gpio_mode": "HARDWARE" if GPIO_AVAILABLE else "SIMULATED"
+            "status": "error",
+            "message": f"{employee_name} sudah pulang hari ini, tidak bisa absen masuk lagi."
         }
+    
+    day_state.record(hasil["employee_id"], status_db, sekarang)
+    return absensi_berhasil(hasil["employee_id"], employee_name, kode, status_absen, status_db, sekarang)
 
-# Global doorlock instance
-doorlock = DoorlockController()
+# Response pertama per tap / per idempotency key (tanpa query ke MySQL)
+tap_cache = ResponseCache(TAP_DEBOUNCE_WINDOW)
+idempotency_cache = ResponseCache(IDEMPOTENCY_WINDOW)
 
-# =============================================================================
-# ABSENSI LOGIC
-# =============================================================================
+def _response_final(result):
+    # Error (mis. database tidak terjangkau) boleh dicoba ulang
+    return result["status"] in ("success", "info")
+
+def proses_absensi_sekali(kode: str, status_absen: str, idempotency_key=None):
+    """
+    proses_absensi dengan debounce tap dan idempotency key
+    
+    Returns:
+        (result, cached) - cached True jika response diambil dari cache
+    """
+    def proses():
+        result, cached = tap_cache.run(
+            (kode, status_absen),
+            lambda: proses_absensi_publish(kode, status_absen),
+            cacheable=_response_final
+        )
+        tracer.annotate(debounced=cached)
+        return result, cached
+    
+    if not idempotency_key:
+        return proses()
+    
+    (result, _), cached = idempotency_cache.run(
+        (idempotency_key, kode, status_absen),
+        proses,
+        cacheable=lambda hasil: _response_final(hasil[0])
+    )
+    tracer.annotate(idempotent_replay=cached)
+    return result, cached
+
+def proses_absensi_publish(kode: str, status_absen: str):
+    """proses_absensi + publikasi hasilnya sebagai event "absen" (bukan replay cache)"""
+    with absen_duration.time():
+        result = proses_absensi(kode, status_absen)
+    absen_results.inc(result=result["status"])
+    # Kode karyawan tidak ikut disimpan di trace; cari lewat trace_id event "absen"
+    tracer.annotate(result=result["status"])
+    current = tracer.current()
+    events.publish("absen", {
+        "kode": kode,
+        "status_absen": status_absen,
+        "result": result["status"],
+        "message": result["message"],
+        "data": result.get("data"),
+        "trace_id": current.trace_id if current else None
+    })
+    return result
 
 def proses_absensi(kode: str, status_absen: str):
     """
@@ -253,28 +656,26 @@ def proses_absensi(kode: str, status_absen: str):
     Returns:
         dict: {"status": "success/error/info", "message": "...", "data": {...}}
     """
-    global db_conn, db_cursor
+    # Convert status GUI ke database ENUM
+    status_db = STATUS_MAPPING.get(status_absen)
+    if not status_db:
+        return {
+            "status": "error",
+            "message": f"Status tidak valid: {status_absen}"
+        }
+    
+    # Door-first hanya jika state hari ini bisa diputuskan tanpa query
+    door_first = DOOR_FIRST_ENABLED and day_state.is_warm()
+    
+    # Saat sirkuit terbuka, jalur atomic (butuh MySQL) dilewati: validasi dari
+    # cache dan simpan ke journal lokal
+    if atomic_aktif and not door_first and not (journal and db_breaker.state == OPEN):
+        return proses_absensi_atomic(kode, status_absen, status_db)
     
     try:
-        # Reconnect jika koneksi hilang
-        if not db_conn or not db_conn.is_connected():
-            print("⚠ Database reconnecting...")
-            init_db()
-        
-        # Convert status GUI ke database ENUM
-        status_db = STATUS_MAPPING.get(status_absen)
-        if not status_db:
-            return {
-                "status": "error",
-                "message": f"Status tidak valid: {status_absen}"
-            }
-        
-        # 1. VALIDASI EMPLOYEE
-        db_cursor.execute(
-            "SELECT id, code, name, is_active FROM employees WHERE code = %s",
-            (kode,)
-        )
-        employee = db_cursor.fetchone()
+        # 1. VALIDASI EMPLOYEE (dari roster cache)
+        with tracer.span("absen.employee"):
+            employee = roster.get(kode)
         
         if not employee:
             return {
@@ -292,20 +693,24 @@ def proses_absensi(kode: str, status_absen: str):
         employee_id = employee["id"]
         employee_name = employee["name"]
         
-        # 2. CEK LOG HARI INI
-        sekarang = datetime.now()
-        hari_ini = sekarang.strftime('%Y-%m-%d')
+        # 2. CEK LOG HARI INI (dari state cache, query hanya jika cache belum warm)
+        # Presisi detik, sama dengan kolom DATETIME di MySQL
+        sekarang = datetime.now().replace(microsecond=0)
         
-        db_cursor.execute("""
-            SELECT status, event_time 
-            FROM attendance_logs 
-            WHERE employee_id = %s 
-              AND DATE(event_time) = %s
-            ORDER BY event_time DESC 
-            LIMIT 1
-        """, (employee_id, hari_ini))
-        
-        last_log = db_cursor.fetchone()
+        with tracer.span("absen.last_log") as span:
+            if day_state.is_warm():
+                span["source"] = "cache"
+                last_log = day_state.get(employee_id)
+            else:
+                try:
+                    span["source"] = "mysql"
+                    last_log = get_last_log_today(employee_id, sekarang)
+                except Exception:
+                    if not journal:
+                        raise
+                    # Database tidak terjangkau: pakai tap terakhir di journal lokal
+                    span["source"] = "journal"
+                    last_log = journal.last_today(employee_id, sekarang.date())
         
         # 3. VALIDASI DUPLIKASI
         if last_log:
@@ -329,40 +734,58 @@ def proses_absensi(kode: str, status_absen: str):
                     "message": f"{employee_name} sudah pulang hari ini, tidak bisa absen masuk lagi."
                 }
         
-        # 4. INSERT LOG BARU
-        db_cursor.execute(
-            "INSERT INTO attendance_logs (employee_id, status, event_time) VALUES (%s, %s, %s)",
-            (employee_id, status_db, sekarang)
-        )
-        db_conn.commit()
+        latency.mark("validated")
         
-        print(f"✓ Absensi tersimpan: {employee_name} - {status_absen} ({sekarang.strftime('%Y-%m-%d %H:%M:%S')})")
+        # 4. SIMPAN LOG BARU
+        if door_first:
+            # Pintu dibuka tanpa menunggu MySQL; state dicatat sekarang agar tap
+            # berikutnya langsung tervalidasi. Log diantrekan (tidak blocking)
+            # sebelum unlock, sehingga state tidak pernah tercatat tanpa log
+            # walaupun unlock gagal
+            day_state.record(employee_id, status_db, sekarang)
+            with tracer.span("absen.persist", mode="deferred"):
+                deferred_writer.submit(employee_id, status_db, sekarang)
+            hasil = absensi_berhasil(employee_id, employee_name, kode, status_absen, status_db, sekarang)
+            hasil["data"]["persistence"] = "deferred"
+            return hasil
         
-        # 5. TRIGGER DOORLOCK (jika enabled)
-        door_opened = False
-        if AUTO_LOCK_AFTER_ABSEN:
-            door_opened = doorlock.unlock(DEFAULT_DOOR_DELAY)
+        if journal:
+            # Offline-first: commit ke journal lokal, MySQL disinkron di background
+            with tracer.span("absen.persist", mode="journal"):
+                journal.append(employee_id, status_db, sekarang)
+            journal_syncer.notify()
+        else:
+            # Digabung dengan tap lain yang bersamaan dalam satu COMMIT
+            with tracer.span("absen.persist", mode="group_commit"), \
+                    db_query_duration.time(query="insert"):
+                attendance_writer.submit(employee_id, status_db, sekarang)
+        
+        latency.mark("persisted")
+        
+        # Write-through ke state cache setelah commit berhasil
+        day_state.record(employee_id, status_db, sekarang)
+        
+        return absensi_berhasil(employee_id, employee_name, kode, status_absen, status_db, sekarang)
         
+    except CircuitOpen as e:
+        print(f"⚠ {e}")
         return {
-            "status": "success",
-            "message": f"Berhasil! {employee_name} absen {status_absen.lower()}.",
-            "data": {
-                "employee_id": employee_id,
-                "employee_name": employee_name,
-                "employee_code": kode,
-                "status": status_db,
-                "event_time": sekarang.strftime('%Y-%m-%d %H:%M:%S'),
-                "door_opened": door_opened
-            }
+            "status": "error",
+            "message": "Database sedang tidak tersedia, coba lagi nanti"
         }
-        
     except Error as e:
-        db_conn.rollback()
+        # Rollback sudah dilakukan oleh pool
         print(f"✗ Database error: {e}")
         return {
             "status": "error",
             "message": f"Database error: {str(e)}"
         }
+    except WriteFailed as e:
+        print(f"✗ {e}")
+        return {
+            "status": "error",
+            "message": f"Database error: {e.__cause__}"
+        }
     except Exception as e:
         print(f"✗ Unexpected error: {e}")
         return {
@@ -377,85 +800,448 @@ def proses_absensi(kode: str, status_absen: str):
 app = Flask(__name__)
 CORS(app)
 
+# Jalur eksekusi terpisah (lihat doorlock.bulkhead)
+db_lane = Bulkhead("db", DB_LANE_CONCURRENCY, DB_LANE_QUEUE, DB_LANE_QUEUE_TIMEOUT)
+events_lane = Bulkhead("events", EVENTS_MAX_STREAMS)
+door_lane = Bulkhead("door", DOOR_LANE_CONCURRENCY, DOOR_LANE_QUEUE, DOOR_LANE_QUEUE_TIMEOUT)
+monitor_lane = Bulkhead("monitor", MONITOR_LANE_CONCURRENCY)
+
+rate_limiters = {
+    group: TokenBucketLimiter(rate, burst, RATE_LIMIT_IDLE_TTL, RATE_LIMIT_MAX_CLIENTS)
+    for group, (rate, burst) in RATE_LIMITS.items()
+}
+# Grup "<grup>@backend" hanya dipakai request dari RATE_LIMIT_BACKEND_ADDRS
+rate_limiters.update({
+    f"{group}@backend": TokenBucketLimiter(
+        rate * RATE_LIMIT_BACKEND_FACTOR, burst * RATE_LIMIT_BACKEND_FACTOR,
+        RATE_LIMIT_IDLE_TTL, RATE_LIMIT_MAX_CLIENTS
+    )
+    for group, (rate, burst) in RATE_LIMITS.items()
+})
+
+def rate_limited(group):
+    """Tolak (429) klien yang melebihi batas grup, sebelum masuk bulkhead"""
+    client_limiter = rate_limiters[group]
+    backend_limiter = rate_limiters[f"{group}@backend"]
+    
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            address = request.remote_addr
+            data = request.get_json(silent=True) if request.is_json else None
+            token = (data.get('token') if isinstance(data, dict) else None) \
+                or request.headers.get('X-API-Token')
+            # Token API dipakai bersama (PHP, kiosk, skrip): bucket token per
+            # pasangan token/IP agar satu klien tidak menghabiskan jatah klien lain.
+            # Token salah masuk bucket IP supaya tidak bisa dipakai untuk bucket baru
+            if token and verify_token(token):
+                keys = [f"token:{token}@{address}"]
+            else:
+                keys = [f"ip:{address}"]
+            
+            limiter = backend_limiter if address in RATE_LIMIT_BACKEND_ADDRS else client_limiter
+            allowed, retry_after = limiter.allow(keys)
+            if not allowed:
+                response = jsonify({
+                    "status": "error",
+                    "message": "Terlalu banyak request, coba lagi nanti"
+                })
+                response.headers['Retry-After'] = retry_after_header(retry_after)
+                return response, 429
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+@app.before_request
+def mulai_timer_request():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def catat_metrik_request(response):
+    # Route pola (/door/<door_id>/open), bukan path mentah, agar label tidak meledak
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    http_requests.inc(route=route, method=request.method, status=response.status_code)
+    start = g.get("request_start")
+    if start is not None:
+        http_duration.observe(time.perf_counter() - start, route=route)
+    return response
+
+def _lane_stats(key):
+    lanes = (("db", db_lane), ("door", door_lane), ("events", events_lane), ("monitor", monitor_lane))
+    return lambda: [({"lane": name}, bulkhead.stats()[key]) for name, bulkhead in lanes]
+
+metrics.callback("db_pool_connections_in_use", "Koneksi pool yang sedang dipinjam",
+                 lambda: db_pool.stats()["in_use"])
+metrics.callback("db_pool_connections_idle", "Koneksi pool yang menganggur",
+                 lambda: db_pool.stats()["idle"])
+metrics.callback("db_pool_connections_max", "Ukuran maksimum pool",
+                 lambda: db_pool.stats()["max_size"])
+metrics.callback("db_circuit_open", "1 jika circuit breaker MySQL terbuka",
+                 lambda: db_breaker.state == OPEN)
+metrics.callback("db_circuit_trips_total", "Berapa kali circuit breaker MySQL terbuka",
+                 lambda: db_breaker.stats()["trips"], type="counter")
+metrics.callback("db_writer_queue", "Log yang menunggu group commit",
+                 lambda: attendance_writer.stats()["queued"])
+metrics.callback("lane_active", "Request yang berjalan per bulkhead", _lane_stats("active"), ("lane",))
+metrics.callback("lane_waiting", "Request yang menunggu slot per bulkhead", _lane_stats("waiting"), ("lane",))
+metrics.callback("lane_rejected_total", "Request yang ditolak bulkhead (503)",
+                 _lane_stats("rejected"), ("lane",), type="counter")
+metrics.callback("rate_limit_rejected_total", "Request yang ditolak rate limiter (429)",
+                 lambda: [({"group": group}, limiter.stats()["rejected"])
+                          for group, limiter in rate_limiters.items()],
+                 ("group",), type="counter")
+metrics.callback("dedupe_hits_total", "Response yang diambil dari cache debounce/idempotency",
+                 lambda: [({"cache": "tap"}, tap_cache.stats()["hits"]),
+                          ({"cache": "idempotency"}, idempotency_cache.stats()["hits"])],
+                 ("cache",), type="counter")
+metrics.callback("door_open", "1 jika pintu sedang terbuka",
+                 lambda: [({"door": door_id}, not status["is_locked"])
+                          for door_id, status in doors.status_all().items()],
+                 ("door",))
+metrics.callback("events_subscribers", "Klien /events yang terhubung",
+                 lambda: events.stats()["subscribers"])
+metrics.callback("http_in_flight", "Request yang sedang dilayani server",
+                 lambda: http_server.stats()["in_flight"] if http_server else 0)
+
+def traced(name):
+    """Satu trace per request; ID dari X-Request-ID (atau baru) dikembalikan di response"""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            with tracer.trace(
+                name,
+                trace_id=correlation_id(request.headers),
+                method=request.method,
+                path=request.path,
+                remote_addr=request.remote_addr
+            ) as current:
+                with tracer.span("http.parse_json"):
+                    request.get_json(silent=True)
+                response = app.make_response(view(*args, **kwargs))
+                current.attrs["status"] = response.status_code
+            response.headers['X-Request-ID'] = current.trace_id
+            return response
+        return wrapper
+    return decorator
+
+def lane_full_response(e):
+    response = jsonify({
+        "status": "error",
+        "message": "Server sibuk, coba lagi sebentar",
+        "lane": e.name
+    })
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response, 503
+
+def lane(bulkhead):
+    """Jalankan view di dalam slot bulkhead; 503 cepat jika jalur penuh"""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                with tracer.span(f"lane.{bulkhead.name}"):
+                    bulkhead.acquire()
+            except BulkheadFull as e:
+                return lane_full_response(e)
+            try:
+                return view(*args, **kwargs)
+            finally:
+                bulkhead.release()
+        return wrapper
+    return decorator
+
 def verify_token(token):
     """Verifikasi API token"""
     return token == API_TOKEN
 
 @app.route('/', methods=['GET'])
+@rate_limited("monitor")
+@lane(monitor_lane)
 def index():
     """API Info"""
     return jsonify({
         "name": "Doorlock + Absensi API",
         "version": "3.0",
         "features": ["doorlock", "attendance", "auto-lock"],
-        "endpoints": ["/health", "/door/open", "/door/lock", "/door/status", "/absen"]
+        "endpoints": ["/health", "/door/open", "/door/lock", "/door/status",
+                      "/door/<id>/open", "/door/<id>/lock", "/door/<id>/status", "/doors",
+                      "/absen", "/absen/batch", "/absen/reconcile", "/events", "/latency",
+                      "/metrics", "/traces", "/traces/export"]
     })
 
 @app.route('/health', methods=['GET'])
+@rate_limited("monitor")
+@lane(monitor_lane)
 def health_check():
     """Health check endpoint"""
-    db_status = "AVAILABLE" if (db_conn and db_conn.is_connected()) else "UNAVAILABLE"
+    # Tanpa ping: status dari breaker (diperbarui oleh query & keep-alive),
+    # agar polling monitoring tidak tertahan saat MySQL lambat
+    db_status = "UNAVAILABLE" if db_breaker.state == OPEN else "AVAILABLE"
     
     return jsonify({
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
         "gpio_mode": "HARDWARE" if GPIO_AVAILABLE else "SIMULATED",
+        "gpio_backend": gpio.name,
         "mysql": db_status,
-        "doorlock": doorlock.get_status()
+        "mysql_pool": db_pool.stats(),
+        "mysql_circuit": db_breaker.stats(),
+        "roster": roster.stats(),
+        "day_state": day_state.stats(),
+        "journal": journal_syncer.stats() if journal_syncer else "DISABLED",
+        "writer": attendance_writer.stats(),
+        "deferred": deferred_writer.stats() if DOOR_FIRST_ENABLED else "DISABLED",
+        "dedupe": {
+            "tap": tap_cache.stats(),
+            "idempotency": idempotency_cache.stats()
+        },
+        "events": events.stats(),
+        "tracing": tracer.stats(),
+        "server": http_server.stats() if http_server else None,
+        "rate_limit": {group: limiter.stats() for group, limiter in rate_limiters.items()},
+        "lanes": {
+            "db": db_lane.stats(),
+            "door": door_lane.stats(),
+            "events": events_lane.stats(),
+            "monitor": monitor_lane.stats()
+        },
+        "doorlock": doorlock.get_status(),
+        "doors": doors.status_all()
     })
 
-@app.route('/door/open', methods=['POST'])
-def api_door_open():
-    """Buka pintu via API"""
-    data = request.get_json() or {}
+def door_open_response(door):
+    """Buka pintu via API (token + delay dari request)"""
+    data = request.get_json(silent=True) or {}
     
     # Verifikasi token
     token = data.get('token') or request.headers.get('X-API-Token')
     if not verify_token(token):
         return jsonify({"status": "error", "message": "Invalid token"}), 401
     
-    # Ambil delay dari request (default 5 detik)
-    delay = int(data.get('delay', DEFAULT_DOOR_DELAY))
+    # Ambil delay dari request (default: delay pintu)
+    delay = int(data.get('delay', door.delay))
     delay = max(1, min(delay, 30))  # Batasi 1-30 detik
     
     # Buka pintu
-    success = doorlock.unlock(delay)
+    with latency.trace("door_api"), tracer.span("door.unlock", door=door.door_id):
+        remaining = door.unlock(delay)
     
-    if success:
+    if remaining is not None:
         return jsonify({
             "status": "success",
-            "message": f"Pintu dibuka, akan terkunci otomatis dalam {delay} detik",
-            "delay_used": delay
+            "message": f"{door.name} terbuka, akan terkunci otomatis dalam {remaining:g} detik",
+            "door_id": door.door_id,
+            "delay_used": delay,
+            "remaining": remaining
         })
     else:
         return jsonify({
-            "status": "info",
-            "message": "Pintu sudah terbuka"
-        })
+            "status": "error",
+            "message": f"Gagal membuka {door.name}"
+        }), 500
 
-@app.route('/door/lock', methods=['POST'])
-def api_door_lock():
+def door_lock_response(door):
     """Kunci pintu via API"""
-    data = request.get_json() or {}
+    data = request.get_json(silent=True) or {}
     
     # Verifikasi token
     token = data.get('token') or request.headers.get('X-API-Token')
     if not verify_token(token):
         return jsonify({"status": "error", "message": "Invalid token"}), 401
     
-    success = doorlock.lock()
+    with tracer.span("door.lock", door=door.door_id):
+        success = door.lock()
     
     if success:
-        return jsonify({"status": "success", "message": "Pintu dikunci"})
+        return jsonify({"status": "success", "message": f"{door.name} dikunci"})
     else:
-        return jsonify({"status": "info", "message": "Pintu sudah terkunci"})
+        return jsonify({"status": "info", "message": f"{door.name} sudah terkunci"})
+
+def door_not_found(door_id):
+    return jsonify({"status": "error", "message": f"Pintu '{door_id}' tidak ditemukan"}), 404
+
+@app.route('/door/open', methods=['POST'])
+@traced("api.door_open")
+@rate_limited("door")
+@lane(door_lane)
+def api_door_open():
+    """Buka pintu default via API"""
+    return door_open_response(doorlock)
+
+@app.route('/door/lock', methods=['POST'])
+@traced("api.door_lock")
+@rate_limited("door")
+@lane(door_lane)
+def api_door_lock():
+    """Kunci pintu default via API"""
+    return door_lock_response(doorlock)
 
 @app.route('/door/status', methods=['GET'])
+@rate_limited("door_status")
+@lane(door_lane)
 def api_door_status():
-    """Cek status pintu"""
+    """Cek status pintu default"""
     return jsonify(doorlock.get_status())
 
+@app.route('/door/<door_id>/open', methods=['POST'])
+@traced("api.door_open")
+@rate_limited("door")
+@lane(door_lane)
+def api_door_open_by_id(door_id):
+    """Buka pintu tertentu via API"""
+    door = doors.get(door_id)
+    if door is None:
+        return door_not_found(door_id)
+    return door_open_response(door)
+
+@app.route('/door/<door_id>/lock', methods=['POST'])
+@traced("api.door_lock")
+@rate_limited("door")
+@lane(door_lane)
+def api_door_lock_by_id(door_id):
+    """Kunci pintu tertentu via API"""
+    door = doors.get(door_id)
+    if door is None:
+        return door_not_found(door_id)
+    return door_lock_response(door)
+
+@app.route('/door/<door_id>/status', methods=['GET'])
+@rate_limited("door_status")
+@lane(door_lane)
+def api_door_status_by_id(door_id):
+    """Cek status pintu tertentu"""
+    door = doors.get(door_id)
+    if door is None:
+        return door_not_found(door_id)
+    return jsonify(door.get_status())
+
+@app.route('/doors', methods=['GET'])
+@rate_limited("door_status")
+@lane(door_lane)
+def api_doors_status():
+    """Status semua pintu sekaligus"""
+    return jsonify({"doors": doors.status_all()})
+
+@app.route('/events', methods=['GET'])
+@rate_limited("events")
+def api_events():
+    """
+    Server-Sent Events: transisi pintu ("door") dan hasil absensi ("absen")
+    
+    Filter opsional ?types=door,absen. Klien yang reconnect mengirim header
+    Last-Event-ID untuk menerima event yang terlewat. Event "absen" memuat kode
+    dan nama karyawan, jadi token wajib: header X-API-Token atau ?token=
+    (EventSource di browser tidak bisa mengirim header).
+    """
+    token = request.headers.get('X-API-Token') or request.args.get('token')
+    if not verify_token(token):
+        return jsonify({"status": "error", "message": "Invalid token"}), 401
+    
+    types = [t for t in request.args.get('types', '').split(',') if t] or None
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+    
+    # Slot dipegang selama stream terbuka, dilepas saat response ditutup
+    try:
+        events_lane.acquire()
+    except BulkheadFull as e:
+        return lane_full_response(e)
+    
+    subscription = events.subscribe(types, last_event_id)
+    response = Response(
+        stream_with_context(sse_stream(subscription, EVENTS_HEARTBEAT)),
+        mimetype='text/event-stream'
+    )
+    response.call_on_close(events_lane.release)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # nginx: jangan buffer stream
+    return response
+
+@app.route('/absen/reconcile', methods=['GET'])
+@rate_limited("monitor")
+@lane(monitor_lane)
+def api_absen_reconcile():
+    """Laporan rekonsiliasi: tap yang pintunya terbuka tetapi lognya gagal disimpan"""
+    token = request.args.get('token') or request.headers.get('X-API-Token')
+    if not verify_token(token):
+        return jsonify({"status": "error", "message": "Invalid token"}), 401
+    
+    return jsonify({
+        "status": "success",
+        "deferred": deferred_writer.stats(),
+        "deferred_failed": deferred_writer.report(),
+        "journal_failed": journal.failed_rows() if journal else []
+    })
+
+@app.route('/latency', methods=['GET'])
+@rate_limited("monitor")
+@lane(monitor_lane)
+def api_latency():
+    """Histogram latency (ms): request -> validasi -> GPIO, jitter relock"""
+    return jsonify({"latency": latency.snapshot()})
+
+@app.route('/metrics', methods=['GET'])
+@rate_limited("monitor")
+@lane(monitor_lane)
+def api_metrics():
+    """Metrik format teks Prometheus (request, error, latency DB, pool, relay)"""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+def query_traces(default_limit=50):
+    """Filter /traces dari query string; None jika token tidak valid"""
+    args = request.args
+    if not verify_token(request.headers.get('X-API-Token') or args.get('token')):
+        return None
+    return tracer.query(
+        trace_id=args.get('trace_id'),
+        name=args.get('name'),
+        min_ms=args.get('min_ms', type=float),
+        errors_only=args.get('errors') in ('1', 'true'),
+        limit=args.get('limit', default_limit, type=int)
+    )
+
+@app.route('/traces', methods=['GET'])
+@rate_limited("monitor")
+@lane(monitor_lane)
+def api_traces():
+    """Trace terakhir (terbaru dulu); filter trace_id, name, min_ms, errors, limit"""
+    traces = query_traces()
+    if traces is None:
+        return jsonify({"status": "error", "message": "Invalid token"}), 401
+    return jsonify({
+        "traces": traces,
+        "tracer": tracer.stats()
+    })
+
+@app.route('/traces/export', methods=['GET'])
+@rate_limited("monitor")
+@lane(monitor_lane)
+def api_traces_export():
+    """Trace yang sama dengan /traces dalam format JSON lines"""
+    traces = query_traces(default_limit=0)
+    if traces is None:
+        return jsonify({"status": "error", "message": "Invalid token"}), 401
+    return Response(to_json_lines(traces), mimetype="application/x-ndjson")
+
+@app.route('/latency/reset', methods=['POST'])
+@rate_limited("monitor")
+@lane(monitor_lane)
+def api_latency_reset():
+    """Kosongkan histogram (mis. sebelum uji beban)"""
+    data = request.get_json(silent=True) or {}
+    token = data.get('token') or request.headers.get('X-API-Token')
+    if not verify_token(token):
+        return jsonify({"status": "error", "message": "Invalid token"}), 401
+    latency.reset()
+    return jsonify({"status": "success", "message": "Histogram latency dikosongkan"})
+
 @app.route('/absen', methods=['POST'])
+@traced("api.absen")
+@rate_limited("absen")
+@lane(db_lane)
 def api_absen():
     """Endpoint absensi via API"""
     data = request.get_json() or {}
@@ -475,16 +1261,114 @@ def api_absen():
             "message": "Parameter 'kode' dan 'status' wajib diisi"
         }), 400
     
-    # Proses absensi
-    result = proses_absensi(kode, status)
+    # Idempotency key opsional dari klien (header atau body)
+    idempotency_key = request.headers.get('Idempotency-Key') or data.get('idempotency_key')
+    
+    # Proses absensi (pengulangan mendapat response pertama)
+    with latency.trace("api"):
+        result, cached = proses_absensi_sekali(kode, status, idempotency_key)
     
     http_code = 200 if result["status"] == "success" else 400
-    return jsonify(result), http_code
+    response = jsonify(result)
+    if cached:
+        response.headers['X-Idempotent-Replay'] = 'true'
+    return response, http_code
+
+@app.route('/absen/batch', methods=['POST'])
+@traced("api.absen_batch")
+@rate_limited("batch")
+@lane(db_lane)
+def api_absen_batch():
+    """Absensi banyak tap sekaligus (back-fill / impor dari reader lain)"""
+    data = request.get_json(silent=True) or {}
+    
+    # Verifikasi token
+    token = data.get('token') or request.headers.get('X-API-Token')
+    if not verify_token(token):
+        return jsonify({"status": "error", "message": "Invalid token"}), 401
+    
+    records = data.get('records')
+    if not isinstance(records, list) or not records:
+        return jsonify({
+            "status": "error",
+            "message": "Parameter 'records' wajib berupa array tidak kosong"
+        }), 400
+    if len(records) > BATCH_MAX_RECORDS:
+        return jsonify({
+            "status": "error",
+            "message": f"Maksimum {BATCH_MAX_RECORDS} record per request"
+        }), 413
+    
+    try:
+        # Tap lokal yang belum tersinkron harus terlihat oleh validasi urutan
+        if journal_syncer:
+            with tracer.span("batch.journal_sync"):
+                caught_up = journal_syncer.flush(JOURNAL_FLUSH_MAX_BATCHES)
+            if not caught_up:
+                # Backlog besar disusul thread syncer, bukan worker thread HTTP
+                journal_syncer.notify()
+                response = jsonify({
+                    "status": "error",
+                    "message": "Journal lokal belum tersinkron, coba lagi nanti"
+                })
+                response.headers['Retry-After'] = str(JOURNAL_SYNC_INTERVAL)
+                return response, 503
+        
+        with tracer.span("batch.process", records=len(records)), \
+                db_query_duration.time(query="batch"):
+            results, inserted = process_batch(db_pool, roster, records, STATUS_MAPPING)
+    except CircuitOpen:
+        return jsonify({
+            "status": "error",
+            "message": "Database sedang tidak tersedia, coba lagi nanti"
+        }), 503
+    except Exception as e:
+        print(f"✗ Batch absensi gagal: {e}")
+        return jsonify({
+            "status": "error",
+            "message": f"Database error: {str(e)}"
+        }), 500
+    
+    for employee_id, status_db, event_time in inserted:
+        day_state.record(employee_id, status_db, event_time)
+    
+    summary = {"success": 0, "info": 0, "error": 0}
+    for result in results:
+        summary[result["status"]] += 1
+    print(f"✓ Batch absensi: {summary['success']} tersimpan, "
+          f"{summary['info']} duplikat, {summary['error']} ditolak")
+    
+    return jsonify({
+        "status": "success",
+        "summary": summary,
+        "results": results
+    })
+
+http_server = None
 
 def run_flask():
     """Jalankan Flask server di background thread"""
-    print(f"\n🌐 Starting Flask API server on {FLASK_HOST}:{FLASK_PORT}")
-    app.run(host=FLASK_HOST, port=FLASK_PORT, debug=False, use_reloader=False)
+    global http_server
+    
+    http_server = create_server(
+        app,
+        FLASK_HOST,
+        FLASK_PORT,
+        mode=SERVER_MODE,
+        threads=SERVER_THREADS,
+        connection_limit=SERVER_CONNECTION_LIMIT,
+        backlog=SERVER_BACKLOG,
+        keepalive_timeout=SERVER_KEEPALIVE_TIMEOUT,
+        # Stream /events tidak pernah selesai sendiri; akhiri saat shutdown
+        on_drain=events.close_streams
+    )
+    if http_server.mode == "waitress":
+        spare = reserved_threads(SERVER_THREADS, db_lane, events_lane, monitor_lane)
+        if spare < DOOR_LANE_CONCURRENCY:
+            print(f"⚠ Hanya {spare} worker thread tersisa untuk jalur pintu "
+                  f"(DOOR_LANE_CONCURRENCY={DOOR_LANE_CONCURRENCY}); naikkan SERVER_THREADS")
+    print(f"\n🌐 Starting Flask API server on {FLASK_HOST}:{FLASK_PORT} ({http_server.mode})")
+    http_server.run()
 
 # =============================================================================
 # TKINTER GUI
@@ -506,8 +1390,9 @@ class AbsensiGUI:
         # UI Components
         self.create_widgets()
         
-        # Update status doorlock setiap 1 detik
+        # Status pintu di-push dari EventBus (tanpa polling)
         self.update_door_status()
+        events.listen(self.on_door_event, types=["door"])
     
     def create_widgets(self):
         """Buat komponen UI"""
@@ -643,8 +1528,9 @@ class AbsensiGUI:
             messagebox.showerror("Error", "Kode karyawan harus diisi!")
             return
         
-        # Proses absensi
-        result = proses_absensi(kode, status)
+        # Proses absensi (double-fire reader mendapat response pertama)
+        with latency.trace("gui"), tracer.trace("gui.absen"):
+            result, _ = proses_absensi_sekali(kode, status)
         
         # Tampilkan hasil
         if result["status"] == "success":
@@ -658,11 +1544,13 @@ class AbsensiGUI:
     
     def buka_pintu(self):
         """Buka pintu manual"""
-        success = doorlock.unlock(DEFAULT_DOOR_DELAY)
-        if success:
-            messagebox.showinfo("Info", f"Pintu dibuka manual via GUI\nAkan terkunci otomatis dalam {DEFAULT_DOOR_DELAY} detik")
+        with latency.trace("gui_door"), tracer.trace("gui.door_open"), \
+                tracer.span("door.unlock", door=doorlock.door_id):
+            remaining = doorlock.unlock(DEFAULT_DOOR_DELAY)
+        if remaining is not None:
+            messagebox.showinfo("Info", f"Pintu dibuka manual via GUI\nAkan terkunci otomatis dalam {remaining:g} detik")
         else:
-            messagebox.showinfo("Info", "Pintu sudah terbuka")
+            messagebox.showerror("Error", "Gagal membuka pintu")
     
     def kunci_pintu(self):
         """Kunci pintu manual"""
@@ -672,9 +1560,14 @@ class AbsensiGUI:
         else:
             messagebox.showinfo("Info", "Pintu sudah terkunci")
     
-    def update_door_status(self):
+    def on_door_event(self, event):
+        """Dipanggil dari thread scheduler; pindahkan update ke thread Tk"""
+        if event.data["door_id"] == doorlock.door_id:
+            self.master.after(0, self.update_door_status, event.data)
+    
+    def update_door_status(self, status=None):
         """Update label status pintu"""
-        status = doorlock.get_status()
+        status = status or doorlock.get_status()
         
         if status["is_locked"]:
             self.door_status_label.config(
@@ -686,9 +1579,6 @@ class AbsensiGUI:
                 text="Status: TERBUKA 🔓",
                 fg="#4CAF50"
             )
-        
-        # Update setiap 500ms
-        self.master.after(500, self.update_door_status)
 
 # =============================================================================
 # MAIN PROGRAM
@@ -705,6 +1595,12 @@ def main():
     print("\n[1/4] Initializing Database...")
     try:
         init_db()
+        start_keepalive()
+        roster.load()
+        roster.start()
+        day_state.warm()
+        day_state.start()
+        init_journal()
     except Exception as e:
         print(f"✗ FATAL: Database initialization failed: {e}")
         return
@@ -731,7 +1627,7 @@ def main():
         print("  ✓ SISTEM SIAP!")
         print("="*60)
         print(f"  Flask API  : http://0.0.0.0:{FLASK_PORT}")
-        print(f"  GPIO Mode  : {'HARDWARE' if GPIO_AVAILABLE else 'SIMULATED'}")
+        print(f"  GPIO Mode  : {'HARDWARE' if GPIO_AVAILABLE else 'SIMULATED'} ({gpio.name})")
         print(f"  Database   : {DB_CONFIG['database']}@{DB_CONFIG['host']}")
         print("="*60 + "\n")
         
@@ -745,11 +1641,23 @@ def main():
     finally:
         # Cleanup
         print("\n🧹 Cleaning up...")
+        # Selesaikan request yang sedang berjalan sebelum pintu & database ditutup
+        if http_server:
+            http_server.shutdown(SERVER_DRAIN_TIMEOUT)
+        # Trace lambat yang masih antre ditulis ke file
+        tracer.flush()
+        door_scheduler.stop()
         cleanup_gpio()
-        if db_conn and db_conn.is_connected():
-            db_cursor.close()
-            db_conn.close()
-            print("✓ Database connection closed")
+        # Log door-first yang masih antre harus tersimpan sebelum koneksi ditutup
+        deferred_writer.stop()
+        roster.stop()
+        day_state.stop()
+        if journal_syncer:
+            journal_syncer.stop()
+            journal.close()
+        db_pool.close_all()
+        atomic_pool.close_all()
+        print("✓ Database connections closed")
         print("✓ Program terminated\n")
 
 if __name__ == "__main__":
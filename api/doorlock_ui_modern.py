@@ -16,15 +16,12 @@ from mysql.connector import Error
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 
-# Import GPIO dengan error handling
-try:
-    import RPi.GPIO as GPIO
-    GPIO_AVAILABLE = True
-    print("✓ GPIO Module tersedia")
-except (ImportError, RuntimeError) as e:
-    GPIO_AVAILABLE = False
-    print(f"⚠ GPIO Module tidak tersedia: {e}")
-    print("⚠ Menggunakan mode SIMULASI")
+from doorlock.circuit_breaker import CircuitBreaker, CircuitOpen
+from doorlock.db_pool import ConnectionPool
+from doorlock.state_cache import day_bounds
+from doorlock.door_scheduler import DoorScheduler
+from doorlock.events import EventBus
+from doorlock.gpio_backend import SimulatedBackend, create_backend
 
 # =============================================================================
 # THEME MANAGER - PROFESSIONAL UI/UX
@@ -297,11 +294,19 @@ DB_CONFIG = {
     'ssl_disabled': True
 }
 
+GPIO_BACKEND = "auto"  # "auto" (rpi -> gpiod -> sim), "rpi", "gpiod" atau "sim"
 RELAY_PIN = 2
 RELAY_ACTIVE_LOW = True
 DEFAULT_DOOR_DELAY = 5
 AUTO_LOCK_AFTER_ABSEN = True
 
+DB_POOL_SIZE = 4
+DB_POOL_IDLE_TIMEOUT = 300
+DB_POOL_ACQUIRE_TIMEOUT = 5
+DB_CIRCUIT_FAILURE_THRESHOLD = 3
+DB_CIRCUIT_RESET_TIMEOUT = 30
+DB_CONNECT_RETRIES = 1  # Retry connect per peminjaman; breaker yang menangani percobaan ulang
+
 API_TOKEN = "SECURE_KEY_IGASAR"
 FLASK_PORT = 5000
 FLASK_HOST = "0.0.0.0"
@@ -314,11 +319,11 @@ STATUS_MAPPING = {
 }
 
 # =============================================================================
-# DATABASE CONNECTION (UNCHANGED)
+# DATABASE CONNECTION
 # =============================================================================
 
-def connect_db():
-    max_retries = 3
+def connect_db(max_retries=DB_CONNECT_RETRIES):
+    """Buat koneksi ke database (percobaan ulang ditangani breaker, bukan tap)"""
     retry_delay = 2
     
     for attempt in range(max_retries):
@@ -334,23 +339,34 @@ def connect_db():
     
     raise Exception("Gagal koneksi ke database setelah beberapa percobaan")
 
-db_conn = None
-db_cursor = None
+db_breaker = CircuitBreaker(
+    "mysql",
+    failure_threshold=DB_CIRCUIT_FAILURE_THRESHOLD,
+    reset_timeout=DB_CIRCUIT_RESET_TIMEOUT
+)
+
+db_pool = ConnectionPool(
+    connect_db,
+    max_size=DB_POOL_SIZE,
+    idle_timeout=DB_POOL_IDLE_TIMEOUT,
+    acquire_timeout=DB_POOL_ACQUIRE_TIMEOUT,
+    breaker=db_breaker
+)
 
 def init_db():
-    global db_conn, db_cursor
-    
     try:
-        db_conn = connect_db()
-        db_cursor = db_conn.cursor(dictionary=True)
-        
-        db_cursor.execute("SHOW TABLES LIKE 'employees'")
-        if not db_cursor.fetchone():
-            raise Exception("Tabel 'employees' tidak ditemukan!")
-        
-        db_cursor.execute("SHOW TABLES LIKE 'attendance_logs'")
-        if not db_cursor.fetchone():
-            raise Exception("Tabel 'attendance_logs' tidak ditemukan!")
+        with db_pool.connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            try:
+                cursor.execute("SHOW TABLES LIKE 'employees'")
+                if not cursor.fetchone():
+                    raise Exception("Tabel 'employees' tidak ditemukan!")
+                
+                cursor.execute("SHOW TABLES LIKE 'attendance_logs'")
+                if not cursor.fetchone():
+                    raise Exception("Tabel 'attendance_logs' tidak ditemukan!")
+            finally:
+                cursor.close()
         
         print("✓ Tabel database terverifikasi: employees, attendance_logs")
         
@@ -359,194 +375,196 @@ def init_db():
         raise
 
 # =============================================================================
-# GPIO CONTROL (UNCHANGED)
+# GPIO CONTROL
 # =============================================================================
 
+# Backend dipilih saat startup (sama dengan doorlock_pi_final)
+try:
+    gpio = create_backend(GPIO_BACKEND)
+except (ImportError, OSError, RuntimeError, ValueError) as e:
+    print(f"⚠ Backend GPIO '{GPIO_BACKEND}' tidak tersedia: {e}")
+    gpio = SimulatedBackend()
+if isinstance(gpio, SimulatedBackend):
+    # set_relay sudah mencetak status relay sendiri
+    gpio.verbose = False
+GPIO_AVAILABLE = gpio.hardware
+if GPIO_AVAILABLE:
+    print(f"✓ GPIO backend: {gpio.name}")
+else:
+    print("⚠ Menggunakan mode SIMULASI")
+
 def init_gpio():
-    if not GPIO_AVAILABLE:
-        print("⚠ GPIO tidak tersedia - Mode SIMULASI aktif")
-        return False
-    
     try:
-        GPIO.setmode(GPIO.BCM)
-        GPIO.setwarnings(False)
-        GPIO.setup(RELAY_PIN, GPIO.OUT)
-        
-        if RELAY_ACTIVE_LOW:
-            GPIO.output(RELAY_PIN, GPIO.HIGH)
-        else:
-            GPIO.output(RELAY_PIN, GPIO.LOW)
-        
-        print(f"✓ GPIO initialized: Pin {RELAY_PIN} (Active {'LOW' if RELAY_ACTIVE_LOW else 'HIGH'})")
-        return True
-        
+        # Set initial state (locked): Active LOW -> HIGH = OFF
+        gpio.setup_output(RELAY_PIN, RELAY_ACTIVE_LOW)
     except Exception as e:
         print(f"✗ GPIO initialization error: {e}")
         return False
+    
+    if not GPIO_AVAILABLE:
+        print("⚠ GPIO tidak tersedia - Mode SIMULASI aktif")
+        return False
+    
+    print(f"✓ GPIO initialized: Pin {RELAY_PIN} (Active {'LOW' if RELAY_ACTIVE_LOW else 'HIGH'})")
+    return True
 
 def set_relay(active: bool):
+    try:
+        # Active LOW: LOW = ON (unlocked), HIGH = OFF (locked)
+        gpio.write(RELAY_PIN, active != RELAY_ACTIVE_LOW)
+    except Exception as e:
+        print(f"✗ Relay control error: {e}")
+        return
+    
     if not GPIO_AVAILABLE:
         status = "ACTIVE" if active else "INACTIVE"
         print(f"[SIMULASI] Relay {status}")
-        return
-    
-    try:
-        if RELAY_ACTIVE_LOW:
-            GPIO.output(RELAY_PIN, GPIO.LOW if active else GPIO.HIGH)
-        else:
-            GPIO.output(RELAY_PIN, GPIO.HIGH if active else GPIO.LOW)
-        
+    else:
         status = "UNLOCKED" if active else "LOCKED"
         print(f"✓ Doorlock {status} (GPIO {RELAY_PIN})")
-        
-    except Exception as e:
-        print(f"✗ Relay control error: {e}")
 
 def cleanup_gpio():
-    if GPIO_AVAILABLE:
-        try:
-            GPIO.cleanup()
+    try:
+        gpio.cleanup()
+        if GPIO_AVAILABLE:
             print("✓ GPIO cleanup completed")
-        except Exception as e:
-            print(f"⚠ GPIO cleanup error: {e}")
+    except Exception as e:
+        print(f"⚠ GPIO cleanup error: {e}")
 
 # =============================================================================
 # DOORLOCK LOGIC (UNCHANGED)
 # =============================================================================
 
 class DoorlockController:
-    def __init__(self):
-        self.is_locked = True
-        self.timer_thread = None
-        self.lock_timer = None
+    DOOR_ID = "main"
+    
+    def __init__(self, scheduler):
+        self.scheduler = scheduler
+        self.scheduler.add_door(self.DOOR_ID, set_relay, self._on_change)
+    
+    @property
+    def is_locked(self):
+        return not self.scheduler.status(self.DOOR_ID)["is_open"]
         
     def unlock(self, delay_seconds=DEFAULT_DOOR_DELAY):
-        if not self.is_locked:
-            print("⚠ Pintu sudah terbuka")
-            return False
-        
-        set_relay(True)
-        self.is_locked = False
-        print(f"🔓 Pintu DIBUKA (akan terkunci otomatis dalam {delay_seconds} detik)")
-        
-        if self.lock_timer:
-            self.lock_timer.cancel()
-        
-        self.lock_timer = threading.Timer(delay_seconds, self._auto_lock)
-        self.lock_timer.start()
-        
-        return True
-    
-    def _auto_lock(self):
-        self.lock()
-        print("🔒 Pintu TERKUNCI otomatis")
+        # Pintu yang sudah terbuka diperpanjang, bukan ditolak
+        try:
+            remaining = self.scheduler.open(self.DOOR_ID, delay_seconds, extend=True)
+        except TimeoutError as e:
+            # Absensi sudah tersimpan: laporkan pintu gagal dibuka, bukan error
+            print(f"✗ Pintu gagal dibuka: {e}")
+            return None
+        if remaining is not None:
+            print(f"🔓 Pintu TERBUKA (akan terkunci otomatis dalam {remaining:g} detik)")
+        return remaining
+    
+    def _on_change(self, door_id, is_open):
+        if not is_open:
+            print("🔒 Pintu TERKUNCI")
+        events.publish("door", self.get_status())
     
     def lock(self):
-        if self.is_locked:
-            return False
-        
-        set_relay(False)
-        self.is_locked = True
-        
-        if self.lock_timer:
-            self.lock_timer.cancel()
-            self.lock_timer = None
-        
-        return True
+        return self.scheduler.lock(self.DOOR_ID)
     
     def get_status(self):
+        status = self.scheduler.status(self.DOOR_ID)
+        is_locked = not status["is_open"]
         return {
-            "is_locked": self.is_locked,
-            "status": "TERKUNCI" if self.is_locked else "TERBUKA",
+            "is_locked": is_locked,
+            "status": "TERKUNCI" if is_locked else "TERBUKA",
+            "remaining": status["remaining"],
             "gpio_mode": "HARDWARE" if GPIO_AVAILABLE else "SIMULATED"
         }
 
-doorlock = DoorlockController()
+# Satu thread untuk semua transisi relay & deadline relock
+door_scheduler = DoorScheduler()
+# Transisi pintu di-push ke GUI (tanpa polling status)
+events = EventBus()
+doorlock = DoorlockController(door_scheduler)
 
 # =============================================================================
 # ABSENSI LOGIC (UNCHANGED)
 # =============================================================================
 
 def proses_absensi(kode: str, status_absen: str):
-    global db_conn, db_cursor
+    status_db = STATUS_MAPPING.get(status_absen)
+    if not status_db:
+        return {
+            "status": "error",
+            "message": f"Status tidak valid: {status_absen}"
+        }
     
     try:
-        if not db_conn or not db_conn.is_connected():
-            print("⚠ Database reconnecting...")
-            init_db()
-        
-        status_db = STATUS_MAPPING.get(status_absen)
-        if not status_db:
-            return {
-                "status": "error",
-                "message": f"Status tidak valid: {status_absen}"
-            }
-        
-        db_cursor.execute(
-            "SELECT id, code, name, is_active FROM employees WHERE code = %s",
-            (kode,)
-        )
-        employee = db_cursor.fetchone()
-        
-        if not employee:
-            return {
-                "status": "error",
-                "message": f"Kode karyawan {kode} tidak ditemukan"
-            }
-        
-        if not employee["is_active"]:
-            return {
-                "status": "error",
-                "message": f"{employee['name']} sudah tidak aktif"
-            }
-        
-        employee_id = employee["id"]
-        employee_name = employee["name"]
-        
-        sekarang = datetime.now()
-        hari_ini = sekarang.strftime('%Y-%m-%d')
-        
-        db_cursor.execute("""
-            SELECT status, event_time 
-            FROM attendance_logs 
-            WHERE employee_id = %s 
-              AND DATE(event_time) = %s
-            ORDER BY event_time DESC 
-            LIMIT 1
-        """, (employee_id, hari_ini))
-        
-        last_log = db_cursor.fetchone()
-        
-        if last_log:
-            last_status = last_log["status"]
-            
-            if last_status == status_db:
-                return {
-                    "status": "info",
-                    "message": f"{employee_name} sudah absen {status_absen.lower()} hari ini.",
-                    "data": {
-                        "employee": employee_name,
-                        "last_time": last_log["event_time"].strftime('%H:%M:%S')
+        with db_pool.connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            try:
+                cursor.execute(
+                    "SELECT id, code, name, is_active FROM employees WHERE code = %s",
+                    (kode,)
+                )
+                employee = cursor.fetchone()
+                
+                if not employee:
+                    return {
+                        "status": "error",
+                        "message": f"Kode karyawan {kode} tidak ditemukan"
                     }
-                }
-            
-            if status_db == "masuk" and last_status in ["pulang", "pulang_lembur"]:
-                return {
-                    "status": "error",
-                    "message": f"{employee_name} sudah pulang hari ini, tidak bisa absen masuk lagi."
-                }
-        
-        db_cursor.execute(
-            "INSERT INTO attendance_logs (employee_id, status, event_time) VALUES (%s, %s, %s)",
-            (employee_id, status_db, sekarang)
-        )
-        db_conn.commit()
+                
+                if not employee["is_active"]:
+                    return {
+                        "status": "error",
+                        "message": f"{employee['name']} sudah tidak aktif"
+                    }
+                
+                employee_id = employee["id"]
+                employee_name = employee["name"]
+                
+                sekarang = datetime.now()
+                awal_hari, awal_besok = day_bounds(sekarang.date())
+                
+                cursor.execute("""
+                    SELECT status, event_time 
+                    FROM attendance_logs 
+                    WHERE employee_id = %s 
+                      AND event_time >= %s AND event_time < %s
+                    ORDER BY event_time DESC 
+                    LIMIT 1
+                """, (employee_id, awal_hari, awal_besok))
+                
+                last_log = cursor.fetchone()
+                
+                if last_log:
+                    last_status = last_log["status"]
+                    
+                    if last_status == status_db:
+                        return {
+                            "status": "info",
+                            "message": f"{employee_name} sudah absen {status_absen.lower()} hari ini.",
+                            "data": {
+                                "employee": employee_name,
+                                "last_time": last_log["event_time"].strftime('%H:%M:%S')
+                            }
+                        }
+                    
+                    if status_db == "masuk" and last_status in ["pulang", "pulang_lembur"]:
+                        return {
+                            "status": "error",
+                            "message": f"{employee_name} sudah pulang hari ini, tidak bisa absen masuk lagi."
+                        }
+                
+                cursor.execute(
+                    "INSERT INTO attendance_logs (employee_id, status, event_time) VALUES (%s, %s, %s)",
+                    (employee_id, status_db, sekarang)
+                )
+                conn.commit()
+            finally:
+                cursor.close()
         
         print(f"✓ Absensi tersimpan: {employee_name} - {status_absen} ({sekarang.strftime('%Y-%m-%d %H:%M:%S')})")
         
         door_opened = False
         if AUTO_LOCK_AFTER_ABSEN:
-            door_opened = doorlock.unlock(DEFAULT_DOOR_DELAY)
+            door_opened = doorlock.unlock(DEFAULT_DOOR_DELAY) is not None
         
         return {
             "status": "success",
@@ -561,8 +579,13 @@ def proses_absensi(kode: str, status_absen: str):
             }
         }
         
+    except CircuitOpen as e:
+        print(f"⚠ {e}")
+        return {
+            "status": "error",
+            "message": "Database sedang tidak tersedia, coba lagi nanti"
+        }
     except Error as e:
-        db_conn.rollback()
         print(f"✗ Database error: {e}")
         return {
             "status": "error",
@@ -596,13 +619,15 @@ def index():
 
 @app.route('/health', methods=['GET'])
 def health_check():
-    db_status = "AVAILABLE" if (db_conn and db_conn.is_connected()) else "UNAVAILABLE"
+    db_status = "AVAILABLE" if db_pool.ping() else "UNAVAILABLE"
     
     return jsonify({
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
         "gpio_mode": "HARDWARE" if GPIO_AVAILABLE else "SIMULATED",
         "mysql": db_status,
+        "mysql_pool": db_pool.stats(),
+        "mysql_circuit": db_breaker.stats(),
         "doorlock": doorlock.get_status()
     })
 
@@ -617,19 +642,20 @@ def api_door_open():
     delay = int(data.get('delay', DEFAULT_DOOR_DELAY))
     delay = max(1, min(delay, 30))
     
-    success = doorlock.unlock(delay)
+    remaining = doorlock.unlock(delay)
     
-    if success:
+    if remaining is not None:
         return jsonify({
             "status": "success",
-            "message": f"Pintu dibuka, akan terkunci otomatis dalam {delay} detik",
-            "delay_used": delay
+            "message": f"Pintu terbuka, akan terkunci otomatis dalam {remaining:g} detik",
+            "delay_used": delay,
+            "remaining": remaining
         })
     else:
         return jsonify({
-            "status": "info",
-            "message": "Pintu sudah terbuka"
-        })
+            "status": "error",
+            "message": "Gagal membuka pintu"
+        }), 500
 
 @app.route('/door/lock', methods=['POST'])
 def api_door_lock():
@@ -719,8 +745,9 @@ class ModernAbsensiGUI:
         # Apply theme
         self.apply_theme()
         
-        # Start door status updater
+        # Door status is pushed from the EventBus (no polling)
         self.update_door_status()
+        events.listen(self.on_door_event, types=["door"])
         
         # Bind window resize
         self.master.bind('<Configure>', self.on_window_resize)
@@ -1259,11 +1286,11 @@ class DoorlockPanel(ModernCard):
     
     def buka_pintu(self):
         """Manual door unlock"""
-        success = doorlock.unlock(DEFAULT_DOOR_DELAY)
-        if success:
-            self.show_notification(f'🔓 Pintu dibuka manual (auto-lock dalam {DEFAULT_DOOR_DELAY} detik)', 'success')
+        remaining = doorlock.unlock(DEFAULT_DOOR_DELAY)
+        if remaining is not None:
+            self.show_notification(f'🔓 Pintu dibuka manual (auto-lock dalam {remaining:g} detik)', 'success')
         else:
-            self.show_notification('ℹ️ Pintu sudah terbuka', 'info')
+            self.show_notification('✗ Gagal membuka pintu', 'error')
     
     def kunci_pintu(self):
         """Manual door lock"""
@@ -1273,9 +1300,13 @@ class DoorlockPanel(ModernCard):
         else:
             self.show_notification('ℹ️ Pintu sudah terkunci', 'info')
     
-    def update_door_status(self):
-        """Update door status display (500ms interval)"""
-        status = doorlock.get_status()
+    def on_door_event(self, event):
+        """Called from the scheduler thread; hand the update to the Tk thread"""
+        self.master.after(0, self.update_door_status, event.data)
+    
+    def update_door_status(self, status=None):
+        """Update door status display"""
+        status = status or doorlock.get_status()
         
         if status["is_locked"]:
             self.door_status_label.configure(
@@ -1289,9 +1320,6 @@ class DoorlockPanel(ModernCard):
                 fg=theme_manager.get_color('success')
             )
             self.status_indicator.set_status('unlocked')
-        
-        # Schedule next update
-        self.master.after(500, self.update_door_status)
     
     def toggle_theme(self):
         """Toggle between light and dark theme"""
@@ -1441,11 +1469,10 @@ def main():
         print(f"\n✗ GUI Error: {e}")
     finally:
         print("\n🧹 Cleaning up...")
+        door_scheduler.stop()
         cleanup_gpio()
-        if db_conn and db_conn.is_connected():
-            db_cursor.close()
-            db_conn.close()
-            print("✓ Database connection closed")
+        db_pool.close_all()
+        print("✓ Database connections closed")
         print("✓ Program terminated\n")
 
 if __name__ == "__main__":
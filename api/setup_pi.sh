@@ -65,17 +65,31 @@ fi
 # Step 4: Install dependencies (optional - requires interaction)
 echo ""
 echo "📚 Step 4: Install dependencies on Pi..."
-echo "   Running: sudo apt update && sudo apt install -y python3-flask python3-rpi.gpio"
+echo "   Running: sudo apt update && sudo apt install -y python3-flask python3-waitress python3-rpi.gpio"
 echo ""
 read -p "   Install now? (y/n) " -n 1 -r
 echo
 if [[ $REPLY =~ ^[Yy]$ ]]; then
-    ssh "pi@$PI_IP" "sudo apt update && sudo apt install -y python3-flask python3-rpi.gpio"
+    ssh "pi@$PI_IP" "sudo apt update && sudo apt install -y python3-flask python3-waitress python3-rpi.gpio"
     echo "   ✅ Dependencies installed"
 else
     echo "   ⏭️  Skipped (install manually later)"
 fi
 
+# Step 4b: Dependencies for the asyncio variant (doorlock_async.py, optional)
+echo ""
+echo "📚 Step 4b: Install asyncio variant dependencies (doorlock_async.py)..."
+echo "   Running: sudo apt install -y python3-aiohttp python3-pymysql python3-pip && sudo pip3 install --break-system-packages aiomysql"
+echo ""
+read -p "   Install now? (y/n) " -n 1 -r
+echo
+if [[ $REPLY =~ ^[Yy]$ ]]; then
+    ssh "pi@$PI_IP" "sudo apt install -y python3-aiohttp python3-pymysql python3-pip && sudo pip3 install --break-system-packages aiomysql"
+    echo "   ✅ Async dependencies installed"
+else
+    echo "   ⏭️  Skipped (only needed for doorlock_async.py)"
+fi
+
 # Step 5: Test relay (optional)
 echo ""
 echo "🔧 Step 5: Test relay GPIO..."
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modul doorlock diimport seperti dari script di api/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from doorlock.async_door import AsyncDoor
+from doorlock.gpio_backend import SimulatedBackend
+
+PIN = 2
+
+
+def run(scenario, active_low=True):
+    gpio = SimulatedBackend(verbose=False)
+    door = AsyncDoor(gpio, PIN, active_low, delay=0.1)
+    door.setup()
+    asyncio.run(scenario(door, gpio))
+    return gpio
+
+
+def levels(gpio):
+    return [level for _, _, level in gpio.timeline(PIN)]
+
+
+def test_relocks_from_event_loop():
+    async def scenario(door, gpio):
+        assert door.unlock() == pytest.approx(0.1, abs=0.01)
+        assert not door.is_locked
+        assert gpio.level(PIN) is False  # active low: LOW = terbuka
+        await asyncio.sleep(0.15)
+        assert door.is_locked
+        assert door.get_status()["remaining"] == 0
+
+    gpio = run(scenario)
+    # setup (terkunci), buka, kunci
+    assert levels(gpio) == [True, False, True]
+
+
+def test_unlock_while_open_extends_deadline():
+    async def scenario(door, gpio):
+        door.unlock(0.1)
+        await asyncio.sleep(0.05)
+        assert door.unlock(0.2) == pytest.approx(0.2, abs=0.01)
+        await asyncio.sleep(0.1)  # deadline pertama sudah lewat
+        assert not door.is_locked
+        await asyncio.sleep(0.15)
+        assert door.is_locked
+
+    gpio = run(scenario)
+    assert levels(gpio) == [True, False, True]
+
+
+def test_shorter_unlock_keeps_later_deadline():
+    async def scenario(door, gpio):
+        door.unlock(0.3)
+        assert door.unlock(0.05) == pytest.approx(0.3, abs=0.01)
+        await asyncio.sleep(0.1)
+        assert not door.is_locked
+        door.lock()
+
+    run(scenario)
+
+
+def test_lock_cancels_pending_relock():
+    async def scenario(door, gpio):
+        door.unlock(0.05)
+        assert door.lock() is True
+        assert door.lock() is False
+        door.unlock(0.2)
+        # Handle relock pertama sudah dibatalkan
+        await asyncio.sleep(0.1)
+        assert not door.is_locked
+        door.lock()
+
+    gpio = run(scenario)
+    assert levels(gpio) == [True, False, True, False, True]
+
+
+def test_active_high_relay():
+    async def scenario(door, gpio):
+        door.unlock(0.05)
+        assert gpio.level(PIN) is True
+        await asyncio.sleep(0.1)
+        assert gpio.level(PIN) is False
+
+    run(scenario, active_low=False)
@@ -0,0 +1,58 @@
+import pytest
+
+from doorlock import atomic_absen
+
+
+class MySQLError(Exception):
+    def __init__(self, errno, msg):
+        super().__init__(f"{errno}: {msg}")
+        self.errno = errno
+
+
+class FakeCursor:
+    def __init__(self, create_errno=None):
+        self.create_errno = create_errno
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        self.executed.append(sql.strip().split()[0:2])
+        if sql.lstrip().startswith("CREATE FUNCTION") and self.create_errno:
+            raise MySQLError(self.create_errno, "This function has none of DETERMINISTIC ...")
+
+    def fetchone(self):
+        return None
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.committed = False
+
+    def cursor(self, dictionary=False):
+        return self._cursor
+
+    def commit(self):
+        self.committed = True
+
+
+def test_install_creates_function():
+    conn = FakeConnection(FakeCursor())
+    assert atomic_absen.install(conn) is True
+    assert conn.committed
+
+
+@pytest.mark.parametrize("errno", atomic_absen.BINLOG_ROUTINE_ERRORS)
+def test_install_reports_binlog_restriction(errno):
+    conn = FakeConnection(FakeCursor(create_errno=errno))
+    with pytest.raises(atomic_absen.FunctionNotAllowed):
+        atomic_absen.install(conn)
+    assert not conn.committed
+
+
+def test_install_propagates_other_errors():
+    conn = FakeConnection(FakeCursor(create_errno=1044))
+    with pytest.raises(MySQLError):
+        atomic_absen.install(conn)
@@ -0,0 +1,101 @@
+from contextlib import contextmanager
+from datetime import datetime
+
+from doorlock.batch_absen import process_batch
+
+STATUS_MAPPING = {"Masuk": "masuk", "Pulang": "pulang", "Lembur": "lembur", "Pulang Lembur": "pulang_lembur"}
+NOW = datetime(2026, 10, 18, 20, 0, 0)
+
+
+class FakeRoster:
+    def __init__(self, employees):
+        self.employees = {employee["code"]: employee for employee in employees}
+
+    def get_many(self, codes):
+        return {code: self.employees[code] for code in codes if code in self.employees}
+
+
+class FakePool:
+    """attendance_logs di memori dengan query range seperti _existing_logs"""
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+
+    @contextmanager
+    def connection(self):
+        yield self
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+
+class FakeCursor:
+    def __init__(self, pool):
+        self.pool = pool
+        self._result = []
+
+    def execute(self, sql, params):
+        *employee_ids, start, end = params
+        self._result = sorted(
+            (row for row in self.pool.rows
+             if row[0] in employee_ids and start <= row[2] < end),
+            key=lambda row: row[2]
+        )
+
+    def executemany(self, sql, rows):
+        self.pool.rows.extend(rows)
+
+    def fetchall(self):
+        return self._result
+
+    def close(self):
+        pass
+
+
+ANDI = {"id": 1, "code": "EMP001", "name": "Andi", "is_active": 1}
+
+
+def tap(status, time):
+    return {"kode": "EMP001", "status": status, "event_time": f"2026-10-18 {time}"}
+
+
+def run(existing, records):
+    pool = FakePool([(1, status, datetime(2026, 10, 18, *hm)) for status, hm in existing])
+    results, inserted = process_batch(pool, FakeRoster([ANDI]), records, STATUS_MAPPING, now=NOW)
+    return [result["status"] for result in results], inserted
+
+
+def test_backfill_before_existing_masuk_is_rejected():
+    # Masuk 08:00 sudah ada; masuk 07:00 akan membuat masuk, masuk
+    assert run([("masuk", (8, 0))], [tap("Masuk", "07:00:00")]) == (["info"], [])
+
+
+def test_backfill_pulang_before_existing_masuk_is_rejected():
+    statuses, inserted = run([("masuk", (8, 0))], [tap("Pulang", "07:00:00")])
+    assert statuses == ["error"]
+    assert inserted == []
+
+
+def test_backfill_between_masuk_and_pulang_is_rejected():
+    existing = [("masuk", (8, 0)), ("pulang", (17, 0))]
+    assert run(existing, [tap("Pulang", "12:00:00")]) == (["info"], [])
+
+
+def test_backfill_masuk_before_pulang_only_is_accepted():
+    statuses, inserted = run([("pulang", (17, 0))], [tap("Masuk", "08:00:00")])
+    assert statuses == ["success"]
+    assert inserted == [(1, "masuk", datetime(2026, 10, 18, 8, 0))]
+
+
+def test_in_order_batch_and_resend_is_idempotent():
+    records = [tap("Masuk", "08:00:00"), tap("Pulang", "17:00:00")]
+    assert run([], records)[0] == ["success", "success"]
+    existing = [("masuk", (8, 0)), ("pulang", (17, 0))]
+    assert run(existing, records) == (["info", "info"], [])
+
+
+def test_masuk_after_pulang_is_rejected():
+    assert run([("pulang", (12, 0))], [tap("Masuk", "13:00:00")])[0] == ["error"]
@@ -0,0 +1,83 @@
+import threading
+import time
+
+import pytest
+
+from doorlock.bulkhead import Bulkhead, BulkheadFull, reserved_threads
+
+
+def hold(bulkhead, release, errors):
+    try:
+        with bulkhead.slot():
+            release.wait(2)
+    except BulkheadFull as e:
+        errors.append(e)
+
+
+def wait_until(predicate, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_full_queue_rejects_immediately():
+    bulkhead = Bulkhead("db", max_concurrent=1, max_queue=1, queue_timeout=2)
+    release = threading.Event()
+    errors = []
+    threads = [threading.Thread(target=hold, args=(bulkhead, release, errors))
+               for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    wait_until(lambda: bulkhead.stats()["waiting"] == 1)
+
+    started = time.monotonic()
+    with pytest.raises(BulkheadFull) as info:
+        bulkhead.acquire()
+    assert time.monotonic() - started < 0.1
+    assert info.value.name == "db"
+
+    release.set()
+    for thread in threads:
+        thread.join(2)
+    stats = bulkhead.stats()
+    assert errors == []
+    assert (stats["completed"], stats["rejected"], stats["timeouts"]) == (2, 1, 0)
+    assert stats["active"] == stats["waiting"] == 0
+
+
+def test_queued_request_times_out():
+    bulkhead = Bulkhead("db", max_concurrent=1, max_queue=1, queue_timeout=0.1)
+    release = threading.Event()
+    holder = threading.Thread(target=hold, args=(bulkhead, release, []))
+    holder.start()
+    wait_until(lambda: bulkhead.stats()["active"] == 1)
+
+    started = time.monotonic()
+    with pytest.raises(BulkheadFull):
+        bulkhead.acquire()
+    assert time.monotonic() - started == pytest.approx(0.1, abs=0.05)
+
+    release.set()
+    holder.join(2)
+    stats = bulkhead.stats()
+    assert (stats["rejected"], stats["timeouts"], stats["waiting"]) == (1, 1, 0)
+
+
+def test_queued_request_gets_released_slot():
+    bulkhead = Bulkhead("db", max_concurrent=1, max_queue=1, queue_timeout=2)
+    release = threading.Event()
+    holder = threading.Thread(target=hold, args=(bulkhead, release, []))
+    holder.start()
+    wait_until(lambda: bulkhead.stats()["active"] == 1)
+
+    threading.Timer(0.05, release.set).start()
+    with bulkhead.slot():
+        assert bulkhead.stats()["active"] == 1
+    holder.join(2)
+    assert bulkhead.stats()["completed"] == 2
+
+
+def test_reserved_threads():
+    db = Bulkhead("db", max_concurrent=3, max_queue=2)
+    assert reserved_threads(8, db) == 3
@@ -0,0 +1,115 @@
+import threading
+import time
+
+import pytest
+
+from doorlock.circuit_breaker import CLOSED, OPEN, CircuitBreaker, CircuitOpen
+from doorlock.db_pool import ConnectionPool
+
+
+def unreachable():
+    raise ConnectionError("host tidak terjangkau")
+
+
+def wait_until(predicate, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_keepalive_does_not_extend_open_circuit():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=1)
+    pool = ConnectionPool(unreachable, min_idle=1, keepalive_interval=0.02, breaker=breaker)
+
+    pool.start_keepalive()
+    try:
+        wait_until(lambda: breaker.state == OPEN)
+        time.sleep(0.2)
+        # Keep-alive terus gagal selama sirkuit terbuka tanpa memundurkan
+        # waktu half-open
+        assert breaker.stats()["retry_in"] <= 0.85
+        assert breaker.stats()["trips"] == 1
+    finally:
+        pool.stop_keepalive()
+
+
+def test_open_circuit_fails_fast_and_recovers():
+    attempts = []
+    healthy = []
+
+    class Conn:
+        def ping(self, reconnect=False):
+            pass
+
+        def rollback(self):
+            pass
+
+        def close(self):
+            pass
+
+    def connect():
+        attempts.append(1)
+        if not healthy:
+            raise ConnectionError("host tidak terjangkau")
+        return Conn()
+
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.1)
+    pool = ConnectionPool(connect, breaker=breaker)
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            pool.acquire()
+    assert breaker.state == OPEN
+
+    with pytest.raises(CircuitOpen):
+        pool.acquire()
+    assert len(attempts) == 2
+
+    healthy.append(True)
+    time.sleep(0.1)
+    with pool.connection():
+        pass
+    assert breaker.state == CLOSED
+
+
+class CountingConn:
+    def __init__(self, pings):
+        self.pings = pings
+
+    def ping(self, reconnect=False):
+        self.pings.append(threading.current_thread())
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_borrow_after_idle_does_not_ping_with_keepalive():
+    pings = []
+    pool = ConnectionPool(lambda: CountingConn(pings), min_idle=1,
+                          validate_after=0.05, keepalive_interval=0.1)
+    pool.prefill()
+    pool.start_keepalive()
+    try:
+        time.sleep(0.35)  # jauh melewati validate_after
+        with pool.connection():
+            pass
+    finally:
+        pool.stop_keepalive()
+
+    assert threading.main_thread() not in pings
+    assert pings  # keep-alive yang melakukan ping
+
+
+def test_borrow_after_idle_pings_without_keepalive():
+    pings = []
+    pool = ConnectionPool(lambda: CountingConn(pings), min_idle=1, validate_after=0.05)
+    pool.prefill()
+    time.sleep(0.1)
+    with pool.connection():
+        pass
+
+    assert pings == [threading.main_thread()]
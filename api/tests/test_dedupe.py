@@ -0,0 +1,115 @@
+import threading
+import time
+
+import pytest
+
+from doorlock import dedupe
+from doorlock.dedupe import ResponseCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(dedupe.time, "monotonic", lambda: now[0])
+    return now
+
+
+def counter(results):
+    calls = []
+
+    def func():
+        calls.append(1)
+        return results[min(len(calls), len(results)) - 1]
+
+    return func, calls
+
+
+def test_debounce_within_window(clock):
+    cache = ResponseCache(window=2)
+    func, calls = counter([{"success": True, "n": 1}, {"success": True, "n": 2}])
+    key = ("12345", "masuk")
+
+    assert cache.run(key, func) == ({"success": True, "n": 1}, False)
+    clock[0] += 1.9
+    assert cache.run(key, func) == ({"success": True, "n": 1}, True)
+    assert len(calls) == 1
+
+    clock[0] += 0.2
+    assert cache.run(key, func) == ({"success": True, "n": 2}, False)
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_errors_are_not_cached(clock):
+    cache = ResponseCache(window=2)
+    func, calls = counter([{"success": False}])
+
+    def final(result):
+        return result["success"]
+
+    cache.run("k", func, cacheable=final)
+    assert cache.run("k", func, cacheable=final) == ({"success": False}, False)
+    assert len(calls) == 2
+
+
+def test_max_entries_drops_oldest(clock):
+    cache = ResponseCache(window=60, max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.run(key, lambda: key)
+    assert cache.stats()["entries"] == 2
+    assert cache.run("a", lambda: "again") == ("again", False)
+    assert cache.run("c", lambda: "again") == ("c", True)
+
+
+def test_identical_requests_wait_for_inflight():
+    cache = ResponseCache(window=2)
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait(2)
+        return {"success": True}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.run("k", slow)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    assert cache.stats()["inflight"] == 1
+    release.set()
+    for thread in threads:
+        thread.join(2)
+
+    assert len(calls) == 1
+    assert sorted(cached for _, cached in results) == [False, True, True, True]
+
+
+def test_waiter_reruns_when_inflight_result_is_not_cacheable():
+    cache = ResponseCache(window=2)
+    release = threading.Event()
+    calls = []
+
+    def func():
+        calls.append(1)
+        if len(calls) == 1:
+            release.wait(2)
+            return {"success": False}
+        return {"success": True}
+
+    def final(result):
+        return result["success"]
+
+    owner = threading.Thread(target=cache.run, args=("k", func, final))
+    owner.start()
+    time.sleep(0.05)
+    waiter = []
+    thread = threading.Thread(target=lambda: waiter.append(cache.run("k", func, final)))
+    thread.start()
+    release.set()
+    owner.join(2)
+    thread.join(2)
+
+    assert waiter == [({"success": True}, False)]
+    assert len(calls) == 2
@@ -0,0 +1,44 @@
+import json
+import time
+from datetime import datetime
+
+from doorlock.deferred_writer import DeferredWriter
+
+EVENT_TIME = datetime(2024, 1, 2, 8, 0, 0)
+
+
+def test_retries_until_persisted():
+    calls = []
+
+    def persist(employee_id, status, event_time, retry):
+        calls.append(retry)
+        if len(calls) < 3:
+            raise ConnectionError("MySQL tidak terjangkau")
+
+    writer = DeferredWriter(persist, max_attempts=5, base_delay=0.01)
+    writer.submit(1, "masuk", EVENT_TIME)
+    deadline = time.monotonic() + 2
+    while writer.stats()["written"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    writer.stop()
+
+    assert calls[0] is False
+    assert all(calls[1:])
+    assert writer.stats()["written"] == 1
+    assert writer.report() == []
+
+
+def test_permanent_failure_is_reported(tmp_path):
+    failure_log = tmp_path / "absen_gagal.jsonl"
+
+    def persist(employee_id, status, event_time, retry):
+        raise ConnectionError("MySQL tidak terjangkau")
+
+    writer = DeferredWriter(persist, max_attempts=2, base_delay=0.01, failure_log=str(failure_log))
+    writer.submit(7, "pulang", EVENT_TIME)
+    writer.stop()
+
+    (entry,) = writer.report()
+    assert entry["employee_id"] == 7
+    assert entry["event_time"] == "2024-01-02 08:00:00"
+    assert json.loads(failure_log.read_text())["status"] == "pulang"
@@ -0,0 +1,114 @@
+import threading
+import time
+
+import pytest
+
+from doorlock.door_scheduler import DoorScheduler
+
+
+@pytest.fixture
+def door():
+    transitions = []
+    scheduler = DoorScheduler()
+    scheduler.add_door("main", lambda active: transitions.append((active, time.monotonic())))
+    yield scheduler, transitions
+    scheduler.stop()
+
+
+def states(transitions):
+    return [active for active, _ in transitions]
+
+
+def test_open_then_relock_at_deadline(door):
+    scheduler, transitions = door
+    opened = time.monotonic()
+    assert scheduler.open("main", 0.1) == 0.1
+    assert scheduler.status("main")["is_open"]
+
+    time.sleep(0.2)
+    assert states(transitions) == [True, False]
+    assert transitions[1][1] - opened == pytest.approx(0.1, abs=0.05)
+    assert scheduler.status("main") == {"is_open": False, "remaining": 0}
+
+
+def test_open_while_open_is_rejected_without_extend(door):
+    scheduler, transitions = door
+    scheduler.open("main", 0.3)
+    assert scheduler.open("main", 0.3) is None
+    assert scheduler.extend("main", 0.3) <= 0.3
+    assert states(transitions) == [True]
+
+
+def test_extend_moves_relock_without_toggling_relay(door):
+    scheduler, transitions = door
+    scheduler.open("main", 0.15, extend=True)
+    time.sleep(0.1)
+    remaining = scheduler.open("main", 0.2, extend=True)
+    assert remaining == pytest.approx(0.2, abs=0.02)
+
+    # Deadline awal (0.15) sudah lewat, pintu tetap terbuka
+    time.sleep(0.1)
+    assert scheduler.status("main")["is_open"]
+    assert states(transitions) == [True]
+
+    time.sleep(0.2)
+    assert states(transitions) == [True, False]
+
+
+def test_extend_never_shortens(door):
+    scheduler, _ = door
+    scheduler.open("main", 0.5)
+    assert scheduler.extend("main", 0.05) == pytest.approx(0.5, abs=0.02)
+
+
+def test_extend_on_locked_door_does_nothing(door):
+    scheduler, transitions = door
+    assert scheduler.extend("main", 1) is None
+    assert transitions == []
+
+
+def test_stale_deadline_does_not_lock_reopened_door(door):
+    scheduler, transitions = door
+    scheduler.open("main", 0.1)
+    assert scheduler.lock("main") is True
+    scheduler.open("main", 0.3)
+
+    # Entry heap 0.1 dari pembukaan pertama sudah basi
+    time.sleep(0.2)
+    assert scheduler.status("main")["is_open"]
+    assert states(transitions) == [True, False, True]
+
+
+def test_many_opens_use_one_thread(door):
+    scheduler, transitions = door
+    before = threading.active_count()
+    callers = [
+        threading.Thread(target=scheduler.open, args=("main", 0.1), kwargs={"extend": True})
+        for _ in range(20)
+    ]
+    for caller in callers:
+        caller.start()
+    for caller in callers:
+        caller.join()
+
+    assert threading.active_count() <= before + 1
+    time.sleep(0.2)
+    assert states(transitions) == [True, False]
+
+
+def test_extend_notifies_on_change():
+    changes = []
+    scheduler = DoorScheduler()
+    scheduler.add_door("main", lambda active: None,
+                       lambda door_id, is_open: changes.append((is_open, scheduler.status(door_id))))
+    try:
+        scheduler.open("main", 0.2)
+        scheduler.open("main", 1, extend=True)
+        # Deadline tidak maju: tidak ada event
+        scheduler.extend("main", 0.1)
+        scheduler.lock("main")
+    finally:
+        scheduler.stop()
+
+    assert [is_open for is_open, _ in changes] == [True, True, False]
+    assert changes[1][1]["remaining"] == pytest.approx(1, abs=0.05)
@@ -0,0 +1,70 @@
+import threading
+import time
+
+import pytest
+
+from doorlock.door_scheduler import DoorScheduler
+from doorlock.doors import Door, DoorRegistry
+from doorlock.gpio_backend import SimulatedBackend
+
+
+def test_unlock_returns_none_when_scheduler_times_out():
+    blocked = threading.Event()
+    scheduler = DoorScheduler(command_timeout=0.05)
+    door = Door("main", scheduler, lambda active: blocked.wait(1))
+    try:
+        # Relay pertama macet di thread scheduler; perintah berikutnya timeout
+        threading.Thread(target=door.unlock, args=(5,), daemon=True).start()
+        assert door.unlock(5) is None
+    finally:
+        blocked.set()
+        scheduler.stop()
+
+
+@pytest.fixture
+def registry():
+    backend = SimulatedBackend(verbose=False)
+
+    def relay_factory(pin, active_low):
+        backend.setup_output(pin, active_low)  # awal terkunci
+        return lambda active: backend.write(pin, active != active_low)
+
+    scheduler = DoorScheduler()
+    registry = DoorRegistry(scheduler, relay_factory).configure({
+        "main": {"name": "Pintu Utama", "pin": 2, "active_low": True, "delay": 0.1},
+        "gudang": {"pin": 3, "active_low": False, "delay": 0.3},
+    })
+    yield registry, backend
+    scheduler.stop()
+
+
+def test_each_door_uses_its_own_polarity_and_delay(registry):
+    registry, backend = registry
+    main, gudang = registry.get("main"), registry.get("gudang")
+
+    assert main.unlock() == 0.1
+    assert gudang.unlock() == 0.3
+    time.sleep(0.05)
+    assert backend.level(2) is False  # active-low: LOW = terbuka
+    assert backend.level(3) is True
+
+    time.sleep(0.15)
+    assert main.is_locked and not gudang.is_locked
+    assert backend.level(2) is True
+
+    time.sleep(0.2)
+    assert gudang.is_locked
+    assert backend.level(3) is False
+    assert backend.pulses(2, False)[0] == pytest.approx(0.1, abs=0.05)
+    assert backend.pulses(3, True)[0] == pytest.approx(0.3, abs=0.05)
+
+
+def test_registry_rejects_duplicate_door_or_pin(registry):
+    registry, _ = registry
+    with pytest.raises(ValueError):
+        registry.add("main", pin=4)
+    with pytest.raises(ValueError):
+        registry.add("lobby", pin=2)
+    assert len(registry) == 2
+    assert set(registry.status_all()) == {"main", "gudang"}
+    assert registry.status_all()["main"]["name"] == "Pintu Utama"
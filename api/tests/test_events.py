@@ -0,0 +1,63 @@
+from doorlock.events import EventBus, sse_stream
+
+
+def drain(subscription):
+    events = []
+    while True:
+        event = subscription.get(timeout=0)
+        if event is None:
+            return events
+        events.append(event)
+
+
+def test_slow_subscriber_drops_oldest():
+    bus = EventBus()
+    subscription = bus.subscribe(max_queue=3)
+    for n in range(5):
+        bus.publish("door", {"n": n})
+
+    assert [event.data["n"] for event in drain(subscription)] == [2, 3, 4]
+    assert subscription.dropped == 2
+
+
+def test_dropped_count_is_reported_in_stream():
+    bus = EventBus()
+    subscription = bus.subscribe(max_queue=2)
+    stream = sse_stream(subscription, heartbeat=0.01)
+    assert next(stream).startswith("retry:")
+    for n in range(3):
+        bus.publish("door", {"n": n})
+
+    assert next(stream) == 'event: dropped\ndata: {"count": 1}\n\n'
+    assert next(stream).startswith("id: 2\nevent: door\n")
+    assert next(stream).startswith("id: 3\nevent: door\n")
+    assert next(stream) == ": heartbeat\n\n"
+    stream.close()
+    assert bus.stats()["subscribers"] == 0
+
+
+def test_last_event_id_replays_missed_events():
+    bus = EventBus(replay=3)
+    for n in range(5):
+        bus.publish("door" if n % 2 else "absen", {"n": n})
+
+    subscription = bus.subscribe(last_event_id=2)
+    assert [event.id for event in drain(subscription)] == [3, 4, 5]
+
+    # Buffer replay terbatas; filter tipe tetap berlaku
+    subscription = bus.subscribe(types=["door"], last_event_id=0)
+    assert [event.id for event in drain(subscription)] == [4]
+
+    bus.publish("door", {"n": 5})
+    assert [event.id for event in drain(subscription)] == [6]
+
+
+def test_close_streams_ends_sse_generator():
+    bus = EventBus()
+    subscription = bus.subscribe()
+    stream = sse_stream(subscription, heartbeat=5)
+    assert next(stream).startswith("retry:")
+
+    assert bus.close_streams() == 1
+    assert list(stream) == []
+    assert bus.stats()["subscribers"] == 0
@@ -0,0 +1,26 @@
+import pytest
+
+from doorlock.gpio_backend import GPIOBackend, SimulatedBackend
+
+
+def test_incomplete_backend_fails_at_construction():
+    class SetupOnly(GPIOBackend):
+        name = "setup-only"
+
+        def setup_output(self, pin, value):
+            pass
+
+    with pytest.raises(TypeError, match="write"):
+        SetupOnly()
+    with pytest.raises(TypeError):
+        GPIOBackend()
+
+
+def test_simulated_backend_records_edges():
+    backend = SimulatedBackend(verbose=False)
+    backend.setup_output(2, True)
+    backend.write(2, True)  # level sama, bukan edge
+    backend.write(2, False)
+
+    assert [level for _, _, level in backend.timeline(2)] == [True, False]
+    assert backend.level(2) is False
@@ -0,0 +1,109 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+
+from doorlock.group_writer import GroupCommitWriter, WriteFailed
+
+
+class FakePool:
+    """attendance_logs di memori; commit bisa ditahan atau digagalkan"""
+
+    def __init__(self):
+        self.rows = []
+        self.gate = threading.Event()
+        self.gate.set()
+        self.error = None
+
+    @contextmanager
+    def connection(self):
+        yield FakeConnection(self)
+
+    def ping(self):
+        return False
+
+
+class FakeConnection:
+    def __init__(self, pool):
+        self.pool = pool
+        self.staged = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.pool.gate.wait()
+        if self.pool.error:
+            raise self.pool.error
+        self.pool.rows.extend(self.staged)
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql, params):
+        self.conn.staged.append(params)
+
+    def executemany(self, sql, rows):
+        self.conn.staged.extend(rows)
+
+    def close(self):
+        pass
+
+
+def test_timeout_waits_for_batch_already_being_written():
+    pool = FakePool()
+    pool.gate.clear()
+    writer = GroupCommitWriter(pool)
+
+    threading.Timer(0.2, pool.gate.set).start()
+    # Writer sudah memegang baris ini saat timeout lewat: tunggu hasilnya
+    writer.submit(1, "masuk", "2026-10-18 08:00:00", timeout=0.05)
+    assert pool.rows == [(1, "masuk", "2026-10-18 08:00:00")]
+
+
+def test_timeout_cancels_row_still_in_queue():
+    pool = FakePool()
+    pool.gate.clear()
+    writer = GroupCommitWriter(pool)
+
+    first = threading.Thread(target=writer.submit, args=(1, "masuk", "2026-10-18 08:00:00"))
+    first.start()
+    time.sleep(0.05)  # writer tertahan di commit baris pertama
+
+    with pytest.raises(TimeoutError):
+        writer.submit(2, "masuk", "2026-10-18 08:00:01", timeout=0.05)
+
+    pool.gate.set()
+    first.join()
+    time.sleep(0.05)
+    # Baris yang dibatalkan tidak pernah ditulis, jadi retry tidak membuat duplikat
+    assert pool.rows == [(1, "masuk", "2026-10-18 08:00:00")]
+
+
+def test_each_caller_gets_its_own_exception():
+    pool = FakePool()
+    pool.gate.clear()
+    pool.error = RuntimeError("Lock wait timeout")
+    writer = GroupCommitWriter(pool)
+    errors = []
+
+    def tap(employee_id):
+        try:
+            writer.submit(employee_id, "masuk", "2026-10-18 08:00:00")
+        except WriteFailed as e:
+            errors.append(e)
+
+    taps = [threading.Thread(target=tap, args=(i,)) for i in range(4)]
+    for t in taps:
+        t.start()
+    time.sleep(0.05)
+    pool.gate.set()
+    for t in taps:
+        t.join()
+
+    assert len(errors) == 4
+    assert len({id(e) for e in errors}) == 4
+    assert all(e.__cause__ is pool.error for e in errors)
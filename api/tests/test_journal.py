@@ -0,0 +1,109 @@
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from doorlock.journal import AttendanceJournal, JournalSyncer
+
+
+class FakeMySQL:
+    """attendance_logs di memori; INSERT sengaja lambat agar sync bisa tumpang tindih"""
+
+    def __init__(self, insert_delay=0.05):
+        self.rows = []
+        self.insert_delay = insert_delay
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        yield FakeConnection(self)
+
+    def ping(self):
+        return True
+
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+
+    def cursor(self):
+        return FakeCursor(self.db)
+
+    def commit(self):
+        pass
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self._result = []
+
+    def execute(self, sql, params):
+        if sql.startswith("SELECT"):
+            with self.db.lock:
+                self._result = [
+                    (employee_id, status, datetime.strptime(event_time, "%Y-%m-%d %H:%M:%S"))
+                    for employee_id, status, event_time in self.db.rows
+                ]
+        else:
+            self.executemany(sql, [params])
+
+    def executemany(self, sql, rows):
+        time.sleep(self.db.insert_delay)
+        with self.db.lock:
+            self.db.rows.extend(rows)
+
+    def fetchall(self):
+        return self._result
+
+    def close(self):
+        pass
+
+
+def make_journal(tmp_path, taps):
+    journal = AttendanceJournal(str(tmp_path / "journal.db"))
+    start = datetime(2024, 1, 2, 8, 0, 0)
+    for i in range(taps):
+        journal.append(i + 1, "masuk", start + timedelta(seconds=i))
+    return journal
+
+
+def test_concurrent_sync_inserts_each_row_once(tmp_path):
+    journal = make_journal(tmp_path, 30)
+    db = FakeMySQL()
+    syncer = JournalSyncer(journal, db, batch_size=10)
+
+    threads = [threading.Thread(target=syncer.flush, args=(10,)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(db.rows) == 30
+    assert len(set(db.rows)) == 30
+    assert journal.stats()["pending"] == 0
+
+
+def test_flush_stops_after_max_batches(tmp_path):
+    journal = make_journal(tmp_path, 25)
+    db = FakeMySQL(insert_delay=0)
+    syncer = JournalSyncer(journal, db, batch_size=10)
+
+    assert syncer.flush(2) is False
+    assert journal.stats()["pending"] == 5
+    assert syncer.flush(2) is True
+    assert journal.stats()["pending"] == 0
+
+
+def test_sync_skips_rows_already_in_mysql(tmp_path):
+    journal = make_journal(tmp_path, 3)
+    db = FakeMySQL(insert_delay=0)
+    db.rows.append((2, "masuk", "2024-01-02 08:00:01"))
+    syncer = JournalSyncer(journal, db, batch_size=10)
+
+    assert syncer.sync_once() == 3
+    assert sorted(db.rows) == [
+        (1, "masuk", "2024-01-02 08:00:00"),
+        (2, "masuk", "2024-01-02 08:00:01"),
+        (3, "masuk", "2024-01-02 08:00:02"),
+    ]
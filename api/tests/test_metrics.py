@@ -0,0 +1,60 @@
+import pytest
+
+from doorlock.metrics import MetricsRegistry
+
+
+def test_counter_and_gauge_exposition():
+    registry = MetricsRegistry(prefix="doorlock_")
+    taps = registry.counter("absen_total", "Hasil absensi", ["status", "result"])
+    taps.inc(status="masuk", result="success")
+    taps.inc(2, status="masuk", result="success")
+    taps.inc(status="pulang", result="info")
+    registry.gauge("doors_open", "Pintu terbuka").set(1.0)
+
+    assert registry.render() == (
+        "# HELP doorlock_absen_total Hasil absensi\n"
+        "# TYPE doorlock_absen_total counter\n"
+        'doorlock_absen_total{status="masuk",result="success"} 3\n'
+        'doorlock_absen_total{status="pulang",result="info"} 1\n'
+        "# HELP doorlock_doors_open Pintu terbuka\n"
+        "# TYPE doorlock_doors_open gauge\n"
+        "doorlock_doors_open 1\n"
+    )
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latency", ["route"], buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 3):
+        latency.observe(value, route="/absen")
+
+    assert registry.render().splitlines()[2:] == [
+        'latency_seconds_bucket{route="/absen",le="0.1"} 2',
+        'latency_seconds_bucket{route="/absen",le="1"} 3',
+        'latency_seconds_bucket{route="/absen",le="+Inf"} 4',
+        'latency_seconds_sum{route="/absen"} 3.65',
+        'latency_seconds_count{route="/absen"} 4',
+    ]
+
+
+def test_callback_labels_escaping_and_failures():
+    registry = MetricsRegistry()
+    registry.callback("pool_idle", "Koneksi idle", lambda: [({"pool": 'a"b\\c\nd'}, 2)], ["pool"])
+    registry.callback("breaker_open", "Sirkuit terbuka", lambda: True)
+    registry.callback("broken", "Sumber gagal", lambda: 1 / 0)
+    registry.callback("unknown", "Belum ada nilai", lambda: None)
+
+    lines = registry.render().splitlines()
+    assert 'pool_idle{pool="a\\"b\\\\c\\nd"} 2' in lines
+    assert "breaker_open 1" in lines
+    assert "unknown NaN" in lines
+    assert not any("broken" in line for line in lines)
+
+
+def test_label_mismatch_and_duplicate_name():
+    registry = MetricsRegistry()
+    counter = registry.counter("requests_total", "Request", ["route"])
+    with pytest.raises(ValueError):
+        counter.inc(method="GET")
+    with pytest.raises(ValueError):
+        registry.gauge("requests_total", "Lagi")
@@ -0,0 +1,73 @@
+import pytest
+
+from doorlock import rate_limit
+from doorlock.rate_limit import TokenBucketLimiter, retry_after_header
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_burst_then_refill(clock):
+    limiter = TokenBucketLimiter(rate=2, burst=3)
+    key = ["token:abc@10.0.0.5"]
+
+    assert [limiter.allow(key)[0] for _ in range(3)] == [True, True, True]
+    allowed, retry_after = limiter.allow(key)
+    assert not allowed
+    assert retry_after == pytest.approx(0.5)
+
+    clock[0] += 0.5
+    assert limiter.allow(key) == (True, 0.0)
+    assert not limiter.allow(key)[0]
+
+    # Refill dibatasi burst
+    clock[0] += 60
+    assert [limiter.allow(key)[0] for _ in range(4)] == [True, True, True, False]
+
+
+def test_keys_are_independent(clock):
+    limiter = TokenBucketLimiter(rate=1, burst=1)
+    assert limiter.allow(["token:abc@10.0.0.5"])[0]
+    assert not limiter.allow(["token:abc@10.0.0.5"])[0]
+    # Klien lain dengan token yang sama tidak ikut tertahan
+    assert limiter.allow(["token:abc@10.0.0.9"])[0]
+
+
+def test_rejection_does_not_consume_other_keys(clock):
+    limiter = TokenBucketLimiter(rate=1, burst=1)
+    assert limiter.allow(["ip:a"])[0]
+    assert not limiter.allow(["ip:b", "ip:a"])[0]
+    assert limiter.allow(["ip:b"])[0]
+
+
+def test_idle_buckets_are_evicted(clock):
+    limiter = TokenBucketLimiter(rate=1, burst=2, idle_ttl=10)
+    limiter.allow(["ip:a"])
+    clock[0] += 5
+    limiter.allow(["ip:b"])
+    clock[0] += 6
+    limiter.allow(["ip:c"])
+
+    assert limiter.stats()["clients"] == 2
+    assert limiter.stats()["evicted"] == 1
+    assert "ip:a" not in limiter._buckets
+
+
+def test_max_clients_evicts_least_recent(clock):
+    limiter = TokenBucketLimiter(rate=1, burst=2, max_clients=2)
+    limiter.allow(["ip:a"])
+    limiter.allow(["ip:b"])
+    limiter.allow(["ip:a"])  # a jadi yang terbaru
+    limiter.allow(["ip:c"])
+
+    assert list(limiter._buckets) == ["ip:a", "ip:c"]
+    assert limiter.stats()["evicted"] == 1
+
+
+def test_retry_after_header_rounds_up():
+    assert retry_after_header(0.01) == "1"
+    assert retry_after_header(2.1) == "3"
@@ -0,0 +1,135 @@
+import zlib
+from contextlib import contextmanager
+from functools import reduce
+
+import pytest
+
+from doorlock import roster_cache
+from doorlock.circuit_breaker import CircuitBreaker
+from doorlock.roster_cache import RosterCache, row_checksum
+
+
+def concat_ws(separator, *values):
+    """CONCAT_WS MySQL: argumen NULL dilewati, bukan ditulis"""
+    return separator.join(str(value) for value in values if value is not None)
+
+
+def employee(id, code, name, is_active):
+    return {"id": id, "code": code, "name": name, "is_active": is_active}
+
+
+@pytest.mark.parametrize("row, expected", [
+    # SELECT CRC32(CONCAT_WS('|', 1, 'EMP001', 'Andi', 1)) -> 4088926140
+    (employee(1, "EMP001", "Andi", True), 4088926140),
+    # SELECT CRC32(CONCAT_WS('|', 7, 'EMP007', NULL, 0)) -> 3797984341
+    (employee(7, "EMP007", None, False), 3797984341),
+    # SELECT CRC32(CONCAT_WS('|', 8, 'EMP008', 'Dewi', NULL)) -> 983056947
+    (employee(8, "EMP008", "Dewi", None), 983056947),
+])
+def test_row_checksum_matches_mysql(row, expected):
+    assert row_checksum(row) == expected
+
+
+@pytest.mark.parametrize("row", [
+    employee(1, "EMP001", "Andi", 1),
+    employee(2, "EMP002", "Bü Tini", 0),
+    employee(3, "EMP003", None, 1),
+    employee(4, "EMP004", "", None),
+])
+def test_row_checksum_follows_concat_ws(row):
+    text = concat_ws("|", row["id"], row["code"], row["name"], row["is_active"])
+    assert row_checksum(row) == zlib.crc32(text.encode("utf-8"))
+
+
+def test_local_checksum_is_bit_xor_of_rows():
+    rows = [
+        employee(1, "EMP001", "Andi", 1),
+        employee(2, "EMP002", None, 0),
+        employee(3, "EMP003", "Citra", 1),
+    ]
+    roster = RosterCache(pool=None)
+    for row in rows:
+        roster._put_locked(row)
+
+    expected = reduce(lambda acc, row: acc ^ zlib.crc32(
+        concat_ws("|", row["id"], row["code"], row["name"], row["is_active"]).encode("utf-8")
+    ), rows, 0)
+    assert roster.local_checksum() == (3, expected)
+
+
+class LookupPool:
+    """Pool palsu yang menghitung query lookup kode"""
+
+    def __init__(self, employees, breaker=None):
+        self.employees = {employee["code"]: employee for employee in employees}
+        self.breaker = breaker
+        self.queries = 0
+
+    @contextmanager
+    def connection(self):
+        if self.breaker is not None:
+            self.breaker.before_call()
+        yield self
+
+    def cursor(self, dictionary=False):
+        return LookupCursor(self)
+
+
+class LookupCursor:
+    def __init__(self, pool):
+        self.pool = pool
+        self._rows = []
+
+    def execute(self, sql, params):
+        self.pool.queries += 1
+        self._rows = [self.pool.employees[code] for code in params if code in self.pool.employees]
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return self._rows
+
+    def close(self):
+        pass
+
+
+def test_unknown_code_is_cached_for_negative_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(roster_cache.time, "monotonic", lambda: now[0])
+    pool = LookupPool([employee(1, "EMP001", "Andi", 1)])
+    roster = RosterCache(pool, negative_ttl=30)
+
+    assert [roster.get("BAD") for _ in range(5)] == [None] * 5
+    assert roster.get_many(["BAD"]) == {}
+    assert pool.queries == 1
+    assert roster.stats()["negative_hits"] == 5
+
+    now[0] += 31
+    assert roster.get("BAD") is None
+    assert pool.queries == 2
+
+
+def test_new_employee_clears_negative_entry():
+    pool = LookupPool([])
+    roster = RosterCache(pool)
+    assert roster.get("EMP009") is None
+
+    # Karyawan baru masuk lewat delta sync / get_many
+    with roster._lock:
+        roster._put_locked(employee(9, "EMP009", "Eka", 1))
+    assert roster.get("EMP009")["name"] == "Eka"
+
+
+def test_open_breaker_answers_not_found_without_query():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure("down")
+    pool = LookupPool([employee(1, "EMP001", "Andi", 1)], breaker=breaker)
+    roster = RosterCache(pool)
+    with roster._lock:
+        roster._put_locked(employee(2, "EMP002", "Budi", 1))
+
+    assert roster.get("EMP002")["name"] == "Budi"
+    assert roster.get("EMP001") is None
+    assert roster.get_many(["EMP001", "EMP002"]) == {"EMP002": roster.get("EMP002")}
+    assert pool.queries == 0
@@ -0,0 +1,107 @@
+from contextlib import contextmanager
+from datetime import date, datetime
+
+import pytest
+
+from doorlock import state_cache
+from doorlock.state_cache import DailyStateCache
+
+
+@pytest.fixture
+def today(monkeypatch):
+    current = [date(2024, 3, 4)]
+
+    class FakeDate(date):
+        @classmethod
+        def today(cls):
+            return current[0]
+
+    monkeypatch.setattr(state_cache, "date", FakeDate)
+    return current
+
+
+class FakeCursor:
+    def __init__(self, pool):
+        self.pool = pool
+
+    def execute(self, query, params):
+        self.pool.params = params
+        if self.pool.during_query:
+            self.pool.during_query()
+
+    def fetchall(self):
+        return self.pool.rows
+
+    def close(self):
+        pass
+
+
+class FakeConn:
+    def __init__(self, pool):
+        self.pool = pool
+
+    def cursor(self, dictionary=False):
+        return FakeCursor(self.pool)
+
+
+class FakePool:
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.params = None
+        self.during_query = None
+
+    @contextmanager
+    def connection(self):
+        yield FakeConn(self)
+
+
+def at(hour, minute=0, day=date(2024, 3, 4)):
+    return datetime(day.year, day.month, day.day, hour, minute)
+
+
+def test_midnight_rollover_clears_entries_but_stays_warm(today):
+    pool = FakePool([{"employee_id": 7, "status": "masuk", "event_time": at(8)}])
+    cache = DailyStateCache(pool)
+    assert cache.warm() == 1
+    assert pool.params == (at(0), at(0, day=date(2024, 3, 5)))
+    assert cache.get(7)["status"] == "masuk"
+
+    today[0] = date(2024, 3, 5)
+    assert cache.get(7) is None
+    assert cache.is_warm()
+    assert cache.stats() == {"day": "2024-03-05", "warm": True, "employees": 0}
+
+    # Log dengan tanggal kemarin tidak masuk ke hari yang baru
+    cache.record(7, "pulang", at(23, 59))
+    assert cache.get(7) is None
+    cache.record(7, "masuk", at(8, day=date(2024, 3, 5)))
+    assert cache.get(7)["status"] == "masuk"
+
+
+def test_rewarm_keeps_newer_write_through(today):
+    pool = FakePool([
+        {"employee_id": 7, "status": "masuk", "event_time": at(8)},
+        {"employee_id": 9, "status": "masuk", "event_time": at(9)},
+    ])
+    cache = DailyStateCache(pool)
+    cache.record(9, "lembur", at(7))  # lebih lama dari hasil query
+
+    # Tap yang di-commit saat query warm berjalan
+    pool.during_query = lambda: cache.record(7, "pulang", at(17))
+    assert cache.warm() == 2
+
+    assert cache.get(7) == {"status": "pulang", "event_time": at(17)}
+    assert cache.get(9) == {"status": "masuk", "event_time": at(9)}
+
+
+def test_rewarm_across_midnight_is_discarded(today):
+    pool = FakePool([{"employee_id": 7, "status": "masuk", "event_time": at(23)}])
+    cache = DailyStateCache(pool)
+
+    def cross_midnight():
+        today[0] = date(2024, 3, 5)
+
+    pool.during_query = cross_midnight
+    assert cache.warm() == 0
+    assert not cache.is_warm()
+    assert cache.get(7) is None
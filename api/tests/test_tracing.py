@@ -0,0 +1,47 @@
+import json
+import threading
+import time
+
+from doorlock import tracing
+from doorlock.tracing import Tracer
+
+
+def test_slow_traces_are_exported_in_background(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracer = Tracer(export_path=str(path), export_min_ms=0)
+    for i in range(3):
+        with tracer.trace("api.absen", trace_id=f"t{i}"):
+            with tracer.span("absen.persist"):
+                pass
+    tracer.flush()
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line["trace_id"] for line in lines] == ["t0", "t1", "t2"]
+    assert lines[0]["spans"][0]["name"] == "absen.persist"
+    assert tracer.stats()["exported"] == 3
+
+
+def test_slow_disk_does_not_block_other_traces(tmp_path, monkeypatch):
+    gate = threading.Event()
+    real_open = open
+
+    def slow_open(*args, **kwargs):
+        gate.wait(2)  # SD card yang macet
+        return real_open(*args, **kwargs)
+
+    monkeypatch.setattr(tracing, "open", slow_open, raising=False)
+    tracer = Tracer(export_path=str(tmp_path / "traces.jsonl"), export_queue=2)
+
+    started = time.monotonic()
+    for _ in range(5):
+        with tracer.trace("api.absen"):
+            pass
+        tracer.query(limit=1)
+    assert time.monotonic() - started < 0.5
+
+    gate.set()
+    tracer.flush()
+    stats = tracer.stats()
+    # Satu baris sedang ditulis, dua antre, sisanya dibuang
+    assert stats["exported"] + stats["export_dropped"] == 5
+    assert stats["export_dropped"] >= 1
@@ -0,0 +1,59 @@
+import threading
+import time
+
+from doorlock.events import EventBus, sse_stream
+from doorlock.wsgi_server import DrainMiddleware
+
+
+def sse_app(events):
+    def app(environ, start_response):
+        start_response("200 OK", [("Content-Type", "text/event-stream")])
+        return (chunk.encode() for chunk in sse_stream(events.subscribe(), heartbeat=30))
+    return app
+
+
+def serve(middleware, environ=None):
+    """Jalankan satu request seperti worker WSGI; return (status, body)"""
+    status = []
+    body = middleware(environ or {}, lambda s, headers: status.append(s))
+    try:
+        return status[0], [chunk for chunk in body]
+    finally:
+        if hasattr(body, "close"):
+            body.close()
+
+
+def test_drain_ends_event_streams():
+    events = EventBus()
+    middleware = DrainMiddleware(sse_app(events), on_drain=events.close_streams)
+    worker = threading.Thread(target=serve, args=(middleware,))
+    worker.start()
+    time.sleep(0.05)
+    assert middleware.in_flight == 1
+
+    started = time.monotonic()
+    assert middleware.drain(5) == 0
+    assert time.monotonic() - started < 1
+    worker.join(1)
+    assert not worker.is_alive()
+    assert events.stats()["subscribers"] == 0
+
+
+def test_drain_without_callback_waits_for_stream():
+    events = EventBus()
+    middleware = DrainMiddleware(sse_app(events))
+    worker = threading.Thread(target=serve, args=(middleware,), daemon=True)
+    worker.start()
+    time.sleep(0.05)
+
+    assert middleware.drain(0.1) == 1
+    events.close_streams()
+    worker.join(1)
+
+
+def test_draining_rejects_new_requests():
+    middleware = DrainMiddleware(lambda environ, start_response: [b"ok"])
+    middleware.drain(0)
+    status, body = serve(middleware)
+    assert status.startswith("503")
+    assert b"dihentikan" in body[0]
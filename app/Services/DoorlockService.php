@@ -4,6 +4,7 @@
 
 use Illuminate\Support\Facades\Http;
 use Illuminate\Support\Facades\Log;
+use Illuminate\Support\Str;
 
 class DoorlockService
 {
@@ -92,11 +93,18 @@ private function openDoor(int $delay = 5, array $metadata = []): array
             'delay' => $delay
         ];
 
+        // Correlation ID: trace di Pi bisa dicari via GET /traces?trace_id=...
+        $requestId = (string) Str::uuid();
+        $metadata['request_id'] = $requestId;
+
         $startTime = microtime(true);
 
         try {
             $response = Http::timeout($this->timeout)
-                ->withHeaders(['Content-Type' => 'application/json'])
+                ->withHeaders([
+                    'Content-Type' => 'application/json',
+                    'X-Request-ID' => $requestId
+                ])
                 ->post($endpoint, $payload);
 
             $duration = round((microtime(true) - $startTime) * 1000, 2); // ms
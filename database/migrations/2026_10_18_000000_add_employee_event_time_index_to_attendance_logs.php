@@ -0,0 +1,27 @@
+<?php
+
+use Illuminate\Database\Migrations\Migration;
+use Illuminate\Database\Schema\Blueprint;
+use Illuminate\Support\Facades\Schema;
+
+return new class extends Migration
+{
+    public function up(): void
+    {
+        // Hot query dari Raspberry Pi: log terakhir karyawan per hari (range pada event_time)
+        if (Schema::hasTable('attendance_logs') && !Schema::hasIndex('attendance_logs', ['employee_id', 'event_time'])) {
+            Schema::table('attendance_logs', function (Blueprint $table) {
+                $table->index(['employee_id', 'event_time'], 'idx_employee_date');
+            });
+        }
+    }
+
+    public function down(): void
+    {
+        if (Schema::hasIndex('attendance_logs', 'idx_employee_date')) {
+            Schema::table('attendance_logs', function (Blueprint $table) {
+                $table->dropIndex('idx_employee_date');
+            });
+        }
+    }
+};
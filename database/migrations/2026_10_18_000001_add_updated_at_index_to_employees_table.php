@@ -0,0 +1,27 @@
+<?php
+
+use Illuminate\Database\Migrations\Migration;
+use Illuminate\Database\Schema\Blueprint;
+use Illuminate\Support\Facades\Schema;
+
+return new class extends Migration
+{
+    public function up(): void
+    {
+        // Delta sync roster dari Raspberry Pi: baris yang berubah sejak updated_at terakhir
+        if (Schema::hasTable('employees') && !Schema::hasIndex('employees', ['updated_at'])) {
+            Schema::table('employees', function (Blueprint $table) {
+                $table->index('updated_at', 'idx_employees_updated_at');
+            });
+        }
+    }
+
+    public function down(): void
+    {
+        if (Schema::hasIndex('employees', 'idx_employees_updated_at')) {
+            Schema::table('employees', function (Blueprint $table) {
+                $table->dropIndex('idx_employees_updated_at');
+            });
+        }
+    }
+};